@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DO SAEV
+=================
+
+Gera dados sintéticos, cronometra o ETL (SQLite e DuckDB), a migração para
+DuckDB e todas as consultas do dashboard, da galeria, do analytics e dos
+relatórios, e grava o resultado em JSON com percentis.
+
+Uso:
+    python benchmark.py [--rows 100000] [--repeat 5] [--engines sqlite duckdb]
+                        [--output reports/benchmark.json] [--baseline anterior.json]
+
+Exemplos:
+    python benchmark.py                                  # 100 mil respostas
+    python benchmark.py --rows 50000000 --work-dir /dados/bench
+    python benchmark.py --engines sqlite duckdb parquet
+    python benchmark.py --baseline reports/benchmark_100000_anterior.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from src.benchmark.suite import (
+    BENCHMARK_ENGINES, DEFAULT_REGRESSION_THRESHOLD, DEFAULT_REPEAT, DEFAULT_ROWS, DEFAULT_YEARS,
+    SAEVBenchmark, compare_results, save_results
+)
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark do SAEV (ETL, migração e consultas)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python benchmark.py                                  # 100 mil respostas
+  python benchmark.py --rows 50000000 --work-dir /dados/bench
+  python benchmark.py --engines sqlite duckdb parquet
+  python benchmark.py --baseline reports/benchmark_100000_anterior.json
+        """
+    )
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                        help=f'Total de respostas sintéticas (padrão: {DEFAULT_ROWS:,})')
+    parser.add_argument('--years', type=int, nargs='+', default=list(DEFAULT_YEARS),
+                        help='Anos das avaliações sintéticas')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Execuções cronometradas de cada consulta (padrão: {DEFAULT_REPEAT})')
+    parser.add_argument('--etl-repeat', type=int, default=1,
+                        help='Execuções completas do ETL (padrão: 1)')
+    parser.add_argument('--engines', nargs='+', choices=BENCHMARK_ENGINES, default=['sqlite', 'duckdb'],
+                        help='Motores avaliados (padrão: sqlite duckdb)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador de dados')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos na geração dos dados sintéticos (padrão: núcleos da máquina)')
+    parser.add_argument('--work-dir', help='Pasta de trabalho (padrão: temporária, removida ao final)')
+    parser.add_argument('--reuse-data', action='store_true',
+                        help='Reutiliza os CSVs já gerados na pasta de trabalho')
+    parser.add_argument('--output', help='Arquivo JSON do resultado (padrão: reports/benchmark_<linhas>_<data>.json)')
+    parser.add_argument('--baseline', help='Resultado anterior para detectar regressões')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help=f'Razão da mediana que caracteriza regressão (padrão: {DEFAULT_REGRESSION_THRESHOLD})')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    print("⏱️ " + "=" * 60)
+    print("⏱️  BENCHMARK SAEV")
+    print("⏱️ " + "=" * 60)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='saev_benchmark_')
+    output = args.output or (
+        f"reports/benchmark_{args.rows}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+
+    try:
+        benchmark = SAEVBenchmark(work_dir, rows=args.rows, repeat=args.repeat,
+                                  etl_repeat=args.etl_repeat, engines=args.engines,
+                                  years=args.years, seed=args.seed, workers=args.workers)
+        result = benchmark.run(generate=not args.reuse_data)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output_path = save_results(result, output)
+    print(f"\n💾 Resultado gravado em: {output_path}")
+
+    for engine, skipped in result['skipped'].items():
+        for group, reason in skipped.items():
+            print(f"⚠️  {engine}: consultas de {group} não medidas ({reason})")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        regressions = compare_results(baseline, result, threshold=args.threshold)
+        if regressions:
+            print(f"\n🐢 {len(regressions)} regressões (p50 ≥ {args.threshold}x a referência):")
+            for regression in regressions:
+                print(f"   • {regression['key']}: {regression['baseline'] * 1000:.1f} ms → "
+                      f"{regression['current'] * 1000:.1f} ms ({regression['ratio']}x)")
+            sys.exit(1)
+        print("\n✅ Nenhuma regressão em relação à referência")
+
+
+if __name__ == "__main__":
+    main()
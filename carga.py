@@ -66,6 +66,18 @@ def main():
         # Criar processador de dados
         processor = SAEVDataProcessor(db_file)
         
+        # Motor do ETL: 'sqlite' (padrão, com migração) ou 'duckdb' (carga nativa)
+        engine = os.getenv('SAEV_ETL_ENGINE', 'sqlite').lower()
+        
+        # Carga incremental: recarrega apenas as avaliações novas ou alteradas
+        incremental = os.getenv('SAEV_ETL_INCREMENTAL', '').lower() in ['1', 'sim', 'true']
+        
+        # Remover a tabela bruta avaliacao após o Star Schema (economiza disco)
+        drop_avaliacao = os.getenv('SAEV_DROP_AVALIACAO', '').lower() in ['1', 'sim', 'true']
+        
+        # Exportação Parquet particionada para análise fora do banco (opcional)
+        parquet_dir = os.getenv('SAEV_PARQUET_DIR') or None
+        
         # Executar processo completo de ETL com DuckDB
         processor.full_etl_process(
             csv_folder=csv_folder,  # Usar pasta em vez de arquivo único
@@ -73,14 +85,22 @@ def main():
             apply_star_schema=True,
             overwrite_db=True,
             include_duckdb=True,    # NOVO: Migração automática para DuckDB
-            force_duckdb=True       # NOVO: Forçar recriação do DuckDB
+            force_duckdb=True,      # NOVO: Forçar recriação do DuckDB
+            workers=int(os.getenv('SAEV_ETL_WORKERS', '1')),  # Processos para parsing dos CSVs
+            engine=engine,
+            incremental=incremental,
+            parquet_dir=parquet_dir,
+            drop_avaliacao=drop_avaliacao
         )
         
         print()
         print("="*80)
         print("🎉 CARGA CONCLUÍDA COM SUCESSO!")
-        print(f"📊 Dados SQLite disponíveis em: {db_file}")
+        if engine != 'duckdb':
+            print(f"📊 Dados SQLite disponíveis em: {db_file}")
         print(f"🦆 Dados DuckDB disponíveis em: {db_file.replace('.db', '.duckdb')}")
+        if parquet_dir:
+            print(f"📦 Conjunto Parquet disponível em: {parquet_dir}")
         print("⭐ Star Schema aplicado para análises otimizadas")
         print("🚀 Performance otimizada com DuckDB")
         print()
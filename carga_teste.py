@@ -88,6 +88,9 @@ def main():
         # Criar processador de dados
         processor = SAEVDataProcessor(db_file)
         
+        # Motor do ETL: 'sqlite' (padrão, com migração) ou 'duckdb' (carga nativa)
+        engine = os.getenv('SAEV_ETL_ENGINE', 'sqlite').lower()
+        
         # Executar processo completo de ETL para teste com DuckDB
         processor.full_etl_process(
             csv_folder=csv_folder,  # Usar pasta em vez de arquivo único
@@ -96,16 +99,21 @@ def main():
             apply_star_schema=True,
             overwrite_db=True,
             include_duckdb=True,    # NOVO: Migração automática para DuckDB
-            force_duckdb=True       # NOVO: Forçar recriação do DuckDB
+            force_duckdb=True,      # NOVO: Forçar recriação do DuckDB
+            workers=int(os.getenv('SAEV_ETL_WORKERS', '1')),  # Processos para parsing dos CSVs
+            engine=engine
         )
         
         print()
         print("="*80)
         print("🎉 CARGA DE TESTE CONCLUÍDA COM SUCESSO!")
-        print(f"📊 Dados anonimizados disponíveis em: {db_file}")
+        if engine != 'duckdb':
+            print(f"📊 Dados anonimizados disponíveis em: {db_file}")
         print(f"🦆 Dados DuckDB disponíveis em: {db_file.replace('.db', '.duckdb')}")
         print("⭐ Star Schema aplicado para análises otimizadas")
         print("🔒 Dados sensíveis foram anonimizados com MD5")
+        if not os.getenv('SAEV_ANON_SALT'):
+            print("   ⚠️  SAEV_ANON_SALT não definido: hashes sem sal (defina para proteger os dados)")
         print("🚀 Performance otimizada com DuckDB")
         print()
         print("💡 Próximos passos:")
@@ -57,7 +57,7 @@ def diagnose_database(db_path: str, db_type: str = 'auto'):
             
             for table in required_tables:
                 try:
-                    result = conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'").fetchall()
+                    result = conn.execute(f"SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name='{table}'").fetchall()
                     if result:
                         print(f"✅ {table}: OK")
                     else:
@@ -87,7 +87,7 @@ def diagnose_database(db_path: str, db_type: str = 'auto'):
             cursor = conn.cursor()
             
             # Listar todas as tabelas
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
             tables = [row[0] for row in cursor.fetchall()]
             print(f"📋 Tabelas encontradas: {tables}")
             
@@ -96,7 +96,7 @@ def diagnose_database(db_path: str, db_type: str = 'auto'):
             star_schema_ok = True
             
             for table in required_tables:
-                cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
+                cursor.execute(f"SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name='{table}'")
                 if cursor.fetchone():
                     print(f"✅ {table}: OK")
                 else:
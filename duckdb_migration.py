@@ -26,25 +26,43 @@ from typing import Optional
 class DuckDBMigrator:
     """Classe para migrar dados SQLite para DuckDB otimizado"""
     
+    # Tamanho do lote no modo de cópia sem a extensão sqlite do DuckDB
+    batch_size = 100000
+    
+    # Ordem física da fato no DuckDB: prefixo dos filtros dos dashboards
+    fact_order = ['AVA_ANO', 'DIS_NOME', 'TES_NOME', 'SER_NOME']
+    
     def __init__(self, sqlite_path: str, duckdb_path: str):
         self.sqlite_path = sqlite_path
         self.duckdb_path = duckdb_path
+        self.stats = {}
         
     def migrate_to_duckdb(self) -> bool:
         """Migra dados do SQLite para DuckDB com otimizações"""
+        from src.config import config
+        
         try:
             print("🦆 Iniciando migração SQLite → DuckDB...")
             start_time = time.time()
             
             # Conectar aos bancos
             sqlite_conn = sqlite3.connect(self.sqlite_path)
-            duck_conn = duckdb.connect(self.duckdb_path)
+            duck_conn = duckdb.connect(self.duckdb_path, config=config.get_duckdb_settings())
+            
+            # Ler o SQLite direto pelo DuckDB (uma única passada, sem pandas)
+            attached = self._attach_sqlite(duck_conn)
             
             # Migrar tabelas dimensão
-            self._migrate_dimension_tables(sqlite_conn, duck_conn)
+            self._migrate_dimension_tables(sqlite_conn, duck_conn, attached)
+            
+            # Migrar tabela fato em uma única transferência
+            fact_rows = self._migrate_fact_table(sqlite_conn, duck_conn, attached)
             
-            # Migrar tabela fato com particionamento
-            self._migrate_fact_table(sqlite_conn, duck_conn)
+            # Migrar tabelas de agregação (agg_*), se existirem
+            self._migrate_rollup_tables(sqlite_conn, duck_conn, attached)
+            
+            if attached:
+                duck_conn.execute("DETACH saev_sqlite")
             
             # Criar índices otimizados
             self._create_optimized_indexes(duck_conn)
@@ -56,20 +74,94 @@ class DuckDBMigrator:
             duck_conn.close()
             
             elapsed = time.time() - start_time
-            print(f"✅ Migração concluída em {elapsed:.2f}s")
+            throughput = fact_rows / elapsed if elapsed > 0 else 0
+            self.stats.update({
+                'elapsed_seconds': elapsed,
+                'fact_rows': fact_rows,
+                'rows_per_second': throughput,
+                'mode': 'attach' if attached else 'cursor'
+            })
+            print(f"✅ Migração concluída em {elapsed:.2f}s "
+                  f"({fact_rows:,} registros fato, {throughput:,.0f} linhas/s)")
             return True
             
         except Exception as e:
             print(f"❌ Erro na migração: {e}")
             return False
     
-    def _migrate_dimension_tables(self, sqlite_conn, duck_conn):
-        """Migra tabelas de dimensão"""
-        dimensions = ['dim_aluno', 'dim_escola', 'dim_descritor']
+    def _attach_sqlite(self, duck_conn) -> bool:
+        """Anexa o banco SQLite ao DuckDB pela extensão sqlite (se disponível)"""
+        try:
+            duck_conn.execute("INSTALL sqlite")
+            duck_conn.execute("LOAD sqlite")
+            sqlite_path = str(Path(self.sqlite_path).resolve()).replace("'", "''")
+            duck_conn.execute(f"ATTACH '{sqlite_path}' AS saev_sqlite (TYPE SQLITE, READ_ONLY)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Extensão sqlite do DuckDB indisponível ({e}); usando cursor único")
+            return False
+    
+    def _copy_table(self, table: str, sqlite_conn, duck_conn, attached: bool) -> int:
+        """
+        Copia todas as linhas de uma tabela SQLite para a tabela DuckDB de mesmo nome
+        
+        Com a extensão sqlite a cópia é um único INSERT ... SELECT executado pelo
+        DuckDB. Sem ela, um único cursor percorre a tabela uma vez (sem OFFSET),
+        em lotes de ``batch_size`` linhas.
+        """
+        if attached:
+            return duck_conn.execute(
+                f"INSERT INTO {table} SELECT * FROM saev_sqlite.{table}"
+            ).fetchone()[0]
+        
+        cursor = sqlite_conn.execute(f"SELECT * FROM {table}")
+        columns = [description[0] for description in cursor.description]
+        copied = 0
+        
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            
+            batch = pd.DataFrame.from_records(rows, columns=columns)
+            duck_conn.register("batch_temp", batch)
+            duck_conn.execute(f"INSERT INTO {table} SELECT * FROM batch_temp")
+            duck_conn.unregister("batch_temp")
+            
+            copied += len(rows)
+            print(f"   📦 Processados {copied:,} registros...")
+        
+        return copied
+    
+    def _migrate_rollup_tables(self, sqlite_conn, duck_conn, attached: bool = False):
+        """Migra as tabelas de agregação (agg_*) construídas pelo ETL"""
+        rollups = [
+            row[0] for row in sqlite_conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'agg\\_%' ESCAPE '\\' ORDER BY name"
+            )
+        ]
+        self._migrate_dimension_tables(sqlite_conn, duck_conn, attached, rollups)
+    
+    def _migrate_dimension_tables(self, sqlite_conn, duck_conn, attached: bool = False,
+                                  tables: Optional[list] = None):
+        """Migra tabelas de dimensão e dicionários dim_* (ou as tabelas informadas)"""
+        if tables is not None:
+            dimensions = tables
+        else:
+            dimensions = [
+                row[0] for row in sqlite_conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'dim\\_%' ESCAPE '\\' ORDER BY name"
+                )
+            ]
         
         for dim in dimensions:
             print(f"📊 Migrando {dim}...")
             
+            if attached:
+                # Tipos vêm do DDL declarado no SQLite
+                duck_conn.execute(f"CREATE TABLE {dim} AS SELECT * FROM saev_sqlite.{dim}")
+                continue
+            
             # Ler dados do SQLite
             df = pd.read_sql_query(f"SELECT * FROM {dim}", sqlite_conn)
             
@@ -78,13 +170,16 @@ class DuckDBMigrator:
             duck_conn.execute(f"CREATE TABLE {dim} AS SELECT * FROM {dim}_temp")
             duck_conn.execute(f"DROP VIEW {dim}_temp")
     
-    def _migrate_fact_table(self, sqlite_conn, duck_conn):
-        """Migra tabela fato com otimizações"""
-        print("⭐ Migrando fato_resposta_aluno (pode demorar)...")
+    def _migrate_fact_table(self, sqlite_conn, duck_conn, attached: bool = False) -> int:
+        """
+        Migra tabela fato em uma única passada e retorna o total de linhas
         
-        # Migrar em chunks para eficiência
-        chunk_size = 100000
-        offset = 0
+        No SQLite a fato é a view fato_resposta_aluno sobre a fato compacta
+        (chaves inteiras); no DuckDB ela é materializada com os textos, que o
+        armazenamento colunar já comprime por dicionário.
+        """
+        print("⭐ Migrando fato_resposta_aluno (pode demorar)...")
+        start_time = time.time()
         
         # Criar tabela vazia primeiro
         duck_conn.execute("""
@@ -107,24 +202,19 @@ class DuckDBMigrator:
         )
         """)
         
-        while True:
-            # Ler chunk do SQLite
-            query = f"""
-            SELECT * FROM fato_resposta_aluno 
-            LIMIT {chunk_size} OFFSET {offset}
-            """
-            df = pd.read_sql_query(query, sqlite_conn)
-            
-            if df.empty:
-                break
-                
-            # Inserir no DuckDB
-            duck_conn.register("chunk_temp", df)
-            duck_conn.execute("INSERT INTO fato_resposta_aluno SELECT * FROM chunk_temp")
-            duck_conn.execute("DROP VIEW chunk_temp")
-            
-            offset += chunk_size
-            print(f"   📦 Processados {offset:,} registros...")
+        copied = self._copy_table('fato_resposta_aluno', sqlite_conn, duck_conn, attached)
+        
+        # Ordenar pelos filtros dos dashboards: os zone maps (mín./máx. por
+        # row group) passam a descartar a maior parte da tabela
+        duck_conn.execute(f"""
+        CREATE OR REPLACE TABLE fato_resposta_aluno AS
+        SELECT * FROM fato_resposta_aluno ORDER BY {', '.join(self.fact_order)}
+        """)
+        
+        elapsed = time.time() - start_time
+        throughput = copied / elapsed if elapsed > 0 else 0
+        print(f"   ⚡ {copied:,} registros em {elapsed:.2f}s ({throughput:,.0f} linhas/s)")
+        return copied
     
     def _create_optimized_indexes(self, duck_conn):
         """Cria índices otimizados para consultas analíticas"""
@@ -159,11 +249,12 @@ class SAEVDuckDBConnector:
     
     def connect(self):
         """Conecta ao DuckDB com configurações otimizadas"""
-        self.conn = duckdb.connect(self.db_path)
+        from src.config import config
         
-        # Configurações de performance
-        self.conn.execute("SET threads=4")  # Usar múltiplos threads
-        self.conn.execute("SET memory_limit='2GB'")  # Limite de memória
+        # Configurações de performance (threads, memória e pasta temporária
+        # ajustáveis por SAEV_DUCKDB_THREADS, SAEV_DUCKDB_MEMORY_LIMIT e
+        # SAEV_DUCKDB_TEMP_DIR), as mesmas das demais conexões do processo
+        self.conn = duckdb.connect(self.db_path, config=config.get_duckdb_settings())
         self.conn.execute("SET enable_progress_bar=true")  # Barra de progresso
         
         return self.conn
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+GERADOR DE DADOS SINTÉTICOS DO SAEV
+===================================
+
+Gera CSVs no formato da tabela avaliacao (municípios, escolas, turmas,
+alunos, testes, itens e descritores sintéticos) para testes de carga de
+``carga.py``, do migrador DuckDB e dos dashboards.
+
+Uso:
+    python gerar_dados_sinteticos.py [--rows 10000000] [--output data/sintetico]
+                                     [--years 2023 2024] [--workers 4]
+
+Exemplos:
+    python gerar_dados_sinteticos.py --rows 1000000
+    python gerar_dados_sinteticos.py --rows 50000000 --output /dados/saev_50m
+    python gerar_dados_sinteticos.py --rows 5000000 --output data/raw   # para carga.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.append(str(Path(__file__).parent))
+
+from src.data.synthetic import DEFAULT_SHARD_STUDENTS, SAEVSyntheticGenerator
+
+
+def main():
+    """Função principal"""
+    parser = argparse.ArgumentParser(
+        description="Gerador de dados sintéticos do SAEV (formato avaliacao)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Exemplos de uso:
+  python gerar_dados_sinteticos.py --rows 1000000
+  python gerar_dados_sinteticos.py --rows 50000000 --output /dados/saev_50m
+  python gerar_dados_sinteticos.py --rows 5000000 --output data/raw   # para carga.py
+        """
+    )
+    parser.add_argument('--rows', type=int, default=10_000_000,
+                        help='Total aproximado de respostas (padrão: 10.000.000)')
+    parser.add_argument('--output', default='data/sintetico',
+                        help='Pasta de destino dos CSVs (padrão: data/sintetico)')
+    parser.add_argument('--years', type=int, nargs='+', default=[2023, 2024],
+                        help='Anos das avaliações (padrão: 2023 2024)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos em paralelo (padrão: núcleos da máquina)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (padrão: 42)')
+    parser.add_argument('--shard-students', type=int, default=DEFAULT_SHARD_STUDENTS,
+                        help=f'Alunos por arquivo CSV (padrão: {DEFAULT_SHARD_STUDENTS:,})')
+    args = parser.parse_args()
+
+    print("🧪" + "=" * 60)
+    print("🧪 GERADOR DE DADOS SINTÉTICOS SAEV")
+    print("🧪" + "=" * 60)
+
+    start_time = time.time()
+    generator = SAEVSyntheticGenerator(args.rows, years=args.years, seed=args.seed,
+                                       shard_students=args.shard_students)
+
+    print("🏗️  Rede sintética:")
+    for name, count in generator.summary().items():
+        print(f"   • {name}: {count:,}")
+
+    print(f"📝 Gravando CSVs em {args.output} ({args.workers} processos)...")
+    files = generator.generate(args.output, workers=args.workers)
+
+    elapsed = time.time() - start_time
+    total_bytes = sum(csv_file.stat().st_size for csv_file in files)
+    print(f"✅ {generator.rows_written:,} respostas em {len(files)} arquivos "
+          f"({total_bytes / 1024 ** 3:.2f} GB) em {elapsed:.1f}s "
+          f"({generator.rows_written / elapsed:,.0f} linhas/s)")
+    print("💡 Para carregar: copie os CSVs para data/raw e execute 'python carga.py <banco.db>'")
+
+
+if __name__ == "__main__":
+    main()
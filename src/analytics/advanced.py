@@ -3,7 +3,6 @@ Sistema de Análise Estatística Avançada para SAEV
 """
 import pandas as pd
 import numpy as np
-import sqlite3
 from scipy import stats
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
@@ -16,14 +15,24 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.config import config
+from src.data.query_service import get_query_service
+
+# Taxa de acerto (%) a partir dos totais de acertos e erros da fato
+TAXA_ACERTO = "SUM(f.ACERTO) * 100.0 / NULLIF(SUM(f.ACERTO + f.ERRO), 0)"
 
 class SAEVAnalytics:
-    """Classe para análises estatísticas avançadas"""
+    """
+    Classe para análises estatísticas avançadas
+
+    As consultas leem ``fato_resposta_aluno`` pelo serviço de consultas
+    compartilhado, no motor do banco (SQLite, DuckDB ou Parquet). Sem
+    ``db_path``, o banco vem do motor configurado em SAEV_DB_TYPE.
+    """
     
     def __init__(self, db_path: str = None):
-        # Se não especificar db_path, usa detecção automática
+        # Se não especificar db_path, usa o banco do motor configurado
         if db_path is None:
-            self.db_path = config.get_database_path()
+            self.db_path = config.get_engine_database_path()
         else:
             self.db_path = db_path
             
@@ -31,13 +40,10 @@ class SAEVAnalytics:
         if not Path(self.db_path).exists():
             raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
     
-    def get_data(self, query: str) -> pd.DataFrame:
+    def get_data(self, query: str, params: list = None) -> pd.DataFrame:
         """Executa query e retorna DataFrame"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return get_query_service(self.db_path).query(query, params)
         except Exception as e:
             raise Exception(f"Erro ao executar consulta: {e}")
     
@@ -46,16 +52,16 @@ class SAEVAnalytics:
         
         query = f"""
         SELECT 
-            MUN_NOME,
-            ESC_INEP,
-            AVG(CAST(ATR_CERTO AS FLOAT)) * 100 as taxa_acerto
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY MUN_NOME, ESC_INEP
-        HAVING COUNT(DISTINCT ALU_ID) >= 10
+            f.MUN_NOME,
+            f.ESC_INEP,
+            {TAXA_ACERTO} as taxa_acerto
+        FROM fato_resposta_aluno f
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.MUN_NOME, f.ESC_INEP
+        HAVING COUNT(DISTINCT f.ALU_ID) >= 10
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         # Calcular índice de equidade (coeficiente de variação)
         equity_stats = df.groupby('MUN_NOME').agg({
@@ -77,21 +83,23 @@ class SAEVAnalytics:
     def trend_analysis(self, municipality: str, discipline: str, min_year: int = None):
         """Análise de tendências temporais"""
         
-        where_clause = f"WHERE MUN_NOME = '{municipality}' AND DIS_NOME = '{discipline}'"
+        where_clause = "WHERE f.MUN_NOME = ? AND f.DIS_NOME = ?"
+        params = [municipality, discipline]
         if min_year:
-            where_clause += f" AND AVA_ANO >= {min_year}"
+            where_clause += " AND f.AVA_ANO >= ?"
+            params.append(min_year)
         
         query = f"""
         SELECT 
-            AVA_ANO,
-            AVG(CAST(ATR_CERTO AS FLOAT)) * 100 as taxa_acerto,
-            COUNT(DISTINCT ALU_ID) as total_alunos
-        FROM avaliacao {where_clause}
-        GROUP BY AVA_ANO
-        ORDER BY AVA_ANO
+            f.AVA_ANO,
+            {TAXA_ACERTO} as taxa_acerto,
+            COUNT(DISTINCT f.ALU_ID) as total_alunos
+        FROM fato_resposta_aluno f {where_clause}
+        GROUP BY f.AVA_ANO
+        ORDER BY f.AVA_ANO
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, params)
         
         if len(df) < 3:
             return {"error": "Dados insuficientes para análise de tendência"}
@@ -125,23 +133,26 @@ class SAEVAnalytics:
     def school_clustering(self, year: int, discipline: str):
         """Clustering de escolas por características de desempenho"""
         
+        # Pior/melhor resposta da escola (MIN/MAX de ATR_CERTO): 0 se houve
+        # algum erro, 100 se houve algum acerto
         query = f"""
         SELECT 
-            ESC_INEP,
-            ESC_NOME,
-            MUN_NOME,
-            COUNT(DISTINCT ALU_ID) as total_alunos,
-            AVG(CAST(ATR_CERTO AS FLOAT)) * 100 as taxa_acerto,
-            COUNT(DISTINCT MTI_CODIGO) as competencias_avaliadas,
-            MIN(CAST(ATR_CERTO AS FLOAT)) * 100 as pior_competencia,
-            MAX(CAST(ATR_CERTO AS FLOAT)) * 100 as melhor_competencia
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY ESC_INEP, ESC_NOME, MUN_NOME
-        HAVING total_alunos >= 15
+            f.ESC_INEP,
+            e.ESC_NOME,
+            f.MUN_NOME,
+            COUNT(DISTINCT f.ALU_ID) as total_alunos,
+            {TAXA_ACERTO} as taxa_acerto,
+            COUNT(DISTINCT f.MTI_CODIGO) as competencias_avaliadas,
+            MIN(CASE WHEN f.ERRO > 0 THEN 0.0 ELSE 1.0 END) * 100 as pior_competencia,
+            MAX(CASE WHEN f.ACERTO > 0 THEN 1.0 ELSE 0.0 END) * 100 as melhor_competencia
+        FROM fato_resposta_aluno f
+        LEFT JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.ESC_INEP, e.ESC_NOME, f.MUN_NOME
+        HAVING COUNT(DISTINCT f.ALU_ID) >= 15
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         if len(df) < 10:
             return {"error": "Dados insuficientes para clustering"}
@@ -197,17 +208,17 @@ class SAEVAnalytics:
         """Análise de correlação entre competências"""
         
         # Buscar dados por competência e aluno
-        query = f"""
+        query = """
         SELECT 
-            ALU_ID,
-            MTI_CODIGO,
-            AVG(CAST(ATR_CERTO AS FLOAT)) as desempenho
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY ALU_ID, MTI_CODIGO
+            f.ALU_ID,
+            f.MTI_CODIGO,
+            SUM(f.ACERTO) * 1.0 / NULLIF(SUM(f.ACERTO + f.ERRO), 0) as desempenho
+        FROM fato_resposta_aluno f
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.ALU_ID, f.MTI_CODIGO
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         # Criar matriz de competências x alunos
         pivot_df = df.pivot(index='ALU_ID', columns='MTI_CODIGO', values='desempenho')
@@ -244,17 +255,17 @@ class SAEVAnalytics:
         
         query = f"""
         SELECT 
-            MUN_NOME,
-            SER_NOME,
-            AVG(CAST(ATR_CERTO AS FLOAT)) * 100 as taxa_acerto,
-            COUNT(DISTINCT ALU_ID) as total_alunos
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY MUN_NOME, SER_NOME
-        HAVING total_alunos >= 10
+            f.MUN_NOME,
+            f.SER_NOME,
+            {TAXA_ACERTO} as taxa_acerto,
+            COUNT(DISTINCT f.ALU_ID) as total_alunos
+        FROM fato_resposta_aluno f
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.MUN_NOME, f.SER_NOME
+        HAVING COUNT(DISTINCT f.ALU_ID) >= 10
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         # Calcular gaps entre séries dentro do mesmo município
         gaps = []
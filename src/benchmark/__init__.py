@@ -0,0 +1,3 @@
+"""
+Módulo de benchmarks do SAEV
+"""
@@ -0,0 +1,248 @@
+"""
+Catálogo das consultas emitidas pelos front ends do SAEV
+
+Reproduz, para um banco e um motor, as consultas que cada tela executa com os
+filtros padrão da interface (primeiro ano, primeira disciplina, primeiros
+municípios/escolas...), sem abrir o Streamlit:
+
+- dashboard Star Schema (``src/dashboard/main.py``): carga do domínio dos
+  filtros e as agregações roteadas pelo ``RollupRouter``
+- galeria (``src/dashboard/gallery.py``): carga do domínio dos filtros
+  (as opções em cascata são resolvidas em memória), resumo, alunos e
+  descritores
+- ``SAEVAnalytics`` e ``SAEVReports``: as consultas são capturadas
+  executando os próprios métodos com ``get_data`` instrumentado, de modo que
+  o catálogo acompanha qualquer alteração no SQL dessas classes
+
+Cada entrada é a tupla ``(nome, sql, parâmetros)``.
+"""
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from src.dashboard.queries import (
+    detailed_competency_query, detailed_fact_filters, detailed_histogram_query,
+    detailed_school_performance_query, detailed_student_ranking_query, detailed_students_page_query,
+    detailed_summary_query, performance_distribution_query, star_fact_filters
+)
+from src.data.filter_domain import FilterDomain, filter_domain_query
+from src.data.rollups import RollupRouter
+from src.data.student_sets import CELL_TABLE, cell_filter_sql
+
+CatalogEntry = Tuple[str, str, list]
+
+logger = logging.getLogger(__name__)
+
+# Visões agregadas do dashboard Star Schema: nome -> (agrupamento, medidas, ordenação)
+DASHBOARD_AGGREGATES = {
+    'dashboard.visao_geral': (
+        [], ['total_alunos', 'total_escolas', 'total_municipios',
+             'total_acertos', 'total_questoes', 'taxa_acerto'], None),
+    'dashboard.municipios': (
+        ['MUN_NOME'], ['total_alunos', 'total_escolas', 'total_acertos',
+                       'total_questoes', 'taxa_acerto'], 'taxa_acerto DESC'),
+    'dashboard.escolas': (
+        ['MUN_NOME', 'ESC_NOME'], ['total_alunos', 'total_acertos',
+                                   'total_questoes', 'taxa_acerto'], 'taxa_acerto DESC'),
+    'dashboard.competencias': (
+        ['MTI_CODIGO', 'MTI_DESCRITOR'], ['total_alunos', 'total_questoes',
+                                          'total_acertos', 'taxa_acerto'], 'taxa_acerto ASC'),
+}
+
+
+def _column(service, sql: str, params: Sequence = None) -> list:
+    """Primeira coluna de uma consulta como lista"""
+    return [row[0] for row in service.fetchall(sql, params)]
+
+
+def dashboard_queries(service) -> Tuple[List[CatalogEntry], Dict[str, Any]]:
+    """
+    Consultas do dashboard Star Schema com os filtros padrão
+
+    Returns:
+        Tupla (entradas do catálogo, filtros usados)
+    """
+    builder = service.builder
+    sql = filter_domain_query(service)
+    entries = [('dashboard.filtro_dominio', sql, [])]
+    domain = FilterDomain(service.query(sql, use_cache=False))
+
+    years = domain.options('AVA_ANO')
+    disciplines = domain.options('DIS_NOME', {'AVA_ANO': years[0]})
+    tests = domain.options('TES_NOME', {'AVA_ANO': years[0], 'DIS_NOME': disciplines[0]})
+    series = domain.options('SER_NOME', {'AVA_ANO': years[0], 'DIS_NOME': disciplines[0], 'TES_NOME': tests[0]})
+
+    filters = {
+        'year': years[0],
+        'discipline': disciplines[0],
+        'test': tests[0],
+        'series': ["1º Ano EF"] if "1º Ano EF" in series else series[:1],
+    }
+
+    router = RollupRouter(service.fetchall, builder)
+    router.refresh(service.table_names())
+    for name, (group_by, measures, order_by) in DASHBOARD_AGGREGATES.items():
+        sql, params = router.build_query(group_by, measures, star_fact_filters(filters), order_by)
+        entries.append((name, sql, params))
+
+    sql, params = performance_distribution_query(builder, filters)
+    entries.append(('dashboard.distribuicao', sql, params))
+    return entries, filters
+
+
+def gallery_queries(service) -> Tuple[List[CatalogEntry], Dict[str, Any]]:
+    """
+    Consultas do painel de análise detalhada da galeria com as seleções padrão
+
+    Returns:
+        Tupla (entradas do catálogo, filtros usados)
+    """
+    builder = service.builder
+    sql = filter_domain_query(service)
+    entries = [('galeria.filtro_dominio', sql, [])]
+    domain = FilterDomain(service.query(sql, use_cache=False))
+
+    states = domain.options('MUN_UF')[:1]
+    selection = {'MUN_UF': states}
+    municipalities = domain.options('MUN_NOME', selection)[:3]
+    selection['MUN_NOME'] = municipalities
+    schools = domain.schools(selection)['ESC_INEP'].tolist()[:5]
+    selection['ESC_INEP'] = schools
+    years = domain.options('AVA_ANO', selection, descending=True)[:1]
+    selection['AVA_ANO'] = years
+    disciplines = domain.options('DIS_NOME', selection)[:1]
+    selection['DIS_NOME'] = disciplines
+    tests = domain.options('TES_NOME', selection)[:2]
+    selection['TES_NOME'] = tests
+    series = domain.options('SER_NOME', selection)[:2]
+
+    filters = {
+        'states': states,
+        'municipalities': municipalities,
+        'schools': schools,
+        'years': years,
+        'disciplines': disciplines,
+        'tests': tests,
+        'series': series,
+    }
+
+    if service.has_tables([CELL_TABLE]):
+        where_clause, params = cell_filter_sql(detailed_fact_filters(filters), builder)
+        entries.append(('galeria.resumo_celulas', f"SELECT * FROM {CELL_TABLE} {where_clause}", params))
+
+    for name, query_function in (('galeria.resumo', detailed_summary_query),
+                                 ('galeria.alunos_histograma', detailed_histogram_query),
+                                 ('galeria.alunos_escolas', detailed_school_performance_query),
+                                 ('galeria.competencias', detailed_competency_query)):
+        sql, params = query_function(builder, filters)
+        entries.append((name, sql, params))
+
+    for name, best in (('galeria.alunos_top', True), ('galeria.alunos_atencao', False)):
+        sql, params = detailed_student_ranking_query(builder, filters, limit=10, best=best)
+        entries.append((name, sql, params))
+
+    sql, params = detailed_students_page_query(builder, filters, page_size=50)
+    entries.append(('galeria.alunos_pagina', sql, params))
+    return entries, filters
+
+
+def capture_queries(instance, calls: Sequence[Tuple[str, Callable, tuple]]) -> List[CatalogEntry]:
+    """
+    Executa métodos de um objeto registrando as consultas feitas por ``get_data``
+
+    Falhas depois da consulta (gráficos, exportação para Excel, dados
+    insuficientes para a estatística) não impedem a captura.
+
+    Args:
+        instance: Objeto com método ``get_data(query, params)``
+        calls: Tuplas (nome, método, argumentos)
+    """
+    captured = []
+    original = instance.get_data
+
+    def recording_get_data(query, params=None):
+        captured.append((query, list(params or [])))
+        return original(query, params)
+
+    instance.get_data = recording_get_data
+    entries = []
+    try:
+        for name, method, args in calls:
+            start = len(captured)
+            try:
+                method(*args)
+            except Exception as e:
+                logger.warning(f"⚠️  {name}: {e}")
+            calls_made = captured[start:]
+            for index, (sql, params) in enumerate(calls_made, start=1):
+                entry_name = name if len(calls_made) == 1 else f"{name}#{index}"
+                entries.append((entry_name, sql, params))
+    finally:
+        del instance.get_data
+    return entries
+
+
+def analytics_queries(db_path: str, year: int, discipline: str,
+                      municipality: str) -> List[CatalogEntry]:
+    """Consultas do ``SAEVAnalytics`` (requer scipy e scikit-learn)"""
+    from src.analytics.advanced import SAEVAnalytics
+
+    analytics = SAEVAnalytics(db_path)
+    return capture_queries(analytics, [
+        ('analytics.equidade', analytics.equity_analysis, (year, discipline)),
+        ('analytics.tendencia', analytics.trend_analysis, (municipality, discipline)),
+        ('analytics.clusters_escolas', analytics.school_clustering, (year, discipline)),
+        ('analytics.correlacao_competencias', analytics.competency_correlation_analysis, (year, discipline)),
+        ('analytics.lacunas_desempenho', analytics.performance_gap_analysis, (year, discipline)),
+    ])
+
+
+def report_queries(db_path: str, output_dir: str, years: Sequence[int], discipline: str,
+                   municipality: str) -> List[CatalogEntry]:
+    """Consultas do ``SAEVReports`` (os arquivos gerados vão para ``output_dir``)"""
+    from src.reports.generator import SAEVReports
+
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    reports = SAEVReports(db_path, output_dir=output_dir)
+    year = years[-1]
+    return capture_queries(reports, [
+        ('relatorios.municipios', reports.generate_municipal_report, (year, discipline)),
+        ('relatorios.escolas', reports.generate_school_report, (year, discipline)),
+        ('relatorios.escolas_municipio', reports.generate_school_report, (year, discipline, municipality)),
+        ('relatorios.competencias', reports.generate_competency_report, (year, discipline)),
+        ('relatorios.comparativo', reports.generate_comparative_report, (list(years), discipline)),
+    ])
+
+
+def build_catalog(service, output_dir: str) -> Tuple[List[CatalogEntry], Dict[str, str]]:
+    """
+    Catálogo completo de consultas de um banco
+
+    As consultas do analytics e dos relatórios são omitidas (com o motivo)
+    quando as dependências opcionais dessas classes não estão instaladas.
+
+    Args:
+        service: ``SAEVQueryService`` do banco
+        output_dir: Pasta para os arquivos gerados pelos relatórios
+
+    Returns:
+        Tupla (entradas do catálogo, grupos omitidos -> motivo)
+    """
+    entries, star_filters = dashboard_queries(service)
+    gallery_entries, _ = gallery_queries(service)
+    entries += gallery_entries
+
+    years = sorted(_column(service, "SELECT DISTINCT AVA_ANO FROM fato_resposta_aluno"))
+    municipality = _column(service, "SELECT MIN(MUN_NOME) FROM fato_resposta_aluno")[0]
+    discipline = star_filters['discipline']
+
+    skipped = {}
+    try:
+        entries += analytics_queries(service.db_path, years[-1], discipline, municipality)
+    except ImportError as e:
+        skipped['analytics'] = str(e)
+    try:
+        entries += report_queries(service.db_path, output_dir, years, discipline, municipality)
+    except ImportError as e:
+        skipped['relatorios'] = str(e)
+    return entries, skipped
@@ -0,0 +1,344 @@
+"""
+Suíte de benchmark do SAEV: ETL, migração e consultas dos front ends
+
+Substitui as medições avulsas com ``time.time()`` (``benchmark_comparison``
+do migrador, ``analyze_performance_improvement`` do ``SAEVStarSchema`` e
+``demo_duckdb_vs_sqlite.py``) por uma execução reprodutível:
+
+1. gera CSVs sintéticos com o número de respostas pedido (``synthetic``)
+2. cronometra cada etapa do ETL em SQLite (estrutura, carga, validação,
+   Star Schema), a migração para DuckDB e o ETL nativo em DuckDB
+3. cronometra cada consulta do catálogo (dashboard, galeria, analytics e
+   relatórios) em cada motor, sem cache de resultados
+
+As amostras de cada etapa/consulta são resumidas em percentis e gravadas em
+JSON; ``compare_results`` aponta as regressões em relação a uma execução
+anterior.
+"""
+import json
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.data.etl import SAEVDataProcessor
+from src.data.query_service import SAEVQueryService, close_query_services
+from src.data.synthetic import SAEVSyntheticGenerator
+
+from .catalog import build_catalog
+
+# Motores avaliados
+BENCHMARK_ENGINES = ('sqlite', 'duckdb', 'parquet')
+
+# Percentis registrados para cada etapa/consulta
+PERCENTILES = (50, 90, 95, 99)
+
+DEFAULT_ROWS = 100_000
+DEFAULT_REPEAT = 5
+DEFAULT_YEARS = (2023, 2024)
+
+# Regressão: razão mínima entre a mediana atual e a de referência
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+# Medianas abaixo deste tempo (s) são ruído de medição e não contam como regressão
+MIN_COMPARABLE_SECONDS = 0.005
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_samples(samples: Sequence[float]) -> Dict[str, float]:
+    """Resumo de tempos (s): mínimo, média, percentis e máximo"""
+    values = np.asarray(samples, dtype=float)
+    summary = {
+        'n': int(len(values)),
+        'min': float(values.min()),
+        'mean': float(values.mean()),
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = float(np.percentile(values, percentile))
+    summary['max'] = float(values.max())
+    return {key: round(value, 6) if isinstance(value, float) else value
+            for key, value in summary.items()}
+
+
+def _environment() -> Dict[str, str]:
+    """Versões e máquina da execução"""
+    import duckdb
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sqlite': sqlite3.sqlite_version,
+        'duckdb': duckdb.__version__,
+        'pandas': pd.__version__,
+        'duckdb_settings': config.get_duckdb_settings(),
+    }
+
+
+class SAEVBenchmark:
+    """Executa a suíte de benchmark em uma pasta de trabalho"""
+
+    def __init__(self, work_dir: str, rows: int = DEFAULT_ROWS, repeat: int = DEFAULT_REPEAT,
+                 etl_repeat: int = 1, engines: Sequence[str] = ('sqlite', 'duckdb'),
+                 years: Sequence[int] = DEFAULT_YEARS, seed: int = 42, workers: int = 1):
+        """
+        Args:
+            work_dir: Pasta para CSVs, bancos e relatórios gerados
+            rows: Total de respostas sintéticas (linhas de avaliacao)
+            repeat: Execuções cronometradas de cada consulta (após uma execução fria)
+            etl_repeat: Execuções completas do ETL (cada uma recria os bancos)
+            engines: Motores avaliados ('sqlite', 'duckdb' e/ou 'parquet')
+            years: Anos das avaliações sintéticas
+            seed: Semente do gerador de dados
+            workers: Processos na geração dos dados sintéticos
+        """
+        invalid = [engine for engine in engines if engine not in BENCHMARK_ENGINES]
+        if invalid:
+            raise ValueError(f"Motor inválido: {', '.join(invalid)} (use {', '.join(BENCHMARK_ENGINES)})")
+
+        self.work_dir = Path(work_dir)
+        self.rows = rows
+        self.repeat = repeat
+        self.etl_repeat = etl_repeat
+        self.engines = list(engines)
+        self.years = list(years)
+        self.seed = seed
+        self.workers = workers
+
+        self.csv_dir = self.work_dir / 'csv'
+        self.sqlite_path = str(self.work_dir / 'saev_benchmark.db')
+        self.duckdb_path = str(self.work_dir / 'saev_benchmark_nativo.duckdb')
+        self.parquet_path = str(self.work_dir / 'saev_benchmark_parquet')
+
+    def database_paths(self) -> Dict[str, str]:
+        """Banco consultado em cada motor (o DuckDB é o do ETL nativo, com avaliacao)"""
+        paths = {'sqlite': self.sqlite_path, 'duckdb': self.duckdb_path, 'parquet': self.parquet_path}
+        return {engine: paths[engine] for engine in self.engines}
+
+    def generate_data(self) -> Dict[str, object]:
+        """Gera os CSVs sintéticos"""
+        if self.csv_dir.exists():
+            shutil.rmtree(self.csv_dir)
+
+        logger.info(f"🧪 Gerando {self.rows:,} respostas sintéticas em {self.csv_dir}")
+        start_time = time.perf_counter()
+        generator = SAEVSyntheticGenerator(self.rows, years=self.years, seed=self.seed)
+        files = generator.generate(self.csv_dir, workers=self.workers)
+        return {
+            'rows': generator.rows_written,
+            'network': generator.summary(),
+            'files': len(files),
+            'bytes': sum(csv_file.stat().st_size for csv_file in files),
+            'seconds': round(time.perf_counter() - start_time, 6),
+        }
+
+    def _run_sqlite_etl(self, samples: Dict[str, Dict[str, List[float]]]):
+        """ETL em SQLite etapa por etapa e migração para DuckDB"""
+        processor = SAEVDataProcessor(self.sqlite_path)
+        stages = samples.setdefault('sqlite', {})
+        _timed(stages, 'create_database_structure',
+               processor.create_database_structure, overwrite=True, create_indexes=False)
+        _timed(stages, 'load_csv_data', processor.load_csv_data, csv_folder=str(self.csv_dir))
+        _timed(stages, 'validate_data', processor.validate_data)
+        _timed(stages, 'apply_star_schema', processor.apply_star_schema)
+
+        migrated = _timed(samples.setdefault('migration', {}), 'migrate_to_duckdb',
+                          processor.migrate_to_duckdb, force_recreate=True)
+        if not migrated:
+            raise RuntimeError("Falha na migração para DuckDB")
+
+    def _run_duckdb_etl(self, samples: Dict[str, Dict[str, List[float]]]):
+        """ETL nativo em DuckDB etapa por etapa (e exportação Parquet, se pedida)"""
+        import duckdb
+
+        if Path(self.duckdb_path).exists():
+            Path(self.duckdb_path).unlink()
+
+        processor = SAEVDataProcessor(self.duckdb_path)
+        stages = samples.setdefault('duckdb', {})
+        duck_conn = duckdb.connect(self.duckdb_path, config=config.get_duckdb_settings())
+        try:
+            _timed(stages, 'load_csv_duckdb', processor.load_csv_duckdb,
+                   duck_conn, csv_folder=str(self.csv_dir))
+            _timed(stages, 'validate_data', processor.validate_data, duck_conn)
+            _timed(stages, 'apply_star_schema_duckdb', processor.apply_star_schema_duckdb, duck_conn)
+            if 'parquet' in self.engines:
+                _timed(stages, 'export_parquet', processor.export_parquet,
+                       self.parquet_path, conn=duck_conn)
+        finally:
+            duck_conn.close()
+
+    def run_etl(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Cronometra as etapas do ETL, ``etl_repeat`` vezes
+
+        Returns:
+            Dicionário grupo ('sqlite', 'migration', 'duckdb') -> etapa -> resumo
+        """
+        samples: Dict[str, Dict[str, List[float]]] = {}
+        for run in range(1, self.etl_repeat + 1):
+            logger.info(f"⏱️  ETL {run}/{self.etl_repeat}")
+            # Bancos recriados: conexões de consulta antigas não podem ficar abertas
+            close_query_services()
+            if 'sqlite' in self.engines:
+                self._run_sqlite_etl(samples)
+            if 'duckdb' in self.engines or 'parquet' in self.engines:
+                self._run_duckdb_etl(samples)
+
+        return {
+            group: {stage: summarize_samples(times) for stage, times in stages.items()}
+            for group, stages in samples.items()
+        }
+
+    def run_queries(self, engine: str, db_path: str) -> Dict[str, object]:
+        """
+        Cronometra todas as consultas do catálogo em um motor
+
+        Cada consulta roda uma vez a frio (registrada em ``cold``) e depois
+        ``repeat`` vezes; o cache de resultados do serviço não é usado.
+        """
+        service = SAEVQueryService(db_path, engine)
+        try:
+            entries, skipped = build_catalog(service, str(self.work_dir / 'relatorios' / engine))
+            results = {}
+            for name, sql, params in entries:
+                try:
+                    start_time = time.perf_counter()
+                    df = service.query(sql, params, use_cache=False)
+                    cold = time.perf_counter() - start_time
+
+                    times = []
+                    for _ in range(self.repeat):
+                        start_time = time.perf_counter()
+                        service.query(sql, params, use_cache=False)
+                        times.append(time.perf_counter() - start_time)
+                except Exception as e:
+                    logger.error(f"❌ {engine} {name}: {e}")
+                    results[name] = {'error': str(e)}
+                    continue
+
+                results[name] = {'rows': len(df), 'cold': round(cold, 6),
+                                 **summarize_samples(times or [cold])}
+                logger.info(f"   🔎 {engine} {name}: p50 {results[name]['p50'] * 1000:.1f} ms "
+                            f"({len(df):,} linhas)")
+            return {'skipped': skipped, 'queries': results}
+        finally:
+            service.close()
+            close_query_services()
+
+    def run(self, generate: bool = True) -> dict:
+        """
+        Executa a suíte completa
+
+        Args:
+            generate: Se False, reutiliza os CSVs já presentes na pasta de trabalho
+
+        Returns:
+            Resultado no formato gravado por ``save_results``
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        result = {
+            'metadata': _environment(),
+            'config': {
+                'rows': self.rows, 'repeat': self.repeat, 'etl_repeat': self.etl_repeat,
+                'engines': self.engines, 'years': self.years, 'seed': self.seed,
+                'workers': self.workers,
+            },
+        }
+
+        if generate or not self.csv_dir.exists():
+            result['data'] = self.generate_data()
+        result['etl'] = self.run_etl()
+        result['artifacts'] = {engine: _size_on_disk(path) for engine, path in self.database_paths().items()}
+
+        result['queries'] = {}
+        result['skipped'] = {}
+        for engine, path in self.database_paths().items():
+            logger.info(f"🔎 Consultas ({engine}): {path}")
+            engine_result = self.run_queries(engine, path)
+            result['queries'][engine] = engine_result['queries']
+            if engine_result['skipped']:
+                result['skipped'][engine] = engine_result['skipped']
+        return result
+
+
+def _timed(stages: Dict[str, List[float]], stage: str, function: Callable, *args, **kwargs):
+    """Executa uma etapa registrando sua duração"""
+    start_time = time.perf_counter()
+    value = function(*args, **kwargs)
+    stages.setdefault(stage, []).append(time.perf_counter() - start_time)
+    logger.info(f"⏱️  {stage}: {stages[stage][-1]:.2f}s")
+    return value
+
+
+def _size_on_disk(path: str) -> int:
+    """Tamanho em bytes de um arquivo ou diretório"""
+    path = Path(path)
+    if path.is_dir():
+        return sum(item.stat().st_size for item in path.rglob('*') if item.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def save_results(result: dict, output_path: str) -> Path:
+    """Grava o resultado em JSON"""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as handle:
+        json.dump(result, handle, ensure_ascii=False, indent=2)
+    return output_path
+
+
+def _flatten_timings(result: dict) -> Dict[str, Dict[str, float]]:
+    """Resumos de tempo de um resultado indexados por 'etl.<grupo>.<etapa>' e 'queries.<motor>.<nome>'"""
+    flat = {}
+    for group, stages in result.get('etl', {}).items():
+        for stage, summary in stages.items():
+            flat[f"etl.{group}.{stage}"] = summary
+    for engine, queries in result.get('queries', {}).items():
+        for name, summary in queries.items():
+            if 'error' not in summary:
+                flat[f"queries.{engine}.{name}"] = summary
+    return flat
+
+
+def compare_results(baseline: dict, current: dict,
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                    metric: str = 'p50',
+                    min_seconds: float = MIN_COMPARABLE_SECONDS) -> List[dict]:
+    """
+    Etapas e consultas que ficaram mais lentas que na execução de referência
+
+    Args:
+        baseline: Resultado de referência (JSON carregado)
+        current: Resultado atual
+        threshold: Razão atual/referência a partir da qual há regressão
+        metric: Estatística comparada ('p50', 'p95', 'mean'...)
+        min_seconds: Tempos de referência e atual abaixo deste valor são ignorados
+
+    Returns:
+        Lista de regressões (chave, referência, atual, razão), da maior razão para a menor
+    """
+    before = _flatten_timings(baseline)
+    regressions = []
+    for key, summary in _flatten_timings(current).items():
+        if key not in before:
+            continue
+        reference, value = before[key][metric], summary[metric]
+        if max(reference, value) < min_seconds or reference <= 0:
+            continue
+        ratio = value / reference
+        if ratio >= threshold:
+            regressions.append({'key': key, 'baseline': reference, 'current': value,
+                                'ratio': round(ratio, 3)})
+    return sorted(regressions, key=lambda regression: regression['ratio'], reverse=True)
@@ -27,6 +27,16 @@ class SAEVConfig:
                 "sample_data": False
             }
         }
+        
+        # Motores de consulta aceitos em SAEV_DB_TYPE
+        self.db_types = ("sqlite", "duckdb", "parquet")
+
+        # Recursos do DuckDB: variável de ambiente -> opção do DuckDB
+        self.duckdb_settings_env = {
+            "threads": "SAEV_DUCKDB_THREADS",
+            "memory_limit": "SAEV_DUCKDB_MEMORY_LIMIT",
+            "temp_directory": "SAEV_DUCKDB_TEMP_DIR"
+        }
     
     def get_database_path(self, environment: str = None) -> str:
         """
@@ -48,6 +58,84 @@ class SAEVConfig:
         db_path = self.db_directory / db_name
         
         return str(db_path)
+
+    def get_db_type(self) -> str:
+        """
+        Motor de consulta configurado em SAEV_DB_TYPE
+
+        Returns:
+            'sqlite' (padrão), 'duckdb' ou 'parquet'
+        """
+        db_type = os.getenv('SAEV_DB_TYPE', '').strip().lower() or 'sqlite'
+        if db_type not in self.db_types:
+            raise ValueError(f"SAEV_DB_TYPE inválido: '{db_type}'. Use {', '.join(self.db_types)}")
+        return db_type
+
+    def get_engine_database_path(self, environment: str = None, db_type: str = None) -> str:
+        """
+        Caminho do banco do motor configurado (usado por dashboards, analytics e relatórios)
+
+        SAEV_DATABASE_PATH, se definida, tem prioridade. Caso contrário:
+        - sqlite: o banco do ambiente (``get_database_path``)
+        - duckdb: o arquivo .duckdb ao lado do banco do ambiente
+        - parquet: a pasta em SAEV_PARQUET_DIR
+
+        Args:
+            environment: 'teste' ou 'producao'. Se None, detecta automaticamente
+            db_type: Motor ('sqlite', 'duckdb' ou 'parquet'). Se None, usa SAEV_DB_TYPE
+
+        Returns:
+            String com o caminho do banco ou da pasta Parquet
+        """
+        explicit_path = os.getenv('SAEV_DATABASE_PATH', '').strip()
+        if explicit_path:
+            return explicit_path
+
+        db_type = db_type or self.get_db_type()
+        if db_type not in self.db_types:
+            raise ValueError(f"Motor '{db_type}' não é válido. Use {', '.join(self.db_types)}")
+
+        if db_type == 'parquet':
+            parquet_dir = os.getenv('SAEV_PARQUET_DIR', '').strip()
+            if not parquet_dir:
+                raise ValueError("SAEV_DB_TYPE=parquet requer a pasta do conjunto em SAEV_PARQUET_DIR")
+            return parquet_dir
+
+        db_path = self.get_database_path(environment)
+        if db_type == 'duckdb':
+            return str(Path(db_path).with_suffix('.duckdb'))
+        return db_path
+
+    def get_duckdb_settings(self) -> Dict[str, Any]:
+        """
+        Configurações de recursos das conexões DuckDB
+        
+        Lidas de SAEV_DUCKDB_THREADS (ex.: 4), SAEV_DUCKDB_MEMORY_LIMIT
+        (ex.: '4GB') e SAEV_DUCKDB_TEMP_DIR (pasta para dados que não cabem
+        na memória). Opções não configuradas ficam com o padrão do DuckDB.
+        Todas as conexões do processo devem usar as mesmas configurações: o
+        DuckDB recusa abrir o mesmo arquivo com configurações diferentes.
+        
+        Returns:
+            Dicionário pronto para ``duckdb.connect(config=...)``
+        """
+        settings = {}
+        for option, env_name in self.duckdb_settings_env.items():
+            value = os.getenv(env_name, '').strip()
+            if value:
+                settings[option] = value
+        
+        if "threads" in settings:
+            threads = int(settings["threads"])
+            if threads < 1:
+                raise ValueError(f"SAEV_DUCKDB_THREADS inválido: {threads} (use um inteiro positivo)")
+            settings["threads"] = threads
+        
+        if "temp_directory" in settings:
+            Path(settings["temp_directory"]).mkdir(parents=True, exist_ok=True)
+            settings["temp_directory"] = str(settings["temp_directory"])
+        
+        return settings
     
     def detect_environment(self) -> str:
         """
@@ -11,6 +11,7 @@ PAINÉIS DISPONÍVEIS:
 3. 🏫 Análise por Escola (em desenvolvimento)
 4. 🏙️ Análise por Município (em desenvolvimento)
 5. 📈 Análise Temporal (em desenvolvimento)
+6. ⏱️ Desempenho das Consultas - Widgets e consultas mais lentas
 
 AUTOR: SAEV Dashboard Project
 DATA: 2025
@@ -19,10 +20,10 @@ VERSÃO: 1.0
 
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import json
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -32,6 +33,15 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.config import config
+from src.data.filter_domain import get_filter_domain
+from src.data.query_service import get_query_service
+from src.data.student_sets import CELL_TABLE, cell_filter_sql, summarize_cells
+from src.dashboard.performance import render_query_performance
+from src.dashboard.queries import (
+    STUDENT_PAGE_KEY, band_label, detailed_competency_query, detailed_fact_filters,
+    detailed_histogram_query, detailed_school_performance_query, detailed_student_ranking_query,
+    detailed_students_page_query, detailed_summary_query
+)
 
 # Configuração da página
 st.set_page_config(
@@ -52,7 +62,7 @@ class SAEVGalleryBase:
         if not self.db_path:
             try:
                 self.environment = config.detect_environment()
-                self.db_path = config.get_database_path(self.environment)
+                self.db_path = config.get_engine_database_path(self.environment)
             except Exception as e:
                 st.error(f"❌ Erro ao configurar banco de dados: {e}")
                 st.stop()
@@ -69,72 +79,30 @@ class SAEVGalleryBase:
             st.info("💡 Execute o script de carga com Star Schema ou use apply_star_schema.py")
             st.stop()
     
+    @property
+    def query_service(self):
+        """Serviço de consultas compartilhado (conexões somente leitura)"""
+        return get_query_service(self.db_path)
+    
+    @property
+    def filter_domain(self):
+        """Combinações válidas dos filtros, carregadas uma vez por processo"""
+        return get_filter_domain(self.query_service)
+    
     def _check_star_schema(self) -> bool:
         """Verifica se as tabelas do Star Schema existem (compatível com DuckDB e SQLite)"""
         try:
             required_tables = ['dim_aluno', 'dim_escola', 'dim_descritor', 'fato_resposta_aluno']
-            
-            # Detectar se é DuckDB ou SQLite
-            db_type = os.getenv('SAEV_DB_TYPE', 'sqlite')
-            
-            if db_type == 'duckdb' and 'duckdb' in self.db_path:
-                # Verificação para DuckDB
-                try:
-                    import duckdb
-                    conn = duckdb.connect(self.db_path)
-                    
-                    for table in required_tables:
-                        result = conn.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'").fetchall()
-                        if not result:
-                            conn.close()
-                            return False
-                    
-                    conn.close()
-                    return True
-                    
-                except ImportError:
-                    # Fallback para SQLite se DuckDB não disponível
-                    pass
-            
-            # Verificação para SQLite (padrão)
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for table in required_tables:
-                cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-                if not cursor.fetchone():
-                    conn.close()
-                    return False
-            
-            conn.close()
-            return True
+            return self.query_service.has_tables(required_tables)
             
         except Exception:
             return False
     
-    def get_data(self, query: str) -> pd.DataFrame:
-        """Executa query e retorna DataFrame (otimizado para DuckDB)"""
+    def get_data(self, query: str, params: Optional[list] = None,
+                 filters: Optional[dict] = None) -> pd.DataFrame:
+        """Executa query e retorna DataFrame (SQLite ou DuckDB, pela extensão do banco)"""
         try:
-            # Detectar se é DuckDB ou SQLite
-            db_type = os.getenv('SAEV_DB_TYPE', 'sqlite')
-            
-            if db_type == 'duckdb' and 'duckdb' in self.db_path:
-                # Usar DuckDB para performance superior
-                try:
-                    import duckdb
-                    conn = duckdb.connect(self.db_path)
-                    df = conn.execute(query).fetchdf()
-                    conn.close()
-                    return df
-                except ImportError:
-                    # Fallback para SQLite se DuckDB não disponível
-                    pass
-            
-            # SQLite padrão
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return self.query_service.query(query, params, filters=filters)
             
         except Exception as e:
             st.error(f"❌ Erro ao executar consulta: {e}")
@@ -157,10 +125,12 @@ class SAEVGalleryBase:
                     st.error("🔒 Dados sensíveis - Use com cuidado")
                 
                 # Informação do tipo de banco
-                db_type = os.getenv('SAEV_DB_TYPE', 'sqlite')
-                if 'duckdb' in self.db_path or db_type == 'duckdb':
+                db_type = get_query_service(self.db_path).engine
+                if db_type == 'duckdb':
                     st.success("🦆 **DuckDB** - Performance Superior")
                     st.info("⚡ Consultas 10-100x mais rápidas")
+                elif db_type == 'parquet':
+                    st.success("🗂️ **Parquet** (via DuckDB) - Performance Superior")
                 else:
                     st.info("📊 **SQLite** - Banco Padrão")
                 
@@ -205,16 +175,20 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
         st.sidebar.markdown("*Utilize múltiplas seleções para análises granulares*")
         
         try:
+            # Opções resolvidas em memória a partir do domínio dos filtros
+            # (agg_filtro), estreitando a cada seleção, sem consultar a fato
+            domain = self.filter_domain
+            
             # 1. Filtro de Estado (UF)
-            states = self.get_data("SELECT DISTINCT MUN_UF FROM fato_resposta_aluno ORDER BY MUN_UF")
-            if states.empty:
+            states = domain.options('MUN_UF')
+            if not states:
                 st.sidebar.error("❌ Nenhum estado encontrado")
                 return None
             
             selected_states = st.sidebar.multiselect(
                 "🗺️ Estado (UF)",
-                states['MUN_UF'].tolist(),
-                default=[states['MUN_UF'].iloc[0]] if not states.empty else []
+                states,
+                default=[states[0]]
             )
             
             if not selected_states:
@@ -222,19 +196,13 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 return None
             
             # 2. Filtro de Município (baseado nos estados selecionados)
-            states_filter = "','".join(selected_states)
-            municipalities_query = f"""
-            SELECT DISTINCT MUN_NOME 
-            FROM fato_resposta_aluno 
-            WHERE MUN_UF IN ('{states_filter}')
-            ORDER BY MUN_NOME
-            """
-            municipalities = self.get_data(municipalities_query)
+            selection = {'MUN_UF': selected_states}
+            municipalities = domain.options('MUN_NOME', selection)
             
             selected_municipalities = st.sidebar.multiselect(
                 "🏙️ Município",
-                municipalities['MUN_NOME'].tolist(),
-                default=municipalities['MUN_NOME'].tolist()[:3] if len(municipalities) >= 3 else municipalities['MUN_NOME'].tolist()
+                municipalities,
+                default=municipalities[:3]
             )
             
             if not selected_municipalities:
@@ -242,22 +210,15 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 return None
             
             # 3. Filtro de Escola (baseado nos municípios selecionados) 
-            municipalities_filter = "','".join(selected_municipalities)
-            schools_query = f"""
-            SELECT DISTINCT f.ESC_INEP, e.ESC_NOME
-            FROM fato_resposta_aluno f
-            JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
-            WHERE f.MUN_NOME IN ('{municipalities_filter}')
-            ORDER BY e.ESC_NOME
-            """
-            schools = self.get_data(schools_query)
+            selection['MUN_NOME'] = selected_municipalities
+            schools = domain.schools(selection)
             
             # Criar lista de opções com nome da escola para melhor UX
-            school_options = [f"{row['ESC_NOME']} ({row['ESC_INEP']})" for _, row in schools.iterrows()]
+            school_options = [f"{name} ({inep})" for inep, name in zip(schools['ESC_INEP'], schools['ESC_NOME'])]
             selected_school_options = st.sidebar.multiselect(
                 "🏫 Escola",
                 school_options,
-                default=school_options[:5] if len(school_options) >= 5 else school_options
+                default=school_options[:5]
             )
             
             # Extrair códigos INEP das seleções
@@ -270,47 +231,44 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 st.sidebar.warning("⚠️ Selecione pelo menos uma escola")
                 return None
             
-            # 4. Filtro de Ano
-            years = self.get_data("SELECT DISTINCT AVA_ANO FROM fato_resposta_aluno ORDER BY AVA_ANO DESC")
+            # 4. Filtro de Ano (anos avaliados nas escolas selecionadas)
+            selection['ESC_INEP'] = selected_schools
+            years = domain.options('AVA_ANO', selection, descending=True)
             selected_years = st.sidebar.multiselect(
                 "📅 Ano da Avaliação",
-                years['AVA_ANO'].tolist(),
-                default=[years['AVA_ANO'].iloc[0]] if not years.empty else []
+                years,
+                default=years[:1]
             )
             
             # 5. Filtro de Disciplina
-            disciplines = self.get_data("SELECT DISTINCT DIS_NOME FROM fato_resposta_aluno ORDER BY DIS_NOME")
+            selection['AVA_ANO'] = selected_years
+            disciplines = domain.options('DIS_NOME', selection)
             selected_disciplines = st.sidebar.multiselect(
                 "📚 Disciplina",
-                disciplines['DIS_NOME'].tolist(),
-                default=[disciplines['DIS_NOME'].iloc[0]] if not disciplines.empty else []
+                disciplines,
+                default=disciplines[:1]
             )
             
             # 6. Filtro de Teste (baseado nas disciplinas selecionadas)
             if selected_disciplines:
-                disciplines_filter = "','".join(selected_disciplines)
-                tests_query = f"""
-                SELECT DISTINCT TES_NOME 
-                FROM fato_resposta_aluno 
-                WHERE DIS_NOME IN ('{disciplines_filter}')
-                ORDER BY TES_NOME
-                """
-                tests = self.get_data(tests_query)
+                selection['DIS_NOME'] = selected_disciplines
+                tests = domain.options('TES_NOME', selection)
                 
                 selected_tests = st.sidebar.multiselect(
                     "📝 Teste",
-                    tests['TES_NOME'].tolist(),
-                    default=tests['TES_NOME'].tolist()[:2] if len(tests) >= 2 else tests['TES_NOME'].tolist()
+                    tests,
+                    default=tests[:2]
                 )
             else:
                 selected_tests = []
             
             # 7. Filtro de Série
-            series = self.get_data("SELECT DISTINCT SER_NOME FROM fato_resposta_aluno ORDER BY SER_NOME")
+            selection['TES_NOME'] = selected_tests
+            series = domain.options('SER_NOME', selection)
             selected_series = st.sidebar.multiselect(
                 "🎓 Série",
-                series['SER_NOME'].tolist(),
-                default=series['SER_NOME'].tolist()[:2] if len(series) >= 2 else series['SER_NOME'].tolist()
+                series,
+                default=series[:2]
             )
             
             # Validar se todos os filtros obrigatórios foram selecionados
@@ -333,64 +291,22 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
             st.sidebar.error(f"❌ Erro ao criar filtros: {e}")
             return None
     
-    def build_where_clause(self, filters: Dict[str, Any]) -> str:
-        """Constrói cláusula WHERE baseada nos filtros selecionados"""
-        conditions = []
-        
-        if filters['states']:
-            states_list = "','".join(filters['states'])
-            conditions.append(f"f.MUN_UF IN ('{states_list}')")
-        
-        if filters['municipalities']:
-            municipalities_list = "','".join(filters['municipalities'])
-            conditions.append(f"f.MUN_NOME IN ('{municipalities_list}')")
-        
-        if filters['schools']:
-            schools_list = "','".join(filters['schools'])
-            conditions.append(f"f.ESC_INEP IN ('{schools_list}')")
-        
-        if filters['years']:
-            years_list = ','.join(map(str, filters['years']))
-            conditions.append(f"f.AVA_ANO IN ({years_list})")
-        
-        if filters['disciplines']:
-            disciplines_list = "','".join(filters['disciplines'])
-            conditions.append(f"f.DIS_NOME IN ('{disciplines_list}')")
-        
-        if filters['tests']:
-            tests_list = "','".join(filters['tests'])
-            conditions.append(f"f.TES_NOME IN ('{tests_list}')")
-        
-        if filters['series']:
-            series_list = "','".join(filters['series'])
-            conditions.append(f"f.SER_NOME IN ('{series_list}')")
-        
-        return "WHERE " + " AND ".join(conditions) if conditions else ""
+    def _summary_from_student_sets(self, filters: Dict[str, Any]) -> pd.DataFrame:
+        """Métricas resumo a partir da união dos conjuntos de alunos por célula"""
+        where_clause, params = cell_filter_sql(detailed_fact_filters(filters), self.query_service.builder)
+        cells = self.get_data(f"SELECT * FROM {CELL_TABLE} {where_clause}", params, filters=filters)
+        return pd.DataFrame([summarize_cells(cells)])
     
     def show_summary_metrics(self, filters: Dict[str, Any]):
         """Exibe métricas resumo dos filtros aplicados"""
         st.header("📊 Resumo da Seleção")
         
-        where_clause = self.build_where_clause(filters)
-        
-        # Query para métricas gerais
-        summary_query = f"""
-        SELECT 
-            COUNT(DISTINCT f.ALU_ID) as total_alunos,
-            COUNT(DISTINCT f.ESC_INEP) as total_escolas,
-            COUNT(DISTINCT f.MUN_NOME) as total_municipios,
-            COUNT(DISTINCT f.MUN_UF) as total_estados,
-            COUNT(DISTINCT f.AVA_ANO) as total_anos,
-            COUNT(DISTINCT f.DIS_NOME) as total_disciplinas,
-            COUNT(DISTINCT f.TES_NOME) as total_testes,
-            SUM(f.ACERTO) as total_acertos,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto_geral
-        FROM fato_resposta_aluno f
-        {where_clause}
-        """
-        
-        summary = self.get_data(summary_query)
+        if self.query_service.has_tables([CELL_TABLE]):
+            summary = self._summary_from_student_sets(filters)
+        else:
+            # Query para métricas gerais
+            summary_query, params = detailed_summary_query(self.query_service.builder, filters)
+            summary = self.get_data(summary_query, params, filters=filters)
         
         if not summary.empty and summary.iloc[0]['total_alunos'] > 0:
             col1, col2, col3, col4, col5 = st.columns(5)
@@ -418,64 +334,48 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
             st.warning("⚠️ Nenhum dado encontrado para os filtros selecionados")
     
     def student_performance_analysis(self, filters: Dict[str, Any]):
-        """Análise detalhada do desempenho dos alunos"""
+        """Análise detalhada do desempenho dos alunos (agregações calculadas no banco)"""
         st.header("🎯 Análise de Desempenho dos Alunos")
         
-        where_clause = self.build_where_clause(filters)
+        builder = self.query_service.builder
         
-        # Query para desempenho individual dos alunos
-        students_query = f"""
-        SELECT 
-            f.ALU_ID,
-            a.ALU_NOME,
-            f.MUN_NOME,
-            e.ESC_NOME,
-            f.SER_NOME,
-            SUM(f.ACERTO) as total_acertos,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-        FROM fato_resposta_aluno f
-        JOIN dim_aluno a ON f.ALU_ID = a.ALU_ID
-        JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
-        {where_clause}
-        GROUP BY f.ALU_ID, a.ALU_NOME, f.MUN_NOME, e.ESC_NOME, f.SER_NOME
-        ORDER BY taxa_acerto DESC
-        """
+        # Histograma calculado no banco (também indica se há alunos na seleção)
+        histogram_query, params = detailed_histogram_query(builder, filters)
+        histogram_df = self.get_data(histogram_query, params, filters=filters)
+        total_students = int(histogram_df['quantidade_alunos'].sum()) if not histogram_df.empty else 0
         
-        students_df = self.get_data(students_query)
-        
-        if not students_df.empty:
+        if total_students > 0:
             # Distribuição de desempenho
             col1, col2 = st.columns(2)
             
             with col1:
                 st.subheader("📈 Distribuição de Taxa de Acerto")
-                fig_hist = px.histogram(
-                    students_df,
-                    x='taxa_acerto',
-                    nbins=20,
+                histogram_df['faixa'] = (
+                    histogram_df['bin_inicio'].astype(str) + '-' + histogram_df['bin_fim'].astype(str)
+                )
+                fig_hist = px.bar(
+                    histogram_df,
+                    x='faixa',
+                    y='quantidade_alunos',
                     title='Distribuição de Taxa de Acerto dos Alunos',
-                    labels={'taxa_acerto': 'Taxa de Acerto (%)', 'count': 'Quantidade de Alunos'}
+                    labels={'faixa': 'Taxa de Acerto (%)', 'quantidade_alunos': 'Quantidade de Alunos'}
                 )
+                fig_hist.update_layout(bargap=0)
                 st.plotly_chart(fig_hist, use_container_width=True)
             
             with col2:
                 st.subheader("🎯 Faixas de Desempenho")
                 
-                # Criar faixas de desempenho
-                students_df['faixa_desempenho'] = students_df['taxa_acerto'].apply(
-                    lambda x: 'Excelente (80-100%)' if x >= 80
-                    else 'Bom (60-79%)' if x >= 60
-                    else 'Regular (40-59%)' if x >= 40
-                    else 'Abaixo do Esperado (<40%)'
-                )
-                
-                faixas_count = students_df['faixa_desempenho'].value_counts()
+                # Faixas agregadas a partir das classes do histograma
+                histogram_df['faixa_desempenho'] = histogram_df['bin_inicio'].map(band_label)
+                faixas_count = histogram_df.groupby('faixa_desempenho', sort=False)['quantidade_alunos'].sum()
+                faixas_count = faixas_count[faixas_count > 0]
                 
                 fig_pie = px.pie(
                     values=faixas_count.values,
                     names=faixas_count.index,
                     title='Distribuição por Faixa de Desempenho',
+                    color=faixas_count.index,
                     color_discrete_map={
                         'Excelente (80-100%)': '#2E8B57',
                         'Bom (60-79%)': '#32CD32',
@@ -485,28 +385,27 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 )
                 st.plotly_chart(fig_pie, use_container_width=True)
             
-            # Top 10 e Bottom 10 alunos
+            # Top 10 e Bottom 10 alunos (LIMIT no banco)
             col3, col4 = st.columns(2)
+            ranking_columns = ['ALU_NOME', 'ESC_NOME', 'taxa_acerto', 'total_questoes']
             
             with col3:
                 st.subheader("🏆 Top 10 Alunos")
-                top_students = students_df.head(10)[['ALU_NOME', 'ESC_NOME', 'taxa_acerto', 'total_questoes']]
-                st.dataframe(top_students, use_container_width=True)
+                top_query, params = detailed_student_ranking_query(builder, filters, limit=10, best=True)
+                top_students = self.get_data(top_query, params, filters=filters)
+                st.dataframe(top_students[ranking_columns], use_container_width=True)
             
             with col4:
                 st.subheader("⚠️ Alunos que Precisam de Atenção")
-                bottom_students = students_df.tail(10)[['ALU_NOME', 'ESC_NOME', 'taxa_acerto', 'total_questoes']]
-                st.dataframe(bottom_students, use_container_width=True)
+                bottom_query, params = detailed_student_ranking_query(builder, filters, limit=10, best=False)
+                bottom_students = self.get_data(bottom_query, params, filters=filters)
+                st.dataframe(bottom_students[ranking_columns], use_container_width=True)
             
             # Análise por escola
             st.subheader("🏫 Desempenho por Escola")
-            school_performance = students_df.groupby('ESC_NOME').agg({
-                'taxa_acerto': 'mean',
-                'ALU_ID': 'count',
-                'total_questoes': 'sum'
-            }).round(2).reset_index()
+            school_query, params = detailed_school_performance_query(builder, filters)
+            school_performance = self.get_data(school_query, params, filters=filters)
             school_performance.columns = ['Escola', 'Taxa Média (%)', 'Qtd Alunos', 'Total Questões']
-            school_performance = school_performance.sort_values('Taxa Média (%)', ascending=False)
             
             fig_school = px.bar(
                 school_performance,
@@ -519,33 +418,61 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
             )
             fig_school.update_layout(xaxis_tickangle=45)
             st.plotly_chart(fig_school, use_container_width=True)
+            
+            # Tabela completa, paginada no banco
+            self.student_table(filters, total_students)
         
         else:
             st.warning("⚠️ Nenhum dado de aluno encontrado para os filtros selecionados")
     
+    def student_table(self, filters: Dict[str, Any], total_students: int, page_size: int = 50):
+        """Tabela de alunos em páginas buscadas sob demanda (paginação por chave)"""
+        with st.expander(f"📋 Todos os Alunos ({total_students:,})"):
+            # Cursores das páginas já visitadas; reiniciados quando os filtros mudam
+            selection = json.dumps(filters, sort_keys=True, default=str)
+            state = st.session_state.setdefault('students_pages', {'selection': None, 'cursors': [None]})
+            if state['selection'] != selection:
+                state.update(selection=selection, cursors=[None])
+            
+            page_query, params = detailed_students_page_query(
+                self.query_service.builder, filters, page_size, after=state['cursors'][-1]
+            )
+            page_df = self.get_data(page_query, params, filters=filters)
+            has_next = len(page_df) > page_size
+            page_df = page_df.head(page_size)
+            
+            page_number = len(state['cursors'])
+            total_pages = max(1, -(-total_students // page_size))
+            st.caption(f"Página {page_number} de {total_pages}")
+            st.dataframe(
+                page_df[['ALU_NOME', 'MUN_NOME', 'ESC_NOME', 'SER_NOME',
+                         'total_acertos', 'total_questoes', 'taxa_acerto']],
+                use_container_width=True
+            )
+            
+            col_prev, col_next = st.columns(2)
+            with col_prev:
+                if st.button("⬅️ Anterior", disabled=page_number == 1, key="students_prev"):
+                    state['cursors'].pop()
+                    st.rerun()
+            with col_next:
+                if st.button("Próxima ➡️", disabled=not has_next, key="students_next"):
+                    last = page_df.iloc[-1]
+                    state['cursors'].append(
+                        [last['taxa_acerto'].item()] + [
+                            last[column].item() if hasattr(last[column], 'item') else last[column]
+                            for column in STUDENT_PAGE_KEY
+                        ]
+                    )
+                    st.rerun()
+    
     def competency_analysis(self, filters: Dict[str, Any]):
         """Análise por competências (descritores)"""
         st.header("🎯 Análise por Competências")
         
-        where_clause = self.build_where_clause(filters)
-        
         # Query para análise por descritores
-        competency_query = f"""
-        SELECT 
-            d.MTI_CODIGO,
-            d.MTI_DESCRITOR,
-            COUNT(DISTINCT f.ALU_ID) as alunos_avaliados,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            SUM(f.ACERTO) as total_acertos,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-        FROM fato_resposta_aluno f
-        JOIN dim_descritor d ON f.MTI_CODIGO = d.MTI_CODIGO
-        {where_clause}
-        GROUP BY d.MTI_CODIGO, d.MTI_DESCRITOR
-        ORDER BY taxa_acerto ASC
-        """
-        
-        competency_df = self.get_data(competency_query)
+        competency_query, params = detailed_competency_query(self.query_service.builder, filters)
+        competency_df = self.get_data(competency_query, params, filters=filters)
         
         if not competency_df.empty:
             # Gráfico de barras das competências
@@ -625,6 +552,7 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 - **Taxa de acerto geral e individual**
                 - **Distribuição de desempenho em faixas**
                 - **Ranking de alunos (melhores e que precisam de atenção)**
+                - **Tabela completa de alunos, paginada no banco**
                 - **Comparação entre escolas**
                 - **Análise por competências/descritores**
                 
@@ -635,6 +563,20 @@ class DetailedAnalysisPanel(SAEVGalleryBase):
                 """)
 
 
+class QueryPerformancePanel:
+    """Painel de desempenho das consultas executadas pela galeria"""
+    
+    panel_title = "⏱️ Desempenho das Consultas"
+    
+    def render(self):
+        """Renderiza os widgets mais lentos e o log de consultas lentas"""
+        st.title(self.panel_title)
+        st.markdown("### Tempo, linhas e bytes de cada consulta feita pelos painéis deste processo")
+        st.markdown("---")
+        
+        render_query_performance(key_prefix="gallery_perf")
+
+
 def main():
     """Função principal da galeria"""
     st.title("🎨 Galeria de Painéis SAEV")
@@ -649,7 +591,8 @@ def main():
         "📊 Dashboard Geral (Em Desenvolvimento)": "general_dashboard", 
         "🏫 Análise por Escola (Em Desenvolvimento)": "school_analysis",
         "🏙️ Análise por Município (Em Desenvolvimento)": "municipality_analysis",
-        "📈 Análise Temporal (Em Desenvolvimento)": "temporal_analysis"
+        "📈 Análise Temporal (Em Desenvolvimento)": "temporal_analysis",
+        "⏱️ Desempenho das Consultas": "query_performance"
     }
     
     selected_panel = st.sidebar.selectbox(
@@ -664,6 +607,9 @@ def main():
         panel = DetailedAnalysisPanel()
         panel.render()
     
+    elif panel_options[selected_panel] == "query_performance":
+        QueryPerformancePanel().render()
+    
     else:
         # Painéis em desenvolvimento
         st.header(selected_panel)
@@ -671,6 +617,7 @@ def main():
         
         st.markdown("### 🔄 Painéis Disponíveis:")
         st.markdown("- ✅ **Análise Detalhada por Filtros** - Funcional")
+        st.markdown("- ✅ **Desempenho das Consultas** - Funcional")
         st.markdown("- 🚧 **Dashboard Geral** - Em desenvolvimento")
         st.markdown("- 🚧 **Análise por Escola** - Em desenvolvimento") 
         st.markdown("- 🚧 **Análise por Município** - Em desenvolvimento")
@@ -4,18 +4,23 @@ Otimizado para usar tabelas de dimensão e fato para performance superior
 """
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
 from pathlib import Path
+from typing import Optional
 
 # Adicionar o diretório raiz ao path para importações
 import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.config import config
+from src.data.filter_domain import get_filter_domain
+from src.data.query_service import get_query_service
+from src.data.rollups import RollupRouter
+from src.dashboard.performance import render_query_performance
+from src.dashboard.queries import performance_distribution_query, star_fact_filters
 
 # Configuração da página
 st.set_page_config(
@@ -35,7 +40,7 @@ class SAEVStarSchemaDashboard:
             # Fallback para detecção automática
             try:
                 self.environment = config.detect_environment()
-                self.db_path = config.get_database_path(self.environment)
+                self.db_path = config.get_engine_database_path(self.environment)
             except Exception as e:
                 st.error(f"❌ Erro ao configurar banco de dados: {e}")
                 st.stop()
@@ -55,23 +60,22 @@ class SAEVStarSchemaDashboard:
         # Mostrar informações do ambiente na sidebar
         self._show_environment_info()
     
+    @property
+    def query_service(self):
+        """Serviço de consultas compartilhado (conexões somente leitura)"""
+        return get_query_service(self.db_path)
+    
+    @property
+    def filter_domain(self):
+        """Combinações válidas dos filtros, carregadas uma vez por processo"""
+        return get_filter_domain(self.query_service)
+    
     def _check_star_schema(self) -> bool:
         """Verifica se as tabelas do Star Schema existem"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Verificar se as tabelas essenciais existem
             required_tables = ['dim_aluno', 'dim_escola', 'dim_descritor', 'fato_resposta_aluno']
-            
-            for table in required_tables:
-                cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-                if not cursor.fetchone():
-                    conn.close()
-                    return False
-            
-            conn.close()
-            return True
+            return self.query_service.has_tables(required_tables)
             
         except Exception:
             return False
@@ -111,8 +115,6 @@ class SAEVStarSchemaDashboard:
     def _show_star_schema_info(self):
         """Mostra informações sobre o Star Schema na sidebar"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
             # Contar registros nas tabelas principais
             counts = {}
             tables = {
@@ -123,10 +125,7 @@ class SAEVStarSchemaDashboard:
             }
             
             for table, label in tables.items():
-                cursor = conn.execute(f"SELECT COUNT(*) FROM {table}")
-                counts[label] = cursor.fetchone()[0]
-            
-            conn.close()
+                counts[label] = self.query_service.fetchall(f"SELECT COUNT(*) FROM {table}")[0][0]
             
             st.markdown("### ⭐ Star Schema")
             st.success("✅ Modelo dimensional ativo")
@@ -137,55 +136,64 @@ class SAEVStarSchemaDashboard:
         except Exception as e:
             st.error(f"Erro ao obter info Star Schema: {e}")
         
-    def get_data(self, query: str) -> pd.DataFrame:
+    def get_data(self, query: str, params: Optional[list] = None,
+                 filters: Optional[dict] = None) -> pd.DataFrame:
         """Executa query e retorna DataFrame"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return self.query_service.query(query, params, filters=filters)
         except Exception as e:
             st.error(f"❌ Erro ao executar consulta: {e}")
             return pd.DataFrame()
     
+    def _fetch_cached(self, query: str) -> list:
+        """Executa query (com cache de resultados) e retorna as linhas como tuplas"""
+        return list(self.query_service.query(query).itertuples(index=False, name=None))
+    
+    def get_aggregate(self, group_by, measures, filters, order_by=None) -> pd.DataFrame:
+        """Consulta agregada roteada para a menor tabela de agregação que a responde"""
+        router = RollupRouter(self._fetch_cached, self.query_service.builder)
+        router.refresh(self.query_service.table_names())
+        
+        query, params = router.build_query(group_by, measures, star_fact_filters(filters), order_by)
+        return self.get_data(query, params, filters=filters)
+    
     def create_filters(self):
         """Cria filtros na sidebar baseados no Star Schema"""
         st.sidebar.header("🔍 Filtros")
         
         try:
-            # Filtro de ano - usando tabela fato
-            years = self.get_data("SELECT DISTINCT AVA_ANO FROM fato_resposta_aluno ORDER BY AVA_ANO")
-            if years.empty:
+            # Opções resolvidas em memória a partir do domínio dos filtros
+            # (agg_filtro), sem consultar a tabela fato
+            domain = self.filter_domain
+            
+            # Filtro de ano
+            years = domain.options('AVA_ANO')
+            if not years:
                 st.sidebar.error("❌ Nenhum ano encontrado nos dados")
                 return None
             
-            selected_year = st.sidebar.selectbox("Ano da Avaliação", years['AVA_ANO'].tolist())
+            selected_year = st.sidebar.selectbox("Ano da Avaliação", years)
             
-            # Filtro de disciplina - usando tabela fato
-            disciplines = self.get_data("SELECT DISTINCT DIS_NOME FROM fato_resposta_aluno ORDER BY DIS_NOME")
-            if disciplines.empty:
+            # Filtro de disciplina (avaliadas no ano)
+            disciplines = domain.options('DIS_NOME', {'AVA_ANO': selected_year})
+            if not disciplines:
                 st.sidebar.error("❌ Nenhuma disciplina encontrada nos dados")
                 return None
             
-            selected_discipline = st.sidebar.selectbox("Disciplina", disciplines['DIS_NOME'].tolist())
+            selected_discipline = st.sidebar.selectbox("Disciplina", disciplines)
             
-            # Filtro de teste (nome do teste) - usando tabela fato
-            tests_query = f"""
-            SELECT DISTINCT TES_NOME 
-            FROM fato_resposta_aluno 
-            WHERE DIS_NOME = '{selected_discipline}' 
-            ORDER BY TES_NOME
-            """
-            tests = self.get_data(tests_query)
-            if tests.empty:
+            # Filtro de teste (nome do teste) da disciplina
+            tests = domain.options('TES_NOME', {'AVA_ANO': selected_year, 'DIS_NOME': selected_discipline})
+            if not tests:
                 st.sidebar.error("❌ Nenhum teste encontrado para esta disciplina")
                 return None
             
-            selected_test = st.sidebar.selectbox("Nome do Teste", tests['TES_NOME'].tolist())
+            selected_test = st.sidebar.selectbox("Nome do Teste", tests)
             
-            # Filtro de série - usando tabela fato
-            series = self.get_data("SELECT DISTINCT SER_NOME FROM fato_resposta_aluno ORDER BY SER_NOME")
-            series_list = series['SER_NOME'].tolist() if not series.empty else []
+            # Filtro de série (séries que fizeram o teste)
+            series_list = domain.options('SER_NOME', {
+                'AVA_ANO': selected_year, 'DIS_NOME': selected_discipline, 'TES_NOME': selected_test
+            })
             
             # Definir valor padrão para 1º Ano
             default_series = []
@@ -210,26 +218,13 @@ class SAEVStarSchemaDashboard:
         """Visão geral do desempenho usando Star Schema"""
         st.header("📈 Visão Geral do Desempenho")
         
-        # Query base otimizada com filtros Star Schema
-        where_clause = f"WHERE f.AVA_ANO = {filters['year']} AND f.DIS_NOME = '{filters['discipline']}' AND f.TES_NOME = '{filters['test']}'"
-        if filters['series']:
-            series_list = "','".join(filters['series'])
-            where_clause += f" AND f.SER_NOME IN ('{series_list}')"
-        
-        # Métricas principais usando agregações da tabela fato
-        metrics_query = f"""
-        SELECT 
-            COUNT(DISTINCT f.ALU_ID) as total_alunos,
-            COUNT(DISTINCT f.ESC_INEP) as total_escolas,
-            COUNT(DISTINCT f.MUN_NOME) as total_municipios,
-            SUM(f.ACERTO) as total_acertos,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto_geral
-        FROM fato_resposta_aluno f
-        {where_clause}
-        """
-        
-        metrics = self.get_data(metrics_query)
+        # Métricas principais usando a menor agregação disponível
+        metrics = self.get_aggregate(
+            [],
+            ['total_alunos', 'total_escolas', 'total_municipios',
+             'total_acertos', 'total_questoes', 'taxa_acerto'],
+            filters
+        ).rename(columns={'taxa_acerto': 'taxa_acerto_geral'})
         
         if not metrics.empty and metrics.iloc[0]['total_alunos'] > 0:
             # Exibir métricas em colunas
@@ -250,34 +245,11 @@ class SAEVStarSchemaDashboard:
             # Gráfico de distribuição de desempenho
             st.subheader("📊 Distribuição de Desempenho por Faixas")
             
-            distribution_query = f"""
-            SELECT 
-                CASE 
-                    WHEN taxa_acerto >= 80 THEN 'Excelente (80-100%)'
-                    WHEN taxa_acerto >= 60 THEN 'Bom (60-79%)'
-                    WHEN taxa_acerto >= 40 THEN 'Regular (40-59%)'
-                    ELSE 'Abaixo do Esperado (<40%)'
-                END as faixa_desempenho,
-                COUNT(*) as quantidade_alunos
-            FROM (
-                SELECT 
-                    f.ALU_ID,
-                    ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-                FROM fato_resposta_aluno f
-                {where_clause}
-                GROUP BY f.ALU_ID
-            ) desempenho_alunos
-            GROUP BY faixa_desempenho
-            ORDER BY 
-                CASE faixa_desempenho
-                    WHEN 'Excelente (80-100%)' THEN 1
-                    WHEN 'Bom (60-79%)' THEN 2
-                    WHEN 'Regular (40-59%)' THEN 3
-                    ELSE 4
-                END
-            """
+            distribution_query, distribution_params = performance_distribution_query(
+                self.query_service.builder, filters
+            )
             
-            distribution = self.get_data(distribution_query)
+            distribution = self.get_data(distribution_query, distribution_params, filters=filters)
             
             if not distribution.empty:
                 fig = px.pie(
@@ -300,27 +272,13 @@ class SAEVStarSchemaDashboard:
         """Análise de desempenho por município usando Star Schema"""
         st.header("🏙️ Desempenho por Município")
         
-        where_clause = f"WHERE f.AVA_ANO = {filters['year']} AND f.DIS_NOME = '{filters['discipline']}' AND f.TES_NOME = '{filters['test']}'"
-        if filters['series']:
-            series_list = "','".join(filters['series'])
-            where_clause += f" AND f.SER_NOME IN ('{series_list}')"
-        
-        # Query otimizada usando Star Schema
-        query = f"""
-        SELECT 
-            f.MUN_NOME,
-            COUNT(DISTINCT f.ALU_ID) as total_alunos,
-            COUNT(DISTINCT f.ESC_INEP) as total_escolas,
-            SUM(f.ACERTO) as total_acertos,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-        FROM fato_resposta_aluno f
-        {where_clause}
-        GROUP BY f.MUN_NOME
-        ORDER BY taxa_acerto DESC
-        """
-        
-        df = self.get_data(query)
+        # Agregação por município (agg_municipio quando possível)
+        df = self.get_aggregate(
+            ['MUN_NOME'],
+            ['total_alunos', 'total_escolas', 'total_acertos', 'total_questoes', 'taxa_acerto'],
+            filters,
+            order_by='taxa_acerto DESC'
+        )
         
         if not df.empty:
             # Gráfico de barras
@@ -345,28 +303,13 @@ class SAEVStarSchemaDashboard:
         """Análise de desempenho por escola usando Star Schema"""
         st.header("🏫 Desempenho por Escola")
         
-        where_clause = f"WHERE f.AVA_ANO = {filters['year']} AND f.DIS_NOME = '{filters['discipline']}' AND f.TES_NOME = '{filters['test']}'"
-        if filters['series']:
-            series_list = "','".join(filters['series'])
-            where_clause += f" AND f.SER_NOME IN ('{series_list}')"
-        
-        # Query otimizada usando joins com tabelas de dimensão
-        query = f"""
-        SELECT 
-            f.MUN_NOME,
-            e.ESC_NOME,
-            COUNT(DISTINCT f.ALU_ID) as total_alunos,
-            SUM(f.ACERTO) as total_acertos,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-        FROM fato_resposta_aluno f
-        JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
-        {where_clause}
-        GROUP BY f.MUN_NOME, e.ESC_NOME
-        ORDER BY taxa_acerto DESC
-        """
-        
-        df = self.get_data(query)
+        # Agregação por escola (agg_escola quando possível) com nome da dimensão escola
+        df = self.get_aggregate(
+            ['MUN_NOME', 'ESC_NOME'],
+            ['total_alunos', 'total_acertos', 'total_questoes', 'taxa_acerto'],
+            filters,
+            order_by='taxa_acerto DESC'
+        )
         
         if not df.empty:
             # Scatter plot para mostrar relação alunos vs desempenho
@@ -395,28 +338,13 @@ class SAEVStarSchemaDashboard:
         """Análise por competências usando Star Schema"""
         st.header("🎯 Análise por Competências (Descritores)")
         
-        where_clause = f"WHERE f.AVA_ANO = {filters['year']} AND f.DIS_NOME = '{filters['discipline']}' AND f.TES_NOME = '{filters['test']}'"
-        if filters['series']:
-            series_list = "','".join(filters['series'])
-            where_clause += f" AND f.SER_NOME IN ('{series_list}')"
-        
-        # Query otimizada usando join com tabela de dimensão de descritores
-        query = f"""
-        SELECT 
-            d.MTI_CODIGO,
-            d.MTI_DESCRITOR,
-            COUNT(DISTINCT f.ALU_ID) as alunos_avaliados,
-            SUM(f.ACERTO + f.ERRO) as total_questoes,
-            SUM(f.ACERTO) as total_acertos,
-            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
-        FROM fato_resposta_aluno f
-        JOIN dim_descritor d ON f.MTI_CODIGO = d.MTI_CODIGO
-        {where_clause}
-        GROUP BY d.MTI_CODIGO, d.MTI_DESCRITOR
-        ORDER BY taxa_acerto ASC
-        """
-        
-        df = self.get_data(query)
+        # Agregação por descritor (agg_descritor quando possível) com a dimensão descritor
+        df = self.get_aggregate(
+            ['MTI_CODIGO', 'MTI_DESCRITOR'],
+            ['total_alunos', 'total_questoes', 'total_acertos', 'taxa_acerto'],
+            filters,
+            order_by='taxa_acerto ASC'
+        ).rename(columns={'total_alunos': 'alunos_avaliados'})
         
         if not df.empty:
             # Gráfico horizontal das competências
@@ -502,6 +430,9 @@ def main():
             - Todas as dimensões conectam-se à tabela fato através de chaves estrangeiras
             - Consultas utilizam JOINs otimizados para máxima performance
             """)
+        
+        with st.expander("⏱️ Desempenho das Consultas"):
+            render_query_performance(key_prefix="dashboard_perf")
 
 if __name__ == "__main__":
     main()
@@ -4,7 +4,6 @@ Otimizado para usar tabelas de dimensão e fato para performance superior
 """
 import streamlit as st
 import pandas as pd
-import sqlite3
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -16,6 +15,7 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.config import config
+from src.data.query_service import get_query_service
 
 # Configuração da página
 st.set_page_config(
@@ -35,7 +35,7 @@ class SAEVStarSchemaDashboard:
             # Fallback para detecção automática
             try:
                 self.environment = config.detect_environment()
-                self.db_path = config.get_database_path(self.environment)
+                self.db_path = config.get_engine_database_path(self.environment)
             except Exception as e:
                 st.error(f"❌ Erro ao configurar banco de dados: {e}")
                 st.stop()
@@ -55,23 +55,17 @@ class SAEVStarSchemaDashboard:
         # Mostrar informações do ambiente na sidebar
         self._show_environment_info()
     
+    @property
+    def query_service(self):
+        """Serviço de consultas compartilhado (SQLite, DuckDB ou Parquet)"""
+        return get_query_service(self.db_path)
+    
     def _check_star_schema(self) -> bool:
         """Verifica se as tabelas do Star Schema existem"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Verificar se as tabelas essenciais existem
             required_tables = ['dim_aluno', 'dim_escola', 'dim_descritor', 'fato_resposta_aluno']
-            
-            for table in required_tables:
-                cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-                if not cursor.fetchone():
-                    conn.close()
-                    return False
-            
-            conn.close()
-            return True
+            return self.query_service.has_tables(required_tables)
             
         except Exception:
             return False
@@ -111,8 +105,6 @@ class SAEVStarSchemaDashboard:
     def _show_star_schema_info(self):
         """Mostra informações sobre o Star Schema na sidebar"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
             # Contar registros nas tabelas principais
             counts = {}
             tables = {
@@ -123,10 +115,7 @@ class SAEVStarSchemaDashboard:
             }
             
             for table, label in tables.items():
-                cursor = conn.execute(f"SELECT COUNT(*) FROM {table}")
-                counts[label] = cursor.fetchone()[0]
-            
-            conn.close()
+                counts[label] = self.query_service.fetchall(f"SELECT COUNT(*) FROM {table}")[0][0]
             
             st.markdown("### ⭐ Star Schema")
             st.success("✅ Modelo dimensional ativo")
@@ -140,10 +129,7 @@ class SAEVStarSchemaDashboard:
     def get_data(self, query: str) -> pd.DataFrame:
         """Executa query e retorna DataFrame"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return self.query_service.query(query)
         except Exception as e:
             st.error(f"❌ Erro ao executar consulta: {e}")
             return pd.DataFrame()
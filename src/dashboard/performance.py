@@ -0,0 +1,72 @@
+"""
+Painel de desempenho das consultas do SAEV
+
+Mostra os widgets mais lentos a partir da instrumentação do serviço de
+consultas (``src.data.query_metrics``), as consultas mais recentes e as
+últimas entradas do log de consultas lentas. Usado pela galeria (painel
+próprio) e pelo dashboard principal (expander ao final da página).
+"""
+
+import streamlit as st
+import pandas as pd
+
+from src.data.query_cache import get_query_cache
+from src.data.query_metrics import get_query_metrics, read_slow_query_log
+
+
+def render_query_performance(key_prefix: str = "perf"):
+    """Renderiza os widgets mais lentos, as consultas recentes e o log de lentas"""
+    metrics = get_query_metrics()
+    records = metrics.records()
+
+    col1, col2, col3, col4 = st.columns(4)
+    executed = [record for record in records if not record['cached']]
+    with col1:
+        st.metric("🔢 Consultas registradas", f"{len(records):,}")
+    with col2:
+        st.metric("💾 Servidas pelo cache", f"{len(records) - len(executed):,}")
+    with col3:
+        slow = sum(1 for record in executed if record['seconds'] * 1000 >= metrics.slow_query_ms)
+        st.metric("🐢 Lentas", f"{slow:,}", help=f"Acima de {metrics.slow_query_ms:.0f} ms")
+    with col4:
+        cache_stats = get_query_cache().stats()
+        st.metric("📦 Cache de resultados", f"{cache_stats['bytes'] / 1024 ** 2:.1f} MB")
+
+    if not records:
+        st.info("ℹ️ Nenhuma consulta registrada neste processo ainda")
+        return
+
+    top_n = st.slider("Widgets exibidos", min_value=5, max_value=50, value=10, step=5,
+                      key=f"{key_prefix}_top_n")
+    include_cached = st.checkbox("Incluir respostas do cache", value=False,
+                                 key=f"{key_prefix}_include_cached")
+
+    st.subheader(f"🐢 Top {top_n} widgets mais lentos (p95)")
+    slowest = metrics.slowest_callers(top_n, include_cached=include_cached)
+    if slowest.empty:
+        st.info("ℹ️ Nenhuma consulta executada no banco (todas vieram do cache)")
+    else:
+        st.dataframe(slowest, use_container_width=True)
+
+    st.subheader("🕒 Consultas recentes")
+    recent = pd.DataFrame(records[::-1][:100])
+    recent['ms'] = (recent['seconds'] * 1000).round(1)
+    recent['kb'] = (pd.to_numeric(recent['bytes']) / 1024).round(1)
+    st.dataframe(
+        recent[['timestamp', 'caller', 'engine', 'fingerprint', 'rows', 'ms', 'kb', 'cached', 'error', 'sql']],
+        use_container_width=True
+    )
+
+    if metrics.log_path:
+        st.subheader(f"📝 Log de consultas lentas ({metrics.log_path})")
+        slow_log = read_slow_query_log(metrics.log_path, limit=50)
+        if slow_log.empty:
+            st.info("ℹ️ Nenhuma consulta lenta registrada no log")
+        else:
+            st.dataframe(slow_log, use_container_width=True)
+    else:
+        st.caption("Log de consultas lentas desativado (SAEV_SLOW_QUERY_LOG vazio)")
+
+    if st.button("🧹 Limpar registros", key=f"{key_prefix}_clear"):
+        metrics.clear()
+        st.rerun()
@@ -0,0 +1,253 @@
+"""
+Consultas SQL dos painéis do SAEV (sem dependência do Streamlit)
+
+Cada função recebe um ``SAEVQueryBuilder`` (que define o motor) e os filtros
+do painel, e devolve a tupla ``(sql, parâmetros)``. O texto do SQL depende
+apenas de quais filtros estão ativos, nunca dos valores selecionados, e pode
+ser usado por scripts, testes e benchmarks sem abrir o dashboard.
+"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.data.query_builder import SAEVQueryBuilder
+
+Query = Tuple[str, list]
+
+# Faixas de desempenho (rótulo e limite inferior da taxa de acerto)
+PERFORMANCE_BANDS = [
+    ('Excelente (80-100%)', 80),
+    ('Bom (60-79%)', 60),
+    ('Regular (40-59%)', 40),
+    ('Abaixo do Esperado (<40%)', None),
+]
+
+# Chave da paginação da tabela de alunos (além da taxa de acerto, decrescente)
+STUDENT_PAGE_KEY = ['ALU_ID', 'MUN_NOME', 'ESC_INEP', 'SER_NOME']
+
+
+def _band_case(column: str) -> str:
+    """Expressão CASE que classifica a taxa de acerto nas faixas de desempenho"""
+    conditions = [f"WHEN {column} >= {limit} THEN '{label}'"
+                  for label, limit in PERFORMANCE_BANDS if limit is not None]
+    return f"CASE {' '.join(conditions)} ELSE '{PERFORMANCE_BANDS[-1][0]}' END"
+
+
+def band_label(rate: float) -> str:
+    """Faixa de desempenho de uma taxa de acerto"""
+    for label, limit in PERFORMANCE_BANDS:
+        if limit is None or rate >= limit:
+            return label
+
+
+def _band_order(column: str) -> str:
+    """Expressão de ordenação das faixas (da melhor para a pior)"""
+    conditions = [f"WHEN '{label}' THEN {position}"
+                  for position, (label, _) in enumerate(PERFORMANCE_BANDS[:-1], start=1)]
+    return f"CASE {column} {' '.join(conditions)} ELSE {len(PERFORMANCE_BANDS)} END"
+
+
+def star_fact_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filtros do dashboard Star Schema mapeados para colunas da fato"""
+    return {
+        'AVA_ANO': filters['year'],
+        'DIS_NOME': filters['discipline'],
+        'TES_NOME': filters['test'],
+        'SER_NOME': filters['series'],
+    }
+
+
+def detailed_fact_filters(filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Filtros do painel de análise detalhada mapeados para colunas da fato"""
+    return {
+        'MUN_UF': filters['states'],
+        'MUN_NOME': filters['municipalities'],
+        'ESC_INEP': filters['schools'],
+        'AVA_ANO': filters['years'],
+        'DIS_NOME': filters['disciplines'],
+        'TES_NOME': filters['tests'],
+        'SER_NOME': filters['series'],
+    }
+
+
+def performance_distribution_query(builder: SAEVQueryBuilder, filters: Dict[str, Any]) -> Query:
+    """Distribuição de alunos por faixa de desempenho (dashboard Star Schema)"""
+    where_clause, params = builder.where(star_fact_filters(filters), alias='f')
+    sql = f"""
+    SELECT
+        {_band_case('taxa_acerto')} as faixa_desempenho,
+        COUNT(*) as quantidade_alunos
+    FROM (
+        SELECT
+            f.ALU_ID,
+            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
+        FROM fato_resposta_aluno f
+        {where_clause}
+        GROUP BY f.ALU_ID
+    ) desempenho_alunos
+    GROUP BY faixa_desempenho
+    ORDER BY {_band_order('faixa_desempenho')}
+    """
+    return sql, params
+
+
+def detailed_summary_query(builder: SAEVQueryBuilder, filters: Dict[str, Any]) -> Query:
+    """Métricas resumo da seleção (análise detalhada) direto da fato"""
+    where_clause, params = builder.where(detailed_fact_filters(filters), alias='f')
+    sql = f"""
+    SELECT
+        COUNT(DISTINCT f.ALU_ID) as total_alunos,
+        COUNT(DISTINCT f.ESC_INEP) as total_escolas,
+        COUNT(DISTINCT f.MUN_NOME) as total_municipios,
+        COUNT(DISTINCT f.MUN_UF) as total_estados,
+        COUNT(DISTINCT f.AVA_ANO) as total_anos,
+        COUNT(DISTINCT f.DIS_NOME) as total_disciplinas,
+        COUNT(DISTINCT f.TES_NOME) as total_testes,
+        SUM(f.ACERTO) as total_acertos,
+        SUM(f.ACERTO + f.ERRO) as total_questoes,
+        ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto_geral
+    FROM fato_resposta_aluno f
+    {where_clause}
+    """
+    return sql, params
+
+
+def _detailed_students_cte(builder: SAEVQueryBuilder, filters: Dict[str, Any]) -> Query:
+    """
+    CTE ``alunos`` com o desempenho de cada aluno da seleção (análise detalhada)
+
+    Uma linha por aluno, município, escola e série. As colunas de texto da
+    chave de paginação não são nulas, para que a comparação de tuplas da
+    paginação por chave funcione nos dois motores.
+    """
+    where_clause, params = builder.where(detailed_fact_filters(filters), alias='f')
+    sql = f"""
+    WITH alunos AS (
+        SELECT
+            f.ALU_ID,
+            COALESCE(f.MUN_NOME, '') as MUN_NOME,
+            COALESCE(f.ESC_INEP, '') as ESC_INEP,
+            COALESCE(f.SER_NOME, '') as SER_NOME,
+            SUM(f.ACERTO) as total_acertos,
+            SUM(f.ACERTO + f.ERRO) as total_questoes,
+            ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
+        FROM fato_resposta_aluno f
+        {where_clause}
+        GROUP BY f.ALU_ID, COALESCE(f.MUN_NOME, ''), COALESCE(f.ESC_INEP, ''), COALESCE(f.SER_NOME, '')
+        HAVING SUM(f.ACERTO + f.ERRO) > 0
+    )"""
+    return sql, params
+
+
+def detailed_histogram_query(builder: SAEVQueryBuilder, filters: Dict[str, Any],
+                             bin_width: int = 5) -> Query:
+    """
+    Histograma da taxa de acerto dos alunos em faixas de ``bin_width`` pontos (0 a 100)
+
+    Com ``bin_width`` divisor de 20, cada faixa do histograma cabe em uma única
+    faixa de desempenho, e a distribuição por faixas sai do próprio histograma.
+    """
+    cte, params = _detailed_students_cte(builder, filters)
+    bins = " UNION ALL ".join(
+        f"SELECT {start} as bin_inicio, {min(start + bin_width, 100)} as bin_fim"
+        for start in range(0, 100, bin_width)
+    )
+    sql = f"""{cte}
+    SELECT b.bin_inicio, b.bin_fim, COUNT(a.ALU_ID) as quantidade_alunos
+    FROM ({bins}) b
+    LEFT JOIN alunos a
+        ON a.taxa_acerto >= b.bin_inicio
+        AND (a.taxa_acerto < b.bin_fim OR (b.bin_fim = 100 AND a.taxa_acerto <= 100))
+    GROUP BY b.bin_inicio, b.bin_fim
+    ORDER BY b.bin_inicio
+    """
+    return sql, params
+
+
+def detailed_student_ranking_query(builder: SAEVQueryBuilder, filters: Dict[str, Any],
+                                   limit: int = 10, best: bool = True) -> Query:
+    """Melhores (ou piores) ``limit`` alunos da seleção, com nomes só das linhas retornadas"""
+    cte, params = _detailed_students_cte(builder, filters)
+    order = "DESC" if best else "ASC"
+    sql = f"""{cte}
+    SELECT r.ALU_ID, a.ALU_NOME, r.MUN_NOME, e.ESC_NOME, r.SER_NOME,
+        r.total_acertos, r.total_questoes, r.taxa_acerto
+    FROM (
+        SELECT * FROM alunos
+        ORDER BY taxa_acerto {order}, {', '.join(STUDENT_PAGE_KEY)}
+        LIMIT ?
+    ) r
+    LEFT JOIN dim_aluno a ON r.ALU_ID = a.ALU_ID
+    LEFT JOIN dim_escola e ON r.ESC_INEP = e.ESC_INEP
+    ORDER BY r.taxa_acerto {order}, {', '.join(f"r.{column}" for column in STUDENT_PAGE_KEY)}
+    """
+    return sql, params + [int(limit)]
+
+
+def detailed_school_performance_query(builder: SAEVQueryBuilder, filters: Dict[str, Any]) -> Query:
+    """Taxa média dos alunos, quantidade de alunos e questões por escola da seleção"""
+    cte, params = _detailed_students_cte(builder, filters)
+    sql = f"""{cte}
+    SELECT
+        e.ESC_NOME,
+        ROUND(AVG(a.taxa_acerto), 2) as taxa_media,
+        COUNT(*) as qtd_alunos,
+        SUM(a.total_questoes) as total_questoes
+    FROM alunos a
+    JOIN dim_escola e ON a.ESC_INEP = e.ESC_INEP
+    GROUP BY e.ESC_NOME
+    ORDER BY taxa_media DESC
+    """
+    return sql, params
+
+
+def detailed_students_page_query(builder: SAEVQueryBuilder, filters: Dict[str, Any],
+                                 page_size: int, after: Optional[Sequence] = None) -> Query:
+    """
+    Página da tabela de alunos (taxa de acerto decrescente), paginada por chave
+
+    Args:
+        page_size: Linhas por página (a consulta traz uma a mais, para indicar
+            se há próxima página)
+        after: Valores (taxa_acerto, *STUDENT_PAGE_KEY) da última linha da
+            página anterior; None para a primeira página
+    """
+    cte, params = _detailed_students_cte(builder, filters)
+    key = ', '.join(STUDENT_PAGE_KEY)
+    seek = ""
+    if after is not None:
+        placeholders = ', '.join('?' for _ in STUDENT_PAGE_KEY)
+        seek = f"WHERE taxa_acerto < ? OR (taxa_acerto = ? AND ({key}) > ({placeholders}))"
+        params = params + [after[0]] + list(after)
+    sql = f"""{cte}
+    SELECT p.ALU_ID, a.ALU_NOME, p.MUN_NOME, p.ESC_INEP, e.ESC_NOME, p.SER_NOME,
+        p.total_acertos, p.total_questoes, p.taxa_acerto
+    FROM (
+        SELECT * FROM alunos
+        {seek}
+        ORDER BY taxa_acerto DESC, {key}
+        LIMIT ?
+    ) p
+    LEFT JOIN dim_aluno a ON p.ALU_ID = a.ALU_ID
+    LEFT JOIN dim_escola e ON p.ESC_INEP = e.ESC_INEP
+    ORDER BY p.taxa_acerto DESC, {', '.join(f"p.{column}" for column in STUDENT_PAGE_KEY)}
+    """
+    return sql, params + [int(page_size) + 1]
+
+
+def detailed_competency_query(builder: SAEVQueryBuilder, filters: Dict[str, Any]) -> Query:
+    """Desempenho por descritor da seleção"""
+    where_clause, params = builder.where(detailed_fact_filters(filters), alias='f')
+    sql = f"""
+    SELECT
+        d.MTI_CODIGO,
+        d.MTI_DESCRITOR,
+        COUNT(DISTINCT f.ALU_ID) as alunos_avaliados,
+        SUM(f.ACERTO + f.ERRO) as total_questoes,
+        SUM(f.ACERTO) as total_acertos,
+        ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2) as taxa_acerto
+    FROM fato_resposta_aluno f
+    JOIN dim_descritor d ON f.MTI_CODIGO = d.MTI_CODIGO
+    {where_clause}
+    GROUP BY d.MTI_CODIGO, d.MTI_DESCRITOR
+    ORDER BY taxa_acerto ASC
+    """
+    return sql, params
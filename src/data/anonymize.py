@@ -0,0 +1,108 @@
+"""
+Anonimização vetorizada dos campos sensíveis do SAEV (ambiente de teste)
+
+Cada valor distinto de uma coluna é transformado em hash uma única vez: a
+coluna é fatorada em códigos (como uma coluna categórica), apenas os valores
+ainda não vistos passam pelo MD5 e o resultado é mapeado de volta pelos
+códigos. Um cache limitado mantém os hashes entre lotes e arquivos da mesma
+carga.
+
+O hash é ``md5(sal + valor)`` truncado em 10 caracteres. Com o mesmo sal
+(variável de ambiente ``SAEV_ANON_SALT``) os identificadores anonimizados são
+os mesmos entre execuções, arquivos e motores (a carga nativa no DuckDB usa a
+expressão SQL equivalente de ``sql_expression``). Sem sal, o resultado é o
+mesmo MD5 simples usado anteriormente.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Tamanho do hash anonimizado (caracteres hexadecimais)
+HASH_LENGTH = 10
+
+# Quantidade máxima de valores mantidos no cache de hashes
+DEFAULT_CACHE_SIZE = 1_000_000
+
+
+class SAEVAnonymizer:
+    """Anonimizador com sal e cache de valores distintos"""
+
+    def __init__(self, salt: Optional[str] = None, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        Inicializa o anonimizador
+
+        Args:
+            salt: Sal secreto concatenado antes do valor. Se None, usa a
+                variável de ambiente SAEV_ANON_SALT (vazio se não definida)
+            cache_size: Quantidade máxima de hashes mantidos em memória
+        """
+        self.salt = os.getenv('SAEV_ANON_SALT', '') if salt is None else salt
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+        self._salt_bytes = self.salt.encode()
+
+    def _hash(self, value: str) -> str:
+        """Hash de um único valor"""
+        return hashlib.md5(self._salt_bytes + value.encode()).hexdigest()[:HASH_LENGTH]
+
+    def hash_values(self, values: Iterable[str]) -> np.ndarray:
+        """
+        Retorna os hashes de uma sequência de valores distintos
+
+        Valores já vistos vêm do cache; quando o cache atinge o limite ele é
+        esvaziado antes de receber os novos valores.
+        """
+        values = [str(value) for value in values]
+        missing = [value for value in values if value not in self._cache]
+
+        if missing:
+            if len(self._cache) + len(missing) > self.cache_size:
+                self._cache.clear()
+            self._cache.update((value, self._hash(value)) for value in missing)
+
+        return np.array([self._cache[value] for value in values], dtype=object)
+
+    def anonymize_series(self, series: pd.Series) -> pd.Series:
+        """Anonimiza uma coluna, mantendo valores nulos como nulos"""
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if len(uniques) == 0:
+            return series.astype('string')
+
+        hashes = self.hash_values(uniques)
+        result = np.where(codes >= 0, hashes[np.maximum(codes, 0)], None)
+        return pd.Series(result, index=series.index, dtype='string')
+
+    def anonymize_dataframe(self, df: pd.DataFrame, fields: Iterable[str]) -> pd.DataFrame:
+        """Anonimiza as colunas informadas que existirem no DataFrame"""
+        for field in fields:
+            if field in df.columns:
+                df[field] = self.anonymize_series(df[field])
+
+        return df
+
+    def sql_expression(self, column: str) -> str:
+        """
+        Expressão SQL (DuckDB) equivalente ao hash deste anonimizador
+
+        Args:
+            column: Nome da coluna a anonimizar
+
+        Returns:
+            Expressão que resulta em NULL para valores nulos
+        """
+        salt_literal = self.salt.replace("'", "''")
+        return f"substr(md5('{salt_literal}' || CAST({column} AS VARCHAR)), 1, {HASH_LENGTH})"
+
+
+_default_anonymizer: Optional[SAEVAnonymizer] = None
+
+
+def get_anonymizer() -> SAEVAnonymizer:
+    """Anonimizador compartilhado do processo (o cache vale para toda a carga)"""
+    global _default_anonymizer
+    if _default_anonymizer is None:
+        _default_anonymizer = SAEVAnonymizer()
+    return _default_anonymizer
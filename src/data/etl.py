@@ -3,12 +3,333 @@ Módulo para processos de ETL dos dados do SAEV
 """
 import sqlite3
 import pandas as pd
+import numpy as np
 import logging
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
-import hashlib
-import subprocess
+from typing import Dict, List, Optional, Tuple
 import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from src.config import config
+from .anonymize import get_anonymizer
+from .parquet_export import export_parquet
+from .query_cache import write_generation_stamp
+from .filter_domain import FILTER_DOMAIN_TABLE, build_filter_domain
+from .rollups import ROLLUP_TABLES, build_rollups
+from .student_sets import build_student_sets
+from .sql_script import (SQLITE_BATCH_PRAGMAS, SQLITE_BULK_LOAD_PRAGMAS, run_sql_script,
+                         script_statement, statement_label, tuned_pragmas, vacuum_if_worthwhile)
+
+# Esquema da tabela avaliacao (coluna -> tipo SQL), na ordem do DDL
+AVALIACAO_SCHEMA = {
+    'MUN_UF': 'CHAR(2)',
+    'MUN_NOME': 'VARCHAR(60)',
+    'ESC_INEP': 'CHAR(8)',
+    'ESC_NOME': 'VARCHAR(80)',
+    'SER_NUMBER': 'INTEGER',
+    'SER_NOME': 'VARCHAR(30)',
+    'TUR_PERIODO': 'VARCHAR(15)',
+    'TUR_NOME': 'VARCHAR(20)',
+    'ALU_ID': 'INTEGER',
+    'ALU_NOME': 'VARCHAR(80)',
+    'ALU_CPF': 'VARCHAR(15)',
+    'AVA_NOME': 'VARCHAR(50)',
+    'AVA_ANO': 'INTEGER',
+    'DIS_NOME': 'VARCHAR(30)',
+    'TES_NOME': 'VARCHAR(30)',
+    'TEG_ORDEM': 'INTEGER',
+    'ATR_RESPOSTA': 'CHAR(1)',
+    'ATR_CERTO': 'INTEGER',
+    'MTI_CODIGO': 'VARCHAR(15)',
+    'MTI_DESCRITOR': 'VARCHAR(512)',
+}
+
+# Tipos pandas equivalentes ao DDL (inteiros anuláveis e texto)
+AVALIACAO_DTYPES = {
+    column: 'Int64' if sql_type == 'INTEGER' else 'string'
+    for column, sql_type in AVALIACAO_SCHEMA.items()
+}
+
+# Índices da tabela avaliacao (nome -> coluna), criados após a carga em massa
+AVALIACAO_INDEXES = {
+    'idx_municipio': 'MUN_NOME',
+    'idx_escola': 'ESC_INEP',
+    'idx_avaliacao_ano': 'AVA_ANO',
+    'idx_disciplina': 'DIS_NOME',
+    'idx_serie': 'SER_NUMBER',
+    'idx_serie_nome': 'SER_NOME',
+    'idx_teste_nome': 'TES_NOME',
+}
+
+# Quantidade de linhas lidas (e gravadas) por lote na carga em streaming
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Script de transformação Star Schema (compartilhado por SQLite e DuckDB)
+STAR_SCHEMA_SCRIPT = Path(__file__).parent.parent / "star_schema.sql"
+
+# Campos sensíveis substituídos por hash no ambiente de teste
+SENSITIVE_FIELDS = ['ALU_NOME', 'ALU_CPF', 'MUN_NOME', 'ESC_NOME']
+
+# Colunas que definem uma partição de carga (onda de avaliação por disciplina)
+PARTITION_COLUMNS = ['AVA_ANO', 'AVA_NOME', 'DIS_NOME']
+PARTITION_FILTER = "AVA_ANO IS ? AND AVA_NOME IS ? AND DIS_NOME IS ?"
+
+# Tabela fato física (chaves inteiras) e view com os nomes originais
+FACT_TABLE = 'fato_resposta_compacta'
+FACT_VIEW = 'fato_resposta_aluno'
+
+# Tabelas de versões anteriores que hoje são views criadas pelo script Star Schema
+STAR_SCHEMA_VIEWS = [FACT_VIEW, 'teste']
+
+# Ordem física da fato: prefixo dos filtros dos dashboards
+FACT_CLUSTER_COLUMNS = ['AVA_ANO', 'DIS_NOME', 'TES_NOME', 'SER_NOME']
+
+# Dicionários da tabela fato: coluna de texto -> (tabela, chave inteira).
+# MTI_CODIGO usa a chave MTI_ID de dim_descritor. As chaves são estáveis, mas
+# só seguem a ordem alfabética após uma carga completa (ver star_schema.sql).
+FACT_DICTIONARIES = {
+    'MUN_NOME': ('dim_municipio', 'MUN_ID'),
+    'SER_NOME': ('dim_serie', 'SER_ID'),
+    'TUR_PERIODO': ('dim_periodo', 'PER_ID'),
+    'TUR_NOME': ('dim_turma', 'TUR_ID'),
+    'AVA_NOME': ('dim_avaliacao', 'AVA_ID'),
+    'DIS_NOME': ('dim_disciplina', 'DIS_ID'),
+    'TES_NOME': ('dim_teste', 'TES_ID'),
+}
+
+# Dimensões podadas na carga incremental: tabela -> chave (mesmo nome na fato)
+DIMENSION_KEYS = {
+    'dim_aluno': 'ALU_ID',
+    'dim_escola': 'ESC_INEP',
+    'dim_descritor': 'MTI_ID',
+    **{table: id_column for table, id_column in FACT_DICTIONARIES.values()},
+}
+
+# Chaves das partições removidas, candidatas à poda das dimensões
+REMOVED_KEYS_TABLE = 'etl_chaves_removidas'
+
+# Linha do INSERT da fato em src/star_schema.sql trocada pelo filtro da partição
+FACT_PARTITION_MARKER = '-- WHERE <partição>'
+
+
+@lru_cache(maxsize=None)
+def partition_fact_insert_sql() -> str:
+    """
+    INSERT da fato de src/star_schema.sql restrito a uma partição
+
+    A carga completa e a incremental usam a mesma instrução do script; aqui a
+    linha ``FACT_PARTITION_MARKER`` vira ``WHERE {PARTITION_FILTER}``.
+    """
+    statement = script_statement(STAR_SCHEMA_SCRIPT, f"INSERT INTO {FACT_TABLE}")
+    lines = statement.splitlines()
+    marked = [i for i, line in enumerate(lines) if line.strip().startswith(FACT_PARTITION_MARKER)]
+    if len(marked) != 1:
+        raise ValueError(f"INSERT da fato em {STAR_SCHEMA_SCRIPT} sem a linha '{FACT_PARTITION_MARKER}'")
+    indent = lines[marked[0]][:len(lines[marked[0]]) - len(lines[marked[0]].lstrip())]
+    lines[marked[0]] = f"{indent}WHERE {PARTITION_FILTER}"
+    return "\n".join(lines)
+
+
+def _fact_partition_filter(key: tuple) -> Tuple[str, list]:
+    """Filtro de uma partição (AVA_ANO, AVA_NOME, DIS_NOME) na fato compacta"""
+    conditions = ["AVA_ANO IS ?"]
+    params = [key[0]]
+    for column, value in (('AVA_NOME', key[1]), ('DIS_NOME', key[2])):
+        table, id_column = FACT_DICTIONARIES[column]
+        if value is None:
+            conditions.append(f"{id_column} IS NULL")
+        else:
+            conditions.append(f"{id_column} IN (SELECT {id_column} FROM {table} WHERE {column} = ?)")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+
+def _drop_legacy_tables(conn):
+    """
+    Remove fato_resposta_aluno e teste se forem tabelas
+
+    O script Star Schema cria os dois como views (sobre a fato compacta e
+    sobre avaliacao) e só consegue recriá-los se não existir uma tabela com o
+    mesmo nome (layout antigo no SQLite ou fato materializada no DuckDB).
+    """
+    for name in STAR_SCHEMA_VIEWS:
+        if isinstance(conn, sqlite3.Connection):
+            sql = f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = '{name}'"
+        else:
+            sql = (f"SELECT COUNT(*) FROM information_schema.tables "
+                   f"WHERE table_name = '{name}' AND table_type = 'BASE TABLE'")
+        if conn.execute(sql).fetchone()[0]:
+            conn.execute(f"DROP TABLE {name}")
+
+
+def _materialize_fact_view(duck_conn):
+    """
+    Materializa a view fato_resposta_aluno como tabela (DuckDB)
+
+    O DuckDB já comprime colunas de texto por dicionário no armazenamento
+    colunar; manter as junções da view em cada consulta custaria mais do que
+    economiza. A fato compacta é descartada e os dicionários são mantidos.
+    
+    As linhas são ordenadas pelos filtros dos dashboards, para que os zone
+    maps (mín./máx. por row group) descartem a maior parte da tabela.
+    """
+    order_by = ", ".join(FACT_CLUSTER_COLUMNS)
+    duck_conn.execute(
+        f"CREATE TABLE fato_resposta_materializada AS SELECT * FROM {FACT_VIEW} ORDER BY {order_by}"
+    )
+    duck_conn.execute(f"DROP VIEW {FACT_VIEW}")
+    duck_conn.execute(f"DROP TABLE {FACT_TABLE}")
+    duck_conn.execute(f"ALTER TABLE fato_resposta_materializada RENAME TO {FACT_VIEW}")
+    duck_conn.execute(
+        f"CREATE INDEX idx_fato_resposta_aluno ON {FACT_VIEW} ({order_by}, MUN_NOME, ESC_INEP)"
+    )
+
+
+def _read_csv_chunks(csv_file: Path, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE):
+    """Lê um CSV em lotes com os tipos explícitos da tabela avaliacao"""
+    if not chunk_size:
+        return [pd.read_csv(csv_file, encoding='utf-8', dtype=AVALIACAO_DTYPES)]
+    
+    return pd.read_csv(csv_file, encoding='utf-8', dtype=AVALIACAO_DTYPES, chunksize=chunk_size)
+
+
+def _anonymize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Anonimiza dados sensíveis para ambiente de teste"""
+    return get_anonymizer().anonymize_dataframe(df, SENSITIVE_FIELDS)
+
+
+def _prepare_chunk(df: pd.DataFrame, test_mode: bool = False,
+                   allowed_cities: Optional[List[str]] = None) -> pd.DataFrame:
+    """Aplica filtro de municípios e anonimização a um lote"""
+    if test_mode and allowed_cities:
+        df = df[df['MUN_NOME'].isin(allowed_cities)]
+        df = _anonymize_dataframe(df.copy())
+    
+    return df
+
+
+def _partition_key(values) -> tuple:
+    """Normaliza uma chave de partição (NA → None, tipos nativos do Python)"""
+    ano, nome, disciplina = values
+    return (
+        None if pd.isna(ano) else int(ano),
+        None if pd.isna(nome) else str(nome),
+        None if pd.isna(disciplina) else str(disciplina)
+    )
+
+
+def _fingerprint_chunk(df: pd.DataFrame) -> Dict[tuple, Tuple[int, int]]:
+    """
+    Calcula a impressão digital de cada partição presente em um lote
+    
+    A impressão é a soma (módulo 2^64) dos hashes das linhas mais a contagem,
+    portanto não depende da ordem das linhas nem da divisão em lotes.
+    """
+    if df.empty:
+        return {}
+    
+    columns = [column for column in AVALIACAO_SCHEMA if column in df.columns]
+    frame = df[PARTITION_COLUMNS].copy()
+    frame['_hash'] = pd.util.hash_pandas_object(df[columns], index=False).values
+    
+    fingerprints = {}
+    for key, group in frame.groupby(PARTITION_COLUMNS, dropna=False, sort=False):
+        total = int(group['_hash'].to_numpy(np.uint64).sum(dtype=np.uint64))
+        fingerprints[_partition_key(key)] = (total, len(group))
+    
+    return fingerprints
+
+
+def _merge_fingerprints(target: dict, source: dict) -> dict:
+    """Acumula impressões digitais de partições (soma dos hashes e contagens)"""
+    for key, (row_hash, count) in source.items():
+        old_hash, old_count = target.get(key, (0, 0))
+        target[key] = ((old_hash + row_hash) % 2**64, old_count + count)
+    return target
+
+
+def _format_fingerprint(row_hash: int, count: int) -> str:
+    """Representação textual da impressão digital gravada em etl_particoes"""
+    return f"{row_hash:016x}:{count}"
+
+
+def _select_partitions(df: pd.DataFrame, keys: set) -> pd.DataFrame:
+    """Mantém apenas as linhas das partições informadas, preservando a ordem"""
+    if df.empty:
+        return df
+    
+    mask = np.zeros(len(df), dtype=bool)
+    for key, positions in df.groupby(PARTITION_COLUMNS, dropna=False, sort=False).indices.items():
+        if _partition_key(key) in keys:
+            mask[positions] = True
+    
+    return df[mask]
+
+
+def _insert_rows(conn: sqlite3.Connection, df: pd.DataFrame, table: str = 'avaliacao'):
+    """Insere um lote em uma tabela SQLite usando executemany"""
+    if df.empty:
+        return
+    
+    columns = list(df.columns)
+    placeholders = ", ".join("?" for _ in columns)
+    insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    
+    # Converter NA/NaN para None, que o sqlite3 grava como NULL
+    rows = df.astype(object).where(df.notna(), None)
+    conn.executemany(insert_sql, rows.itertuples(index=False, name=None))
+
+
+def _stage_csv_file(csv_file: Path, stage_path: str,
+                    chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+                    test_mode: bool = False,
+                    allowed_cities: Optional[List[str]] = None) -> dict:
+    """
+    Lê, tipa, filtra e anonimiza um CSV em lotes, gravando-os em um banco
+    SQLite temporário (executado nos processos do pool)
+    
+    Cada processo mantém em memória apenas o lote corrente; as linhas
+    preparadas ficam em disco até serem copiadas para o banco principal.
+    
+    Returns:
+        Dicionário com a quantidade de linhas lidas e gravadas, as impressões
+        digitais das partições e o tempo de processamento em segundos
+    """
+    start_time = time.time()
+    rows_read = 0
+    rows_staged = 0
+    fingerprints = {}
+    
+    stage = sqlite3.connect(stage_path)
+    try:
+        stage.execute("PRAGMA journal_mode = OFF")
+        stage.execute("PRAGMA synchronous = OFF")
+        columns = ", ".join(f"{column} {sql_type}" for column, sql_type in AVALIACAO_SCHEMA.items())
+        stage.execute(f"CREATE TABLE avaliacao ({columns})")
+        
+        for chunk in _read_csv_chunks(csv_file, chunk_size):
+            rows_read += len(chunk)
+            chunk = _prepare_chunk(chunk, test_mode, allowed_cities)
+            if not chunk.empty:
+                _insert_rows(stage, chunk)
+                rows_staged += len(chunk)
+                _merge_fingerprints(fingerprints, _fingerprint_chunk(chunk))
+        stage.commit()
+    finally:
+        stage.close()
+    
+    return {
+        'rows_read': rows_read,
+        'rows_staged': rows_staged,
+        'fingerprints': fingerprints,
+        'parse_seconds': time.time() - start_time
+    }
+
 
 class SAEVDataProcessor:
     """Classe para processamento de dados do SAEV"""
@@ -31,8 +352,13 @@ class SAEVDataProcessor:
         
         return logger
     
-    def create_database_structure(self, overwrite: bool = False):
-        """Cria a estrutura do banco de dados"""
+    def create_database_structure(self, overwrite: bool = False, create_indexes: bool = True):
+        """
+        Cria a estrutura do banco de dados
+        
+        Com ``create_indexes=False`` a tabela avaliacao é criada sem índices;
+        ``load_csv_data`` os constrói depois da carga em massa.
+        """
         # Verificar se deve sobrescrever o banco existente
         if overwrite and Path(self.db_path).exists():
             self.logger.info(f"🗑️  Removendo banco existente: {self.db_path}")
@@ -48,123 +374,560 @@ class SAEVDataProcessor:
         cursor = conn.cursor()
         
         # DDL da tabela avaliacao
-        cursor.execute('''
+        columns_ddl = ",\n".join(
+            f"                {column:<14} {sql_type}" for column, sql_type in AVALIACAO_SCHEMA.items()
+        )
+        cursor.execute(f'''
             CREATE TABLE IF NOT EXISTS avaliacao (
-                MUN_UF         CHAR(2),
-                MUN_NOME       VARCHAR(60),
-                ESC_INEP       CHAR(8),
-                ESC_NOME       VARCHAR(80),
-                SER_NUMBER     INTEGER,
-                SER_NOME       VARCHAR(30),
-                TUR_PERIODO    VARCHAR(15),
-                TUR_NOME       VARCHAR(20),
-                ALU_ID         INTEGER,
-                ALU_NOME       VARCHAR(80),
-                ALU_CPF        VARCHAR(15),
-                AVA_NOME       VARCHAR(50),
-                AVA_ANO        INTEGER,
-                DIS_NOME       VARCHAR(30),
-                TES_NOME       VARCHAR(30),
-                TEG_ORDEM      INTEGER,
-                ATR_RESPOSTA   CHAR(1),
-                ATR_CERTO      INTEGER,
-                MTI_CODIGO     VARCHAR(15),
-                MTI_DESCRITOR  VARCHAR(512)
+{columns_ddl}
             )
         ''')
         
         # Criar índices para melhor performance
-        self.logger.info("📊 Criando índices para otimização...")
-        indexes = [
-            'CREATE INDEX IF NOT EXISTS idx_municipio ON avaliacao(MUN_NOME)',
-            'CREATE INDEX IF NOT EXISTS idx_escola ON avaliacao(ESC_INEP)',
-            'CREATE INDEX IF NOT EXISTS idx_avaliacao_ano ON avaliacao(AVA_ANO)',
-            'CREATE INDEX IF NOT EXISTS idx_disciplina ON avaliacao(DIS_NOME)',
-            'CREATE INDEX IF NOT EXISTS idx_serie ON avaliacao(SER_NUMBER)',
-            'CREATE INDEX IF NOT EXISTS idx_serie_nome ON avaliacao(SER_NOME)',
-            'CREATE INDEX IF NOT EXISTS idx_teste_nome ON avaliacao(TES_NOME)'
-        ]
-        
-        for index in indexes:
-            cursor.execute(index)
+        if create_indexes:
+            self._create_avaliacao_indexes(conn)
+        
+        self._ensure_partition_manifest(conn)
         
         conn.commit()
         conn.close()
         self.logger.info("✅ Estrutura do banco criada com sucesso")
     
+    def _create_avaliacao_indexes(self, conn: sqlite3.Connection) -> float:
+        """Cria os índices da tabela avaliacao (os já existentes são mantidos)"""
+        self.logger.info("📊 Criando índices para otimização...")
+        start_time = time.time()
+        for index, column in AVALIACAO_INDEXES.items():
+            index_start = time.time()
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON avaliacao({column})')
+            self.logger.info(f"   • {index}: {time.time() - index_start:.2f}s")
+        return time.time() - start_time
+    
+    def _drop_avaliacao_indexes(self, conn: sqlite3.Connection):
+        """Remove os índices da tabela avaliacao antes de uma carga em massa"""
+        for index in AVALIACAO_INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {index}')
+    
+    def _ensure_partition_manifest(self, conn: sqlite3.Connection):
+        """Cria a tabela de controle das partições carregadas (carga incremental)"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS etl_particoes (
+                AVA_ANO        INTEGER,
+                AVA_NOME       VARCHAR(50),
+                DIS_NOME       VARCHAR(30),
+                FINGERPRINT    VARCHAR(40),
+                QTD_REGISTROS  INTEGER,
+                CARREGADO_EM   VARCHAR(19),
+                PRIMARY KEY (AVA_ANO, AVA_NOME, DIS_NOME)
+            )
+        ''')
+    
+    def _write_partition_manifest(self, conn: sqlite3.Connection, fingerprints: dict):
+        """Registra (ou substitui) as impressões digitais das partições carregadas"""
+        loaded_at = datetime.now().isoformat(timespec='seconds')
+        conn.executemany(
+            f"DELETE FROM etl_particoes WHERE {PARTITION_FILTER}",
+            list(fingerprints.keys())
+        )
+        conn.executemany(
+            "INSERT INTO etl_particoes VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (*key, _format_fingerprint(row_hash, count), count, loaded_at)
+                for key, (row_hash, count) in fingerprints.items()
+            ]
+        )
+    
     def load_csv_data(self, csv_path: str = None, csv_folder: str = None, 
-                     test_mode: bool = False, allowed_cities: Optional[List[str]] = None):
-        """Carrega dados do CSV ou de múltiplos CSVs de uma pasta para o banco"""
+                     test_mode: bool = False, allowed_cities: Optional[List[str]] = None,
+                     chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE, workers: int = 1):
+        """
+        Carrega dados do CSV ou de múltiplos CSVs de uma pasta para o banco
+        
+        Cada arquivo é lido em lotes de ``chunk_size`` linhas, com os tipos do DDL
+        da tabela avaliacao. Assim o consumo de memória fica limitado a um lote,
+        independente do número de arquivos ou de registros. Use
+        ``chunk_size=None`` para ler cada arquivo inteiro de uma vez.
+        
+        A carga usa o perfil ``SQLITE_BULK_LOAD_PRAGMAS`` (WAL, sem fsync, cache
+        grande): os índices de avaliacao são removidos, todos os lotes são
+        gravados em uma única transação e os índices são reconstruídos ao
+        final, de uma vez. Os PRAGMAs anteriores são restaurados em seguida.
+        
+        Com ``workers > 1`` e vários arquivos, o parsing é feito em paralelo por
+        um pool de processos (um arquivo por processo, com os lotes preparados
+        gravados em bancos temporários) e as inserções continuam serializadas
+        neste processo, na ordem alfabética dos arquivos.
+        """
         try:
-            dataframes = []
-            
-            if csv_folder:
-                # Processar todos os arquivos CSV da pasta
-                csv_folder_path = Path(csv_folder)
-                if not csv_folder_path.exists():
-                    raise FileNotFoundError(f"Pasta não encontrada: {csv_folder}")
-                
-                csv_files = list(csv_folder_path.glob("*.csv"))
-                if not csv_files:
-                    raise FileNotFoundError(f"Nenhum arquivo CSV encontrado em: {csv_folder}")
-                
-                self.logger.info(f"📁 Processando pasta: {csv_folder}")
-                self.logger.info(f"� Arquivos encontrados: {len(csv_files)}")
-                
-                for csv_file in sorted(csv_files):
-                    self.logger.info(f"�📥 Carregando: {csv_file.name}")
-                    df = pd.read_csv(csv_file, encoding='utf-8')
-                    self.logger.info(f"   📊 {len(df):,} registros em {csv_file.name}")
-                    dataframes.append(df)
-                
-                # Combinar todos os DataFrames
-                df_combined = pd.concat(dataframes, ignore_index=True)
-                self.logger.info(f"📄 Total combinado: {len(df_combined):,} registros")
-                
-            else:
-                # Processar arquivo único (modo legado)
-                if not csv_path:
-                    raise ValueError("É necessário especificar csv_path ou csv_folder")
-                
-                self.logger.info(f"📥 Carregando dados do CSV: {csv_path}")
-                df_combined = pd.read_csv(csv_path, encoding='utf-8')
-                self.logger.info(f"📄 Total de registros no CSV: {len(df_combined)}")
-            
-            if test_mode and allowed_cities:
-                original_count = len(df_combined)
-                df_combined = df_combined[df_combined['MUN_NOME'].isin(allowed_cities)]
-                self.logger.info(f"🏷️  Filtrando municípios: {len(df_combined):,}/{original_count:,} registros mantidos")
-                df_combined = self._anonymize_data(df_combined)
-                self.logger.info("🔒 Dados anonimizados para ambiente de teste")
+            csv_files = self._resolve_csv_files(csv_path, csv_folder)
             
             # Conectar ao banco e inserir dados
             conn = sqlite3.connect(self.db_path)
             
-            # Limpar dados existentes se necessário
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM avaliacao")
-            conn.commit()
+            try:
+                with tuned_pragmas(conn, SQLITE_BULK_LOAD_PRAGMAS):
+                    start_time = time.time()
+                    
+                    # Limpar dados existentes e carregar sem índices, em uma única transação
+                    self._drop_avaliacao_indexes(conn)
+                    conn.execute("DELETE FROM avaliacao")
+                    self._ensure_partition_manifest(conn)
+                    conn.execute("DELETE FROM etl_particoes")
+                    
+                    fingerprints = {}
+                    if workers > 1 and len(csv_files) > 1:
+                        total_records = self._load_csv_files_parallel(
+                            conn, csv_files, workers, chunk_size, test_mode, allowed_cities,
+                            fingerprints
+                        )
+                    else:
+                        total_records = 0
+                        for csv_file in csv_files:
+                            total_records += self._load_csv_file(
+                                conn, csv_file, chunk_size, test_mode, allowed_cities,
+                                fingerprints
+                            )
+                    
+                    # Registrar partições para futuras cargas incrementais
+                    self._write_partition_manifest(conn, fingerprints)
+                    conn.commit()
+                    load_seconds = time.time() - start_time
+                    
+                    # Índices construídos uma única vez, após a carga
+                    index_seconds = self._create_avaliacao_indexes(conn)
+                    conn.commit()
+            finally:
+                conn.close()
             
-            df_combined.to_sql('avaliacao', conn, if_exists='append', index=False)
-            conn.close()
+            if test_mode and allowed_cities:
+                self.logger.info("🔒 Dados anonimizados para ambiente de teste")
             
-            self.logger.info(f"✅ Dados carregados com sucesso: {len(df_combined):,} registros")
+            total_seconds = load_seconds + index_seconds
+            rate = total_records / total_seconds if total_seconds > 0 else 0
+            self.logger.info(f"✅ Dados carregados com sucesso: {total_records:,} registros")
+            self.logger.info(
+                f"⏱️  Carga: {load_seconds:.2f}s | índices: {index_seconds:.2f}s | "
+                f"total: {total_seconds:.2f}s ({rate:,.0f} linhas/s)"
+            )
             
         except Exception as e:
             self.logger.error(f"❌ Erro ao carregar dados: {e}")
             raise
     
-    def _anonymize_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Anonimiza dados sensíveis para ambiente de teste"""
-        sensitive_fields = ['ALU_NOME', 'ALU_CPF', 'MUN_NOME', 'ESC_NOME']
+    def _resolve_csv_files(self, csv_path: str = None, csv_folder: str = None) -> List[Path]:
+        """Retorna a lista ordenada de arquivos CSV a carregar"""
+        if csv_folder:
+            # Processar todos os arquivos CSV da pasta
+            csv_folder_path = Path(csv_folder)
+            if not csv_folder_path.exists():
+                raise FileNotFoundError(f"Pasta não encontrada: {csv_folder}")
+            
+            csv_files = sorted(csv_folder_path.glob("*.csv"))
+            if not csv_files:
+                raise FileNotFoundError(f"Nenhum arquivo CSV encontrado em: {csv_folder}")
+            
+            self.logger.info(f"📁 Processando pasta: {csv_folder}")
+            self.logger.info(f"📄 Arquivos encontrados: {len(csv_files)}")
+            return csv_files
+        
+        # Processar arquivo único (modo legado)
+        if not csv_path:
+            raise ValueError("É necessário especificar csv_path ou csv_folder")
+        
+        return [Path(csv_path)]
+    
+    def _insert_chunk(self, conn: sqlite3.Connection, df: pd.DataFrame):
+        """Insere um lote na tabela avaliacao usando executemany"""
+        _insert_rows(conn, df)
+    
+    def _copy_staged_rows(self, conn: sqlite3.Connection, stage_path: str,
+                          chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE) -> int:
+        """Copia para avaliacao as linhas de um banco temporário, em lotes e na ordem de gravação"""
+        columns = ", ".join(AVALIACAO_SCHEMA)
+        placeholders = ", ".join("?" for _ in AVALIACAO_SCHEMA)
+        insert_sql = f"INSERT INTO avaliacao ({columns}) VALUES ({placeholders})"
+        batch_size = chunk_size or DEFAULT_CHUNK_SIZE
+        rows_copied = 0
+        
+        stage = sqlite3.connect(stage_path)
+        try:
+            cursor = stage.execute(f"SELECT {columns} FROM avaliacao ORDER BY rowid")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                conn.executemany(insert_sql, rows)
+                rows_copied += len(rows)
+        finally:
+            stage.close()
+        
+        return rows_copied
+    
+    def _load_csv_file(self, conn: sqlite3.Connection, csv_file: Path,
+                       chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+                       test_mode: bool = False,
+                       allowed_cities: Optional[List[str]] = None,
+                       fingerprints: Optional[dict] = None) -> int:
+        """Carrega um arquivo CSV em lotes (o commit fica a cargo de quem chama)"""
+        self.logger.info(f"📥 Carregando: {csv_file.name}")
+        start_time = time.time()
+        rows_read = 0
+        rows_loaded = 0
         
-        for field in sensitive_fields:
-            if field in df.columns:
-                df[field] = df[field].apply(
-                    lambda x: hashlib.md5(str(x).encode()).hexdigest()[:10]
+        for chunk in _read_csv_chunks(csv_file, chunk_size):
+            rows_read += len(chunk)
+            chunk = _prepare_chunk(chunk, test_mode, allowed_cities)
+            if fingerprints is not None:
+                _merge_fingerprints(fingerprints, _fingerprint_chunk(chunk))
+            
+            self._insert_chunk(conn, chunk)
+            rows_loaded += len(chunk)
+        
+        elapsed = time.time() - start_time
+        rate = rows_read / elapsed if elapsed > 0 else 0
+        self.logger.info(
+            f"   📊 {rows_loaded:,}/{rows_read:,} registros em {csv_file.name} "
+            f"({elapsed:.2f}s, {rate:,.0f} linhas/s)"
+        )
+        
+        return rows_loaded
+    
+    def _load_csv_files_parallel(self, conn: sqlite3.Connection, csv_files: List[Path],
+                                 workers: int, chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+                                 test_mode: bool = False,
+                                 allowed_cities: Optional[List[str]] = None,
+                                 fingerprints: Optional[dict] = None) -> int:
+        """
+        Faz o parsing dos arquivos em um pool de processos e grava no banco
+        
+        No máximo ``workers`` arquivos ficam em processamento ao mesmo tempo.
+        Cada processo grava os lotes preparados em um banco SQLite temporário
+        (ao lado do banco principal), de forma que a memória fica limitada a
+        ``chunk_size × workers`` linhas. As linhas são copiadas para avaliacao
+        na ordem dos arquivos (e dos lotes dentro de cada arquivo), de forma
+        que a ordem das linhas é determinística.
+        """
+        self.logger.info(f"⚙️  Parsing paralelo com {workers} processos")
+        total_records = 0
+        timings = []
+        files = iter(enumerate(csv_files))
+        
+        with tempfile.TemporaryDirectory(prefix='saev_stage_', dir=Path(self.db_path).parent) as stage_dir, \
+                ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            
+            def submit_next():
+                index, csv_file = next(files, (None, None))
+                if csv_file is not None:
+                    stage_path = str(Path(stage_dir) / f"{index:05d}.db")
+                    future = executor.submit(
+                        _stage_csv_file, csv_file, stage_path, chunk_size, test_mode, allowed_cities
+                    )
+                    pending.append((csv_file, stage_path, future))
+            
+            for _ in range(workers):
+                submit_next()
+            
+            while pending:
+                csv_file, stage_path, future = pending.popleft()
+                parsed = future.result()
+                submit_next()
+                if fingerprints is not None:
+                    _merge_fingerprints(fingerprints, parsed['fingerprints'])
+                
+                write_start = time.time()
+                rows_loaded = self._copy_staged_rows(conn, stage_path, chunk_size)
+                os.remove(stage_path)
+                write_seconds = time.time() - write_start
+                
+                self.logger.info(
+                    f"📥 {csv_file.name}: {rows_loaded:,}/{parsed['rows_read']:,} registros "
+                    f"(parsing {parsed['parse_seconds']:.2f}s, gravação {write_seconds:.2f}s)"
                 )
+                timings.append((csv_file.name, parsed['rows_read'], parsed['parse_seconds'], write_seconds))
+                total_records += rows_loaded
         
-        return df
+        self.logger.info("⏱️  Resumo por arquivo:")
+        for name, rows_read, parse_seconds, write_seconds in timings:
+            elapsed = parse_seconds + write_seconds
+            rate = rows_read / elapsed if elapsed > 0 else 0
+            self.logger.info(
+                f"   • {name}: {rows_read:,} linhas | parsing {parse_seconds:.2f}s | "
+                f"gravação {write_seconds:.2f}s | {rate:,.0f} linhas/s"
+            )
+        
+        return total_records
+    
+    def load_csv_incremental(self, csv_path: str = None, csv_folder: str = None,
+                             test_mode: bool = False, allowed_cities: Optional[List[str]] = None,
+                             chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE,
+                             refresh_star_schema: bool = True) -> List[tuple]:
+        """
+        Carga incremental: substitui apenas as partições novas ou alteradas
+        
+        Uma partição é o conjunto de linhas com o mesmo (AVA_ANO, AVA_NOME,
+        DIS_NOME). Numa primeira leitura dos CSVs é calculada a impressão digital
+        de cada partição, que é comparada com a registrada em etl_particoes.
+        Somente as partições diferentes são apagadas e recarregadas em avaliacao
+        (e, se o Star Schema já existir, na fato compacta, com
+        upsert nas dimensões, poda das chaves que nenhuma linha da fato
+        referencia mais e recálculo das agregações agg_* dos pares
+        (AVA_ANO, DIS_NOME) afetados), tudo em uma única transação. Partições
+        ausentes dos CSVs são mantidas.
+        
+        Returns:
+            Lista das chaves (AVA_ANO, AVA_NOME, DIS_NOME) recarregadas
+        """
+        try:
+            csv_files = self._resolve_csv_files(csv_path, csv_folder)
+            
+            # 1. Impressões digitais das partições recebidas
+            self.logger.info("🔎 Calculando impressões digitais das partições...")
+            incoming = {}
+            file_partitions = {}
+            for csv_file in csv_files:
+                file_fingerprints = {}
+                for chunk in _read_csv_chunks(csv_file, chunk_size):
+                    chunk = _prepare_chunk(chunk, test_mode, allowed_cities)
+                    _merge_fingerprints(file_fingerprints, _fingerprint_chunk(chunk))
+                file_partitions[csv_file] = set(file_fingerprints)
+                _merge_fingerprints(incoming, file_fingerprints)
+            
+            conn = sqlite3.connect(self.db_path)
+            try:
+                self._ensure_partition_manifest(conn)
+                stored = {
+                    (ano, nome, disciplina): fingerprint
+                    for ano, nome, disciplina, fingerprint in conn.execute(
+                        "SELECT AVA_ANO, AVA_NOME, DIS_NOME, FINGERPRINT FROM etl_particoes"
+                    )
+                }
+                
+                changed = [
+                    key for key, (row_hash, count) in incoming.items()
+                    if stored.get(key) != _format_fingerprint(row_hash, count)
+                ]
+                new_count = sum(1 for key in changed if key not in stored)
+                self.logger.info(
+                    f"📦 Partições recebidas: {len(incoming)} | inalteradas: {len(incoming) - len(changed)} | "
+                    f"novas: {new_count} | alteradas: {len(changed) - new_count}"
+                )
+                
+                if not changed:
+                    self.logger.info("✅ Nenhuma partição nova ou alterada - nada a carregar")
+                    return []
+                
+                for key in changed:
+                    self.logger.info(f"   • {key[0]} / {key[1]} / {key[2]}")
+                
+                start_time = time.time()
+                refresh_star = refresh_star_schema and self._star_schema_exists(conn)
+                changed_keys = set(changed)
+                
+                # 2. Remover as partições alteradas
+                for key in changed:
+                    if refresh_star:
+                        self._remove_star_schema_partition(conn, key)
+                    conn.execute(f"DELETE FROM avaliacao WHERE {PARTITION_FILTER}", key)
+                
+                # 3. Recarregar apenas os arquivos que contêm partições alteradas
+                total_records = 0
+                for csv_file in csv_files:
+                    if not file_partitions[csv_file] & changed_keys:
+                        self.logger.info(f"⏭️  {csv_file.name}: sem partições alteradas")
+                        continue
+                    
+                    self.logger.info(f"📥 Carregando: {csv_file.name}")
+                    for chunk in _read_csv_chunks(csv_file, chunk_size):
+                        chunk = _prepare_chunk(chunk, test_mode, allowed_cities)
+                        chunk = _select_partitions(chunk, changed_keys)
+                        self._insert_chunk(conn, chunk)
+                        total_records += len(chunk)
+                
+                # 4. Atualizar Star Schema das partições alteradas
+                if refresh_star:
+                    self.logger.info("⭐ Atualizando Star Schema das partições alteradas...")
+                    for key in changed:
+                        self._insert_star_schema_partition(conn, key)
+                    pruned = self._prune_star_schema_dimensions(conn, changed)
+                    if pruned:
+                        self.logger.info(f"🧹 {pruned:,} linhas de dimensão sem referência removidas")
+                    
+                    # Agregações recalculadas por (AVA_ANO, DIS_NOME) alterado
+                    rollup_tables = [
+                        row[0] for row in conn.execute(
+                            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'agg_%'"
+                        )
+                    ]
+                    rollup_partitions = {(key[0], key[2]) for key in changed}
+                    if all(table in rollup_tables for table in ROLLUP_TABLES):
+                        build_rollups(conn, rollup_partitions)
+                    else:
+                        build_rollups(conn)
+                    if 'agg_alunos_celula' in rollup_tables:
+                        build_student_sets(conn, rollup_partitions)
+                    else:
+                        build_student_sets(conn)
+                    if FILTER_DOMAIN_TABLE in rollup_tables:
+                        build_filter_domain(conn, rollup_partitions)
+                    else:
+                        build_filter_domain(conn)
+                
+                self._write_partition_manifest(conn, {key: incoming[key] for key in changed})
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            
+            elapsed = time.time() - start_time
+            self.logger.info(
+                f"✅ Carga incremental concluída: {total_records:,} registros em "
+                f"{len(changed)} partições ({elapsed:.2f}s)"
+            )
+            return changed
+            
+        except Exception as e:
+            self.logger.error(f"❌ Erro na carga incremental: {e}")
+            raise
+    
+    def _star_schema_exists(self, conn: Optional[sqlite3.Connection] = None) -> bool:
+        """Verifica se as tabelas do Star Schema já existem no banco SQLite"""
+        owns_connection = conn is None
+        if owns_connection:
+            if not Path(self.db_path).exists():
+                return False
+            conn = sqlite3.connect(self.db_path)
+        
+        required_tables = ['dim_aluno', 'dim_escola', 'dim_descritor', FACT_TABLE]
+        required_tables += [table for table, _ in FACT_DICTIONARIES.values()]
+        placeholders = ", ".join("?" for _ in required_tables)
+        found = conn.execute(
+            f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+            required_tables
+        ).fetchone()[0]
+        # teste como tabela é o layout anterior: exige a transformação completa
+        found += conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'view' AND name = 'teste'"
+        ).fetchone()[0]
+        
+        if owns_connection:
+            conn.close()
+        return found == len(required_tables) + 1
+    
+    def _remove_star_schema_partition(self, conn: sqlite3.Connection, key: tuple):
+        """Remove uma partição do Star Schema (antes de apagá-la de avaliacao)"""
+        # Descontar as questões da partição na estatística dos descritores
+        descriptor_counts = conn.execute(
+            f"SELECT MTI_CODIGO, COUNT(*) FROM avaliacao WHERE {PARTITION_FILTER} GROUP BY MTI_CODIGO",
+            key
+        ).fetchall()
+        conn.executemany(
+            "UPDATE dim_descritor SET QTD = QTD - ? WHERE MTI_CODIGO IS ?",
+            [(count, code) for code, count in descriptor_counts]
+        )
+        
+        fact_filter, fact_params = _fact_partition_filter(key)
+        
+        # Chaves da partição: candidatas à poda se não voltarem na recarga
+        conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {REMOVED_KEYS_TABLE} (TABELA TEXT, CHAVE)")
+        for table, key_column in DIMENSION_KEYS.items():
+            conn.execute(f"""
+                INSERT INTO temp.{REMOVED_KEYS_TABLE} (TABELA, CHAVE)
+                SELECT DISTINCT ?, {key_column} FROM {FACT_TABLE}
+                WHERE {fact_filter} AND {key_column} IS NOT NULL
+            """, [table] + fact_params)
+        
+        conn.execute(f"DELETE FROM {FACT_TABLE} WHERE {fact_filter}", fact_params)
+    
+    def _insert_star_schema_partition(self, conn: sqlite3.Connection, key: tuple):
+        """
+        Insere uma partição recarregada no Star Schema (upsert nas dimensões)
+        
+        Valores novos dos dicionários e descritores recebem chaves após a maior
+        existente. As chaves já gravadas não mudam, mas deixam de seguir a
+        ordem alfabética da carga completa; nenhuma consulta depende dela.
+        """
+        conn.execute(f"""
+            INSERT OR REPLACE INTO dim_aluno (ALU_ID, ALU_NOME, ALU_CPF)
+            SELECT DISTINCT ALU_ID, ALU_NOME, ALU_CPF FROM avaliacao WHERE {PARTITION_FILTER}
+        """, key)
+        conn.execute(f"""
+            INSERT OR REPLACE INTO dim_escola (ESC_INEP, ESC_NOME)
+            SELECT DISTINCT ESC_INEP, ESC_NOME FROM avaliacao WHERE {PARTITION_FILTER}
+        """, key)
+        conn.execute(f"""
+            INSERT INTO dim_descritor (MTI_CODIGO, MTI_DESCRITOR, QTD, MTI_ID)
+            SELECT MTI_CODIGO, MAX(MTI_DESCRITOR), COUNT(*),
+                (SELECT COALESCE(MAX(MTI_ID), 0) FROM dim_descritor) + ROW_NUMBER() OVER (ORDER BY MTI_CODIGO)
+            FROM avaliacao WHERE {PARTITION_FILTER}
+            GROUP BY MTI_CODIGO
+            ON CONFLICT (MTI_CODIGO) DO UPDATE SET
+                QTD = QTD + excluded.QTD,
+                MTI_DESCRITOR = MAX(MTI_DESCRITOR, excluded.MTI_DESCRITOR)
+        """, key)
+        
+        # Novos valores nos dicionários da fato (chave atribuída pelo SQLite)
+        for column, (table, _) in FACT_DICTIONARIES.items():
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {table} ({column})
+                SELECT DISTINCT {column} FROM avaliacao
+                WHERE {PARTITION_FILTER} AND {column} IS NOT NULL
+            """, key)
+        
+        conn.execute(partition_fact_insert_sql(), key)
+    
+    def _prune_star_schema_dimensions(self, conn: sqlite3.Connection, keys: List[tuple]) -> int:
+        """
+        Remove das dimensões as chaves que a fato não referencia mais
+        
+        As candidatas são as chaves das partições removidas (registradas em
+        ``_remove_star_schema_partition``). As que voltaram com as partições
+        recarregadas são descartadas lendo só essas partições; apenas as
+        restantes (alunos, escolas, descritores... que sumiram dos CSVs) são
+        procuradas no resto da fato. Assim as dimensões ficam iguais às de uma
+        carga completa, inclusive sem descritores com QTD zerada.
+        
+        Returns:
+            Quantidade de linhas removidas das dimensões
+        """
+        pruned = conn.execute("DELETE FROM dim_descritor WHERE QTD <= 0").rowcount
+        exists = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_temp_master WHERE type = 'table' AND name = ?",
+            (REMOVED_KEYS_TABLE,)
+        ).fetchone()[0]
+        if not exists:
+            return pruned
+        
+        for key in keys:
+            fact_filter, fact_params = _fact_partition_filter(key)
+            for table, key_column in DIMENSION_KEYS.items():
+                conn.execute(f"""
+                    DELETE FROM temp.{REMOVED_KEYS_TABLE}
+                    WHERE TABELA = ? AND CHAVE IN (
+                        SELECT {key_column} FROM {FACT_TABLE} WHERE {fact_filter}
+                    )
+                """, [table] + fact_params)
+        
+        candidates = f"SELECT CHAVE FROM temp.{REMOVED_KEYS_TABLE} WHERE TABELA = ?"
+        for table, key_column in DIMENSION_KEYS.items():
+            if conn.execute(f"{candidates} LIMIT 1", (table,)).fetchone() is None:
+                continue
+            pruned += conn.execute(f"""
+                DELETE FROM {table}
+                WHERE {key_column} IN ({candidates})
+                  AND {key_column} NOT IN (
+                      SELECT {key_column} FROM {FACT_TABLE} WHERE {key_column} IN ({candidates})
+                  )
+            """, (table, table)).rowcount
+        
+        conn.execute(f"DROP TABLE temp.{REMOVED_KEYS_TABLE}")
+        return pruned
+    
+    def _anonymize_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Anonimiza dados sensíveis para ambiente de teste"""
+        return _anonymize_dataframe(df)
     
     def apply_star_schema(self):
         """Aplica transformação Star Schema ao banco de dados"""
@@ -173,8 +936,7 @@ class SAEVDataProcessor:
             
             # Caminhos absolutos
             db_path_abs = Path(self.db_path).resolve()
-            project_root = Path(__file__).parent.parent
-            star_schema_script = project_root / "star_schema.sql"
+            star_schema_script = STAR_SCHEMA_SCRIPT
             
             if not star_schema_script.exists():
                 raise FileNotFoundError(f"Script Star Schema não encontrado: {star_schema_script}")
@@ -182,19 +944,27 @@ class SAEVDataProcessor:
             if not db_path_abs.exists():
                 raise FileNotFoundError(f"Banco de dados não encontrado: {db_path_abs}")
             
-            # Executar o script SQL usando sqlite3 command line com caminhos absolutos
-            cmd = f"sqlite3 '{db_path_abs}' < '{star_schema_script}'"
-            result = subprocess.run(
-                cmd, 
-                shell=True, 
-                capture_output=True, 
-                text=True
-            )
-            
-            if result.returncode != 0:
-                raise Exception(f"Erro na execução do Star Schema: {result.stderr}")
-            
-            self.logger.info("✅ Transformação Star Schema aplicada com sucesso")
+            # Script executado em processo, em uma única transação, com PRAGMAs de carga em lote
+            conn = sqlite3.connect(db_path_abs)
+            try:
+                with tuned_pragmas(conn, SQLITE_BATCH_PRAGMAS):
+                    _drop_legacy_tables(conn)
+                    conn.commit()
+                    
+                    start_time = time.time()
+                    timings = run_sql_script(conn, star_schema_script, self.logger, transactional=True)
+                    self.logger.info(
+                        f"✅ Transformação Star Schema aplicada com sucesso "
+                        f"({len(timings)} etapas em {time.time() - start_time:.2f}s)"
+                    )
+                    for step in sorted(timings, key=lambda step: step['seconds'], reverse=True)[:3]:
+                        self.logger.info(f"   🐢 {step['seconds']:.2f}s: {statement_label(step['statement'])}")
+                    
+                    # Tabelas de agregação usadas pelos dashboards
+                    self.build_rollups(conn)
+                    conn.commit()
+            finally:
+                conn.close()
             
             # Validar a transformação
             validation_results = self._validate_star_schema()
@@ -207,34 +977,122 @@ class SAEVDataProcessor:
             self.logger.error(f"❌ Erro na transformação Star Schema: {e}")
             raise
     
-    def _validate_star_schema(self) -> dict:
-        """Valida a estrutura do Star Schema criada"""
-        conn = sqlite3.connect(self.db_path)
+    def build_rollups(self, conn=None) -> Dict[str, int]:
+        """Constrói as tabelas de agregação (agg_*), os conjuntos de alunos por célula e o domínio dos filtros"""
+        owns_connection = conn is None
+        if owns_connection:
+            conn = sqlite3.connect(self.db_path)
+        
+        try:
+            self.logger.info("📐 Construindo tabelas de agregação...")
+            start_time = time.time()
+            row_counts = build_rollups(conn)
+            row_counts['agg_alunos_celula'] = build_student_sets(conn)
+            row_counts[FILTER_DOMAIN_TABLE] = build_filter_domain(conn)
+            if owns_connection:
+                conn.commit()
+            
+            for table, count in row_counts.items():
+                self.logger.info(f"   • {table}: {count:,} registros")
+            self.logger.info(f"✅ Agregações construídas em {time.time() - start_time:.2f}s")
+            return row_counts
+        finally:
+            if owns_connection:
+                conn.close()
+    
+    def _validate_star_schema(self, conn=None) -> dict:
+        """Valida a estrutura do Star Schema criada (conexão sqlite3 ou DuckDB)"""
+        owns_connection = conn is None
+        if owns_connection:
+            conn = sqlite3.connect(self.db_path)
         
         validation_queries = {
             'dim_aluno': 'SELECT COUNT(*) FROM dim_aluno',
             'dim_escola': 'SELECT COUNT(*) FROM dim_escola', 
             'dim_descritor': 'SELECT COUNT(*) FROM dim_descritor',
-            'fato_resposta_aluno': 'SELECT COUNT(*) FROM fato_resposta_aluno',
+            FACT_VIEW: f'SELECT COUNT(*) FROM {FACT_VIEW}',
             'teste': 'SELECT COUNT(*) FROM teste'
         }
+        for table, _ in FACT_DICTIONARIES.values():
+            validation_queries[table] = f'SELECT COUNT(*) FROM {table}'
         
         results = {}
         for table, query in validation_queries.items():
             try:
                 cursor = conn.execute(query)
                 results[table] = cursor.fetchone()[0]
-            except sqlite3.OperationalError:
+            except Exception:
                 results[table] = 0  # Tabela não existe
         
-        conn.close()
+        if owns_connection:
+            conn.close()
         return results
     
-    def validate_data(self) -> dict:
-        """Valida a qualidade dos dados carregados"""
-        self.logger.info("🔍 Validando qualidade dos dados...")
+    def drop_avaliacao(self, conn=None) -> bool:
+        """
+        Remove a tabela bruta avaliacao (e a view teste) após conferir a fato
+        
+        A remoção só acontece se os totais de acertos e erros da fato baterem
+        com as respostas de avaliacao. Sem avaliacao o banco guarda apenas o
+        Star Schema: a carga incremental e o ``SAEVAnalytics`` (que consulta
+        avaliacao) deixam de funcionar nele até a próxima carga completa.
+        
+        Args:
+            conn: Conexão sqlite3 ou DuckDB (padrão: o banco SQLite do processador)
+        
+        Returns:
+            True se a tabela foi removida
+        """
+        owns_connection = conn is None
+        if owns_connection:
+            conn = sqlite3.connect(self.db_path)
         
+        try:
+            expected = conn.execute("""
+                SELECT SUM(CASE WHEN ATR_CERTO = 1 THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN ATR_CERTO = 0 THEN 1 ELSE 0 END)
+                FROM avaliacao
+            """).fetchone()
+            found = conn.execute(f"SELECT SUM(ACERTO), SUM(ERRO) FROM {FACT_VIEW}").fetchone()
+            expected = tuple(int(value or 0) for value in expected)
+            found = tuple(int(value or 0) for value in found)
+            if expected != found:
+                self.logger.error(
+                    f"❌ avaliacao mantida: acertos/erros da fato {found} diferem da origem {expected}"
+                )
+                return False
+            
+            conn.execute("DROP VIEW IF EXISTS teste")
+            conn.execute("DROP TABLE avaliacao")
+            if isinstance(conn, sqlite3.Connection):
+                conn.execute("DROP TABLE IF EXISTS etl_particoes")
+                conn.commit()
+                vacuum_if_worthwhile(conn, self.logger)
+            
+            self.logger.info(f"🗑️  Tabela avaliacao removida ({expected[0] + expected[1]:,} respostas conferidas)")
+            return True
+        finally:
+            if owns_connection:
+                conn.close()
+    
+    def _avaliacao_dropped(self) -> bool:
+        """Verifica se o banco SQLite tem o Star Schema, mas não a tabela avaliacao"""
+        if not Path(self.db_path).exists():
+            return False
         conn = sqlite3.connect(self.db_path)
+        try:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+        return FACT_TABLE in names and 'avaliacao' not in names
+    
+    def validate_data(self, conn=None) -> dict:
+        """Valida a qualidade dos dados carregados (conexão sqlite3 ou DuckDB)"""
+        self.logger.info("🔍 Validando qualidade dos dados...")
+        
+        owns_connection = conn is None
+        if owns_connection:
+            conn = sqlite3.connect(self.db_path)
         
         validation_queries = {
             'total_records': 'SELECT COUNT(*) FROM avaliacao',
@@ -250,7 +1108,8 @@ class SAEVDataProcessor:
             cursor = conn.execute(query)
             results[key] = cursor.fetchone()[0]
         
-        conn.close()
+        if owns_connection:
+            conn.close()
         
         # Log dos resultados
         self.logger.info("📈 Estatísticas dos dados:")
@@ -267,27 +1126,253 @@ class SAEVDataProcessor:
         
         return results
     
+    def _duckdb_path(self) -> str:
+        """Caminho do banco DuckDB correspondente a este processador"""
+        if self.db_path.endswith('.duckdb'):
+            return self.db_path
+        return self.db_path.replace('.db', '.duckdb')
+    
+    def _parquet_path(self) -> str:
+        """Diretório padrão do conjunto Parquet correspondente a este processador"""
+        return str(Path(self.db_path).with_suffix('')) + '_parquet'
+    
+    def export_parquet(self, output_dir: str = None, conn=None,
+                       include_avaliacao: bool = True) -> Dict[str, int]:
+        """
+        Exporta o Star Schema para Parquet particionado por AVA_ANO/DIS_NOME
+        
+        Args:
+            output_dir: Diretório de destino (padrão: ``<banco>_parquet``)
+            conn: Conexão sqlite3 ou DuckDB de origem (padrão: o banco do processador)
+            include_avaliacao: Inclui a tabela bruta avaliacao (usada pelo SAEVAnalytics)
+        
+        Returns:
+            Dicionário tabela -> linhas exportadas
+        """
+        output_dir = output_dir or self._parquet_path()
+        owns_connection = conn is None
+        if owns_connection:
+            if self.db_path.endswith('.duckdb'):
+                import duckdb
+                conn = duckdb.connect(self.db_path, read_only=True)
+            else:
+                conn = sqlite3.connect(self.db_path)
+        
+        try:
+            self.logger.info(f"📦 Exportando Star Schema para Parquet: {output_dir}")
+            start_time = time.time()
+            row_counts = export_parquet(conn, output_dir, include_avaliacao=include_avaliacao,
+                                        logger=self.logger)
+            write_generation_stamp(output_dir)
+            self.logger.info(f"✅ Exportação Parquet concluída em {time.time() - start_time:.2f}s")
+            return row_counts
+        finally:
+            if owns_connection:
+                conn.close()
+    
+    def load_csv_duckdb(self, duck_conn, csv_path: str = None, csv_folder: str = None,
+                        test_mode: bool = False, allowed_cities: Optional[List[str]] = None) -> int:
+        """
+        Carrega os CSVs diretamente na tabela avaliacao do DuckDB
+        
+        Usa o leitor de CSV paralelo do próprio DuckDB (sem pandas), com os tipos
+        do DDL da tabela avaliacao. No modo teste, o filtro de municípios e a
+        anonimização (MD5 com sal, igual ao modo SQLite) são feitos em SQL.
+        """
+        csv_files = self._resolve_csv_files(csv_path, csv_folder)
+        
+        duck_conn.execute("DROP TABLE IF EXISTS avaliacao")
+        columns_ddl = ", ".join(f"{column} {sql_type}" for column, sql_type in AVALIACAO_SCHEMA.items())
+        duck_conn.execute(f"CREATE TABLE avaliacao ({columns_ddl})")
+        
+        anonymize = test_mode and allowed_cities
+        anonymizer = get_anonymizer()
+        select_columns = []
+        for column, sql_type in AVALIACAO_SCHEMA.items():
+            if anonymize and column in SENSITIVE_FIELDS:
+                select_columns.append(f"{anonymizer.sql_expression(column)} AS {column}")
+            else:
+                select_columns.append(f"CAST({column} AS {sql_type}) AS {column}")
+        
+        csv_types = ", ".join(
+            f"'{column}': '{'INTEGER' if sql_type == 'INTEGER' else 'VARCHAR'}'"
+            for column, sql_type in AVALIACAO_SCHEMA.items()
+        )
+        where_clause = "WHERE MUN_NOME IN (SELECT UNNEST(?))" if anonymize else ""
+        params = [list(allowed_cities)] if anonymize else []
+        
+        total_records = 0
+        for csv_file in csv_files:
+            self.logger.info(f"📥 Carregando: {csv_file.name}")
+            start_time = time.time()
+            csv_literal = str(csv_file).replace("'", "''")
+            
+            rows_loaded = duck_conn.execute(f"""
+                INSERT INTO avaliacao
+                SELECT {', '.join(select_columns)}
+                FROM read_csv('{csv_literal}', header = true, union_by_name = true,
+                              types = {{{csv_types}}})
+                {where_clause}
+            """, params).fetchone()[0]
+            
+            elapsed = time.time() - start_time
+            rate = rows_loaded / elapsed if elapsed > 0 else 0
+            self.logger.info(
+                f"   📊 {rows_loaded:,} registros em {csv_file.name} "
+                f"({elapsed:.2f}s, {rate:,.0f} linhas/s)"
+            )
+            total_records += rows_loaded
+        
+        if anonymize:
+            self.logger.info("🔒 Dados anonimizados para ambiente de teste")
+        
+        self.logger.info(f"✅ Dados carregados com sucesso: {total_records:,} registros")
+        return total_records
+    
+    def apply_star_schema_duckdb(self, duck_conn):
+        """Aplica o script Star Schema diretamente no banco DuckDB"""
+        try:
+            self.logger.info("⭐ Iniciando transformação Star Schema (DuckDB)...")
+            
+            if not STAR_SCHEMA_SCRIPT.exists():
+                raise FileNotFoundError(f"Script Star Schema não encontrado: {STAR_SCHEMA_SCRIPT}")
+            
+            _drop_legacy_tables(duck_conn)
+            run_sql_script(duck_conn, STAR_SCHEMA_SCRIPT, self.logger)
+            _materialize_fact_view(duck_conn)
+            
+            self.logger.info("✅ Transformação Star Schema aplicada com sucesso")
+            
+            self.build_rollups(duck_conn)
+            
+            validation_results = self._validate_star_schema(duck_conn)
+            
+            self.logger.info("📊 Resultado da transformação Star Schema:")
+            for table, count in validation_results.items():
+                self.logger.info(f"   • {table}: {count:,} registros")
+            
+            return validation_results
+            
+        except Exception as e:
+            self.logger.error(f"❌ Erro na transformação Star Schema: {e}")
+            raise
+    
+    def _full_etl_process_duckdb(self, csv_path: str = None, csv_folder: str = None,
+                                 test_mode: bool = False, allowed_cities: Optional[List[str]] = None,
+                                 apply_star_schema: bool = True, overwrite_db: bool = True,
+                                 parquet_dir: Optional[str] = None,
+                                 drop_avaliacao: bool = False) -> dict:
+        """ETL nativo em DuckDB: CSV → avaliacao → Star Schema no arquivo .duckdb"""
+        import duckdb
+        
+        duckdb_path = self._duckdb_path()
+        if overwrite_db and Path(duckdb_path).exists():
+            self.logger.info(f"🗑️  Removendo banco existente: {duckdb_path}")
+            Path(duckdb_path).unlink()
+        
+        Path(duckdb_path).parent.mkdir(parents=True, exist_ok=True)
+        self.logger.info(f"🦆 Banco DuckDB: {duckdb_path}")
+        
+        duck_conn = duckdb.connect(duckdb_path, config=config.get_duckdb_settings())
+        try:
+            self.load_csv_duckdb(duck_conn, csv_path=csv_path, csv_folder=csv_folder,
+                                 test_mode=test_mode, allowed_cities=allowed_cities)
+            
+            validation_results = self.validate_data(duck_conn)
+            
+            if apply_star_schema:
+                self.apply_star_schema_duckdb(duck_conn)
+                if drop_avaliacao:
+                    self.drop_avaliacao(duck_conn)
+            
+            if parquet_dir:
+                self.export_parquet(parquet_dir, conn=duck_conn)
+        finally:
+            duck_conn.close()
+        
+        write_generation_stamp(duckdb_path)
+        return validation_results
+    
     def full_etl_process(self, csv_path: str = None, csv_folder: str = None,
                         test_mode: bool = False, allowed_cities: Optional[List[str]] = None, 
                         apply_star_schema: bool = True, overwrite_db: bool = True,
-                        include_duckdb: bool = False, force_duckdb: bool = False):
-        """Executa o processo completo de ETL"""
+                        include_duckdb: bool = False, force_duckdb: bool = False,
+                        chunk_size: Optional[int] = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                        engine: str = 'sqlite', incremental: bool = False,
+                        parquet_dir: Optional[str] = None, drop_avaliacao: bool = False):
+        """
+        Executa o processo completo de ETL
+        
+        Com ``engine='duckdb'`` o ETL é feito inteiramente no DuckDB: os CSVs são
+        lidos pelo leitor nativo do DuckDB e o Star Schema é construído direto no
+        arquivo .duckdb, sem passar pelo SQLite nem pelo pandas.
+        
+        Com ``incremental=True`` o banco existente é mantido e apenas as
+        partições (AVA_ANO, AVA_NOME, DIS_NOME) novas ou alteradas são
+        recarregadas (ver ``load_csv_incremental``).
+        
+        Com ``parquet_dir`` o Star Schema é exportado ao final para Parquet
+        particionado (ver ``export_parquet``).
+        
+        Com ``drop_avaliacao=True`` a tabela bruta é removida depois do Star
+        Schema conferido (ver ``drop_avaliacao``); não combina com a carga
+        incremental, que recalcula as partições a partir de avaliacao.
+        """
         self.logger.info("🚀 Iniciando processo completo de ETL...")
         
+        if engine not in ('sqlite', 'duckdb'):
+            raise ValueError(f"Motor '{engine}' não é válido. Use 'sqlite' ou 'duckdb'")
+        
+        if incremental and engine != 'sqlite':
+            raise ValueError("A carga incremental está disponível apenas para o motor 'sqlite'")
+        
+        if incremental and drop_avaliacao:
+            raise ValueError("drop_avaliacao não é compatível com a carga incremental")
+        
+        if incremental and self._avaliacao_dropped():
+            raise ValueError("A tabela avaliacao foi removida deste banco; execute uma carga completa")
+        
         try:
+            if engine == 'duckdb':
+                validation_results = self._full_etl_process_duckdb(
+                    csv_path=csv_path, csv_folder=csv_folder, test_mode=test_mode,
+                    allowed_cities=allowed_cities, apply_star_schema=apply_star_schema,
+                    overwrite_db=overwrite_db, parquet_dir=parquet_dir,
+                    drop_avaliacao=drop_avaliacao
+                )
+                self.logger.info("🎉 Processo de ETL concluído com sucesso!")
+                return validation_results
+            
             # 1. Criar estrutura do banco
-            self.create_database_structure(overwrite=overwrite_db)
+            self.create_database_structure(overwrite=overwrite_db and not incremental,
+                                           create_indexes=incremental)
             
             # 2. Carregar dados do CSV ou pasta
-            self.load_csv_data(csv_path=csv_path, csv_folder=csv_folder, 
-                             test_mode=test_mode, allowed_cities=allowed_cities)
+            if incremental:
+                star_schema_ready = self._star_schema_exists()
+                self.load_csv_incremental(csv_path=csv_path, csv_folder=csv_folder,
+                                          test_mode=test_mode, allowed_cities=allowed_cities,
+                                          chunk_size=chunk_size,
+                                          refresh_star_schema=apply_star_schema)
+            else:
+                star_schema_ready = False
+                self.load_csv_data(csv_path=csv_path, csv_folder=csv_folder, 
+                                 test_mode=test_mode, allowed_cities=allowed_cities,
+                                 chunk_size=chunk_size, workers=workers)
             
             # 3. Validar dados carregados
             validation_results = self.validate_data()
             
-            # 4. Aplicar Star Schema (se solicitado)
-            if apply_star_schema:
+            # 4. Aplicar Star Schema (se solicitado e ainda não atualizado pela carga incremental)
+            if apply_star_schema and not star_schema_ready:
                 self.apply_star_schema()
+                
+                # Tabela bruta removida só depois de conferida a fato
+                if drop_avaliacao:
+                    self.drop_avaliacao()
+            
+            # Nova geração de carga: invalida o cache de resultados dos dashboards
+            write_generation_stamp(self.db_path)
             
             # 5. Migração para DuckDB (se solicitado)
             if include_duckdb:
@@ -303,6 +1388,10 @@ class SAEVDataProcessor:
                 else:
                     self.logger.error("❌ Falha na migração DuckDB")
             
+            # 6. Exportação Parquet (se solicitada)
+            if parquet_dir:
+                self.export_parquet(parquet_dir)
+            
             self.logger.info("🎉 Processo de ETL concluído com sucesso!")
             return validation_results
             
@@ -316,7 +1405,7 @@ class SAEVDataProcessor:
             print("\n🦆 Iniciando migração para DuckDB...")
             
             # Usar o próprio caminho do banco atual
-            duckdb_path = self.db_path.replace('.db', '.duckdb')
+            duckdb_path = self._duckdb_path()
             
             # Verificar se precisa recriar (deletar arquivo existente)
             if force_recreate and Path(duckdb_path).exists():
@@ -331,6 +1420,7 @@ class SAEVDataProcessor:
             success = migrator.migrate_to_duckdb()
             
             if success:
+                write_generation_stamp(duckdb_path)
                 print("✅ Migração para DuckDB concluída!")
             else:
                 print("❌ Falha na migração para DuckDB")
@@ -346,7 +1436,7 @@ class SAEVDataProcessor:
         try:
             import duckdb
             
-            duckdb_path = self.db_path.replace('.db', '.duckdb')
+            duckdb_path = self._duckdb_path()
             
             if not Path(duckdb_path).exists():
                 print(f"❌ Arquivo DuckDB não encontrado: {duckdb_path}")
@@ -0,0 +1,157 @@
+"""
+Domínio dos filtros dos painéis SAEV (combinações válidas)
+
+Os filtros em cascata da galeria (UF → município → escola → ano →
+disciplina → teste → série) precisavam de um ``SELECT DISTINCT`` sobre
+``fato_resposta_aluno`` por filtro, a cada re-execução do Streamlit. A tabela
+``agg_filtro``, construída pelo ETL junto com as rollups, guarda as
+combinações distintas de
+
+    (MUN_UF, MUN_NOME, ESC_INEP, ESC_NOME, AVA_ANO, DIS_NOME, TES_NOME, SER_NOME)
+
+que cabem em memória (ordem de dezenas de milhares de linhas). O
+``FilterDomain`` carrega essa tabela uma única vez por processo e resolve as
+opções de cada filtro em memória (``isin`` por hash), sem voltar ao banco;
+ele é recarregado quando o carimbo do banco muda (nova carga). Em bancos antigos,
+sem ``agg_filtro``, o domínio é lido da fato com uma única consulta.
+
+As funções de construção recebem uma conexão DB-API (sqlite3 ou DuckDB).
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .query_cache import database_stamp
+from .rollups import ROLLUP_COLUMN_TYPES, ROLLUP_PARTITION_FILTER
+
+FILTER_DOMAIN_TABLE = 'agg_filtro'
+
+# Colunas do domínio, na ordem da cascata dos filtros
+FILTER_DOMAIN_COLUMNS = ['MUN_UF', 'MUN_NOME', 'ESC_INEP', 'ESC_NOME',
+                         'AVA_ANO', 'DIS_NOME', 'TES_NOME', 'SER_NOME']
+
+_FACT_COLUMNS = [column for column in FILTER_DOMAIN_COLUMNS if column != 'ESC_NOME']
+
+
+def _domain_select(where: str = "") -> str:
+    """SELECT das combinações distintas a partir da fato (nome da escola pela dimensão)"""
+    fact_columns = ", ".join(_FACT_COLUMNS)
+    columns = ", ".join(
+        'e.ESC_NOME' if column == 'ESC_NOME' else f"f.{column}" for column in FILTER_DOMAIN_COLUMNS
+    )
+    return f"""
+        SELECT {columns}
+        FROM (
+            SELECT DISTINCT {fact_columns}
+            FROM fato_resposta_aluno
+            {where}
+        ) f
+        LEFT JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
+    """
+
+
+def create_filter_domain_table(conn):
+    """Cria a tabela do domínio dos filtros (vazia) se ainda não existir"""
+    column_types = dict(ROLLUP_COLUMN_TYPES, ESC_NOME='VARCHAR(60)')
+    columns = ", ".join(f"{column} {column_types[column]}" for column in FILTER_DOMAIN_COLUMNS)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {FILTER_DOMAIN_TABLE} ({columns})")
+
+
+def build_filter_domain(conn, partitions: Optional[Iterable[Tuple]] = None) -> int:
+    """
+    Constrói (ou atualiza) o domínio dos filtros a partir de fato_resposta_aluno
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB
+        partitions: Chaves (AVA_ANO, DIS_NOME) a recalcular. Se None, a tabela
+            é reconstruída do zero (atualização por partição apenas no SQLite,
+            como nas rollups)
+
+    Returns:
+        Quantidade de combinações gravadas
+    """
+    create_filter_domain_table(conn)
+    columns = ", ".join(FILTER_DOMAIN_COLUMNS)
+
+    if partitions is None:
+        conn.execute(f"DELETE FROM {FILTER_DOMAIN_TABLE}")
+        conn.execute(f"INSERT INTO {FILTER_DOMAIN_TABLE} ({columns}) {_domain_select()}")
+    else:
+        where = f"WHERE {ROLLUP_PARTITION_FILTER}"
+        for key in sorted(set(partitions), key=str):
+            conn.execute(f"DELETE FROM {FILTER_DOMAIN_TABLE} WHERE {ROLLUP_PARTITION_FILTER}", key)
+            conn.execute(f"INSERT INTO {FILTER_DOMAIN_TABLE} ({columns}) {_domain_select(where)}", key)
+
+    return conn.execute(f"SELECT COUNT(*) FROM {FILTER_DOMAIN_TABLE}").fetchone()[0]
+
+
+class FilterDomain:
+    """Combinações válidas dos filtros, consultadas em memória"""
+
+    def __init__(self, combinations: pd.DataFrame):
+        self.combinations = combinations.reset_index(drop=True)
+        self._columns = {column: self.combinations[column] for column in self.combinations.columns}
+
+    def __len__(self) -> int:
+        return len(self.combinations)
+
+    def _mask(self, filters: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Linhas compatíveis com os filtros (None e listas vazias não filtram)"""
+        mask = np.ones(len(self.combinations), dtype=bool)
+        for column, value in (filters or {}).items():
+            if value is None or (isinstance(value, (list, tuple, set)) and not value):
+                continue
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self._columns[column].isin(values).to_numpy()
+        return mask
+
+    def options(self, column: str, filters: Optional[Dict[str, Any]] = None,
+                descending: bool = False) -> List:
+        """Valores distintos (não nulos, ordenados) de uma coluna dentro dos filtros"""
+        values = pd.unique(self._columns[column].to_numpy()[self._mask(filters)])
+        values = [value.item() if hasattr(value, 'item') else value
+                  for value in values if not pd.isna(value)]
+        return sorted(values, reverse=descending)
+
+    def schools(self, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Escolas (código e nome) dentro dos filtros, ordenadas pelo nome"""
+        schools = self.combinations.loc[self._mask(filters), ['ESC_INEP', 'ESC_NOME']]
+        schools = schools.dropna().drop_duplicates()
+        return schools.sort_values(['ESC_NOME', 'ESC_INEP']).reset_index(drop=True)
+
+
+def filter_domain_query(service) -> str:
+    """SQL que carrega o domínio: ``agg_filtro`` ou, em bancos antigos, a fato"""
+    if service.has_tables([FILTER_DOMAIN_TABLE]):
+        return f"SELECT {', '.join(FILTER_DOMAIN_COLUMNS)} FROM {FILTER_DOMAIN_TABLE}"
+    return _domain_select()
+
+
+_domains: Dict[Tuple[str, str], Tuple[Tuple, FilterDomain]] = {}
+_domains_lock = threading.Lock()
+
+
+def get_filter_domain(service) -> FilterDomain:
+    """
+    Domínio dos filtros de um banco, carregado uma vez por processo
+
+    Args:
+        service: ``SAEVQueryService`` do banco
+
+    Returns:
+        FilterDomain atualizado com a última carga do banco
+    """
+    key = (service.db_path, service.engine)
+    stamp = database_stamp(service.db_path)
+    with _domains_lock:
+        entry = _domains.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+
+    domain = FilterDomain(service.query(filter_domain_query(service), use_cache=False))
+
+    with _domains_lock:
+        _domains[key] = (stamp, domain)
+    return domain
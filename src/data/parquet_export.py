@@ -0,0 +1,267 @@
+"""
+Exportação do Star Schema SAEV para Parquet (análise fora do banco)
+
+O conjunto exportado é um diretório com uma pasta por tabela:
+
+- ``fato_resposta_aluno/`` e ``avaliacao/``: particionadas no formato Hive
+  por ``AVA_ANO`` e ``DIS_NOME`` (``AVA_ANO=2024/DIS_NOME=Matem%C3%A1tica/``)
+- ``dim_*/`` e ``agg_*/``: um ou mais arquivos sem particionamento
+
+Os arquivos são gravados pelo DuckDB com compressão ZSTD; colunas de texto
+com poucos valores distintos (município, série, teste, descritor...) recebem
+codificação de dicionário do próprio formato Parquet. Uma consulta com
+filtro de ano/disciplina lê apenas as pastas das partições selecionadas, e
+as estatísticas min/max dos grupos de linhas (a fato já está ordenada por
+ano, disciplina, teste e série) descartam o restante. As colunas de partição
+também são gravadas nos arquivos, mantendo a ordem original das colunas.
+
+O conjunto é lido pelo motor ``parquet`` do ``SAEVQueryService``, que cria
+uma view DuckDB por tabela (``register_parquet_views``), permitindo rodar os
+dashboards e o ``SAEVAnalytics`` em um notebook sem o banco completo.
+"""
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# Colunas de particionamento (Hive) e seus tipos na leitura
+PARQUET_PARTITION_COLUMNS = ['AVA_ANO', 'DIS_NOME']
+PARQUET_PARTITION_TYPES = {'AVA_ANO': 'INTEGER', 'DIS_NOME': 'VARCHAR'}
+
+# Tabelas particionadas por ano/disciplina
+PARTITIONED_TABLES = ('fato_resposta_aluno', 'avaliacao')
+
+# Prefixos das tabelas exportadas sem particionamento
+UNPARTITIONED_PREFIXES = ('dim_', 'agg_')
+
+# Opções comuns do COPY ... TO
+PARQUET_COPY_OPTIONS = "FORMAT PARQUET, COMPRESSION ZSTD"
+
+# Tamanho do lote na leitura pelo cursor sqlite3 (sem a extensão sqlite do DuckDB)
+EXPORT_BATCH_SIZE = 500000
+
+
+def _quote(path) -> str:
+    """Caminho como literal SQL"""
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _duckdb_type(declared: str) -> Optional[str]:
+    """Tipo DuckDB equivalente ao tipo declarado de uma coluna SQLite"""
+    declared = (declared or '').upper()
+    if 'BIGINT' in declared:
+        return 'BIGINT'
+    if 'INT' in declared:
+        return 'INTEGER'
+    if any(token in declared for token in ('CHAR', 'CLOB', 'TEXT')):
+        return 'VARCHAR'
+    if any(token in declared for token in ('REAL', 'FLOA', 'DOUB')):
+        return 'DOUBLE'
+    if 'BLOB' in declared:
+        return 'BLOB'
+    return None
+
+
+def export_tables(conn, include_avaliacao: bool = True) -> List[str]:
+    """
+    Tabelas do banco que fazem parte do conjunto Parquet
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB
+        include_avaliacao: Inclui a tabela bruta avaliacao (usada pelo SAEVAnalytics)
+    """
+    if isinstance(conn, sqlite3.Connection):
+        sql = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+    else:
+        sql = "SELECT table_name FROM information_schema.tables"
+    existing = {row[0] for row in conn.execute(sql).fetchall()}
+
+    tables = sorted(table for table in existing if table.startswith(UNPARTITIONED_PREFIXES))
+    for table in PARTITIONED_TABLES:
+        if table == 'avaliacao' and not include_avaliacao:
+            continue
+        if table in existing:
+            tables.append(table)
+    return tables
+
+
+def _copy_statement(select_sql: str, target: Path, partitioned: bool, append: bool = False) -> str:
+    """COPY ... TO de uma consulta para um arquivo ou pasta particionada"""
+    options = PARQUET_COPY_OPTIONS
+    if partitioned:
+        options += f", PARTITION_BY ({', '.join(PARQUET_PARTITION_COLUMNS)}), WRITE_PARTITION_COLUMNS true"
+        options += ", FILENAME_PATTERN 'parte_{uuid}'"
+        options += ", APPEND" if append else ", OVERWRITE_OR_IGNORE"
+    return f"COPY ({select_sql}) TO {_quote(target)} ({options})"
+
+
+def _attach_sqlite(duck_conn, sqlite_path: str) -> bool:
+    """Anexa o banco SQLite ao DuckDB pela extensão sqlite (se disponível)"""
+    try:
+        duck_conn.execute("INSTALL sqlite")
+        duck_conn.execute("LOAD sqlite")
+        duck_conn.execute(f"ATTACH {_quote(Path(sqlite_path).resolve())} AS saev_sqlite (TYPE SQLITE, READ_ONLY)")
+        return True
+    except Exception:
+        return False
+
+
+def _export_from_duckdb(duck_conn, table: str, source: str, target: Path, partitioned: bool) -> int:
+    """Exporta uma tabela lida pelo DuckDB em um único COPY"""
+    if not partitioned:
+        target.mkdir(parents=True, exist_ok=True)
+        target = target / 'parte_00000.parquet'
+    return duck_conn.execute(
+        _copy_statement(f"SELECT * FROM {source}", target, partitioned)
+    ).fetchone()[0]
+
+
+def _export_from_sqlite_cursor(sqlite_conn, duck_conn, table: str, target: Path,
+                               partitioned: bool, batch_size: int) -> int:
+    """
+    Exporta uma tabela SQLite em lotes por um único cursor
+
+    Cada lote é convertido para os tipos declarados no SQLite (o pandas
+    transformaria inteiros com NULL em float) e gravado com um COPY; nas
+    tabelas particionadas os lotes seguintes são acrescentados (APPEND).
+    """
+    columns_info = sqlite_conn.execute(f"PRAGMA table_info({table})").fetchall()
+    select_columns = []
+    for _, column, declared, *_ in columns_info:
+        duck_type = _duckdb_type(declared)
+        select_columns.append(f"CAST({column} AS {duck_type}) AS {column}" if duck_type else column)
+    select_sql = f"SELECT {', '.join(select_columns)} FROM batch_temp"
+
+    target.mkdir(parents=True, exist_ok=True)
+    cursor = sqlite_conn.execute(f"SELECT * FROM {table}")
+    columns = [description[0] for description in cursor.description]
+    exported = 0
+    batch_number = 0
+
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+
+        batch = pd.DataFrame.from_records(rows, columns=columns)
+        duck_conn.register("batch_temp", batch)
+        if partitioned:
+            duck_conn.execute(_copy_statement(select_sql, target, True, append=True))
+        else:
+            duck_conn.execute(_copy_statement(select_sql, target / f'parte_{batch_number:05d}.parquet', False))
+        duck_conn.unregister("batch_temp")
+
+        exported += len(rows)
+        batch_number += 1
+
+    return exported
+
+
+def export_parquet(conn, output_dir: str, include_avaliacao: bool = True,
+                   logger=None, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Exporta o Star Schema (fato, dimensões e agregações) para Parquet
+
+    O conjunto é gravado em ``<output_dir>.tmp`` e só então substitui o
+    diretório de destino, de modo que leitores nunca veem uma exportação
+    pela metade.
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB com o Star Schema
+        output_dir: Diretório do conjunto Parquet
+        include_avaliacao: Inclui a tabela bruta avaliacao
+        logger: Logger para o progresso (opcional)
+        batch_size: Linhas por lote na leitura via cursor sqlite3
+
+    Returns:
+        Dicionário tabela -> linhas exportadas
+    """
+    import duckdb
+
+    output_path = Path(output_dir)
+    staging_path = output_path.with_name(output_path.name + '.tmp')
+    if staging_path.exists():
+        shutil.rmtree(staging_path)
+    staging_path.mkdir(parents=True)
+
+    tables = export_tables(conn, include_avaliacao)
+    from_sqlite = isinstance(conn, sqlite3.Connection)
+    if from_sqlite:
+        duck_conn = duckdb.connect()
+        sqlite_path = conn.execute("PRAGMA database_list").fetchone()[2]
+        attached = _attach_sqlite(duck_conn, sqlite_path)
+    else:
+        duck_conn = conn
+        attached = False
+
+    row_counts = {}
+    try:
+        for table in tables:
+            start_time = time.time()
+            partitioned = table in PARTITIONED_TABLES
+            target = staging_path / table
+
+            if from_sqlite and not attached:
+                rows = _export_from_sqlite_cursor(conn, duck_conn, table, target, partitioned, batch_size)
+            else:
+                source = f"saev_sqlite.{table}" if attached else table
+                rows = _export_from_duckdb(duck_conn, table, source, target, partitioned)
+
+            row_counts[table] = rows
+            if logger:
+                logger.info(f"   📦 {table}: {rows:,} registros ({time.time() - start_time:.2f}s)")
+    except Exception:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    finally:
+        if from_sqlite:
+            duck_conn.close()
+
+    if output_path.exists():
+        shutil.rmtree(output_path)
+    staging_path.rename(output_path)
+    return row_counts
+
+
+def parquet_sources(dataset_dir: str) -> Dict[str, str]:
+    """
+    Expressões ``read_parquet`` de cada tabela de um conjunto exportado
+
+    Returns:
+        Dicionário tabela -> expressão SQL de leitura
+    """
+    sources = {}
+    for table_dir in sorted(Path(dataset_dir).iterdir()):
+        if not table_dir.is_dir() or not any(table_dir.rglob('*.parquet')):
+            continue
+        pattern = _quote(table_dir / '**' / '*.parquet')
+        if table_dir.name in PARTITIONED_TABLES:
+            hive_types = ", ".join(f"'{column}': {sql_type}"
+                                   for column, sql_type in PARQUET_PARTITION_TYPES.items())
+            sources[table_dir.name] = (
+                f"read_parquet({pattern}, hive_partitioning = true, "
+                f"hive_types = {{{hive_types}}})"
+            )
+        else:
+            sources[table_dir.name] = f"read_parquet({pattern})"
+    return sources
+
+
+def register_parquet_views(duck_conn, dataset_dir: str) -> List[str]:
+    """
+    Cria uma view DuckDB por tabela do conjunto Parquet
+
+    As views têm os mesmos nomes das tabelas do banco, de modo que as
+    consultas dos dashboards e do analytics rodam sem alteração; os filtros
+    de ano/disciplina são aplicados às pastas das partições antes da leitura.
+
+    Returns:
+        Nomes das views criadas
+    """
+    sources = parquet_sources(dataset_dir)
+    for table, source in sources.items():
+        duck_conn.execute(f"CREATE OR REPLACE VIEW {table} AS SELECT * FROM {source}")
+    return list(sources)
@@ -0,0 +1,73 @@
+"""
+Construção de consultas parametrizadas para SQLite e DuckDB (e Parquet via DuckDB)
+
+Os valores de filtro nunca são colados no texto do SQL: cada condição usa
+parâmetros, e listas (IN) são passadas como um único parâmetro, de modo que
+o texto da consulta não muda com a quantidade de valores selecionados:
+
+- SQLite: ``col IN (SELECT value FROM json_each(?))`` com a lista em JSON
+- DuckDB/Parquet: ``col IN (SELECT UNNEST(?))`` com a lista como parâmetro LIST
+
+Com o texto estável, o cache de instruções preparadas do sqlite3, o cache de
+planos do motor e o cache de resultados (query_cache) são reaproveitados
+entre re-execuções e usuários.
+"""
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+ENGINES = ('sqlite', 'duckdb', 'parquet')
+
+
+class SAEVQueryBuilder:
+    """Gera condições e cláusulas WHERE parametrizadas para um motor"""
+
+    def __init__(self, engine: str = 'sqlite'):
+        if engine not in ENGINES:
+            raise ValueError(f"Motor inválido: {engine} (use {', '.join(ENGINES)})")
+        self.engine = engine
+
+    def in_list(self, column: str, values: Iterable) -> Tuple[str, list]:
+        """Condição ``column IN (...)`` com a lista em um único parâmetro"""
+        values = [_native(value) for value in values]
+        if self.engine == 'sqlite':
+            return f"{column} IN (SELECT value FROM json_each(?))", [json.dumps(values)]
+        return f"{column} IN (SELECT UNNEST(?))", [values]
+
+    def condition(self, column: str, value: Any) -> Tuple[str, list]:
+        """Condição de igualdade (valor escalar) ou pertinência (lista)"""
+        if isinstance(value, (list, tuple, set)):
+            return self.in_list(column, value)
+        return f"{column} = ?", [_native(value)]
+
+    def where(self, filters: Dict[str, Any], alias: Optional[str] = None,
+              keyword: str = 'WHERE') -> Tuple[str, list]:
+        """
+        Cláusula WHERE a partir de um dicionário coluna -> valor ou lista
+
+        Valores None e listas vazias são ignorados (sem filtro na coluna).
+
+        Args:
+            filters: Filtros por coluna
+            alias: Alias da tabela prefixado às colunas (ex.: 'f')
+            keyword: Palavra inicial da cláusula ('WHERE' ou 'AND')
+
+        Returns:
+            Tupla (cláusula, parâmetros); cláusula vazia se não houver filtros
+        """
+        conditions = []
+        params = []
+        for column, value in filters.items():
+            if value is None or (isinstance(value, (list, tuple, set)) and not value):
+                continue
+            condition, condition_params = self.condition(f"{alias}.{column}" if alias else column, value)
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        if not conditions:
+            return "", []
+        return f"{keyword} " + " AND ".join(conditions), params
+
+
+def _native(value):
+    """Converte escalares numpy/pandas para tipos nativos do Python"""
+    return value.item() if hasattr(value, 'item') else value
@@ -0,0 +1,171 @@
+"""
+Cache de resultados das consultas dos dashboards
+
+Os resultados são guardados em memória, com limite de tamanho (bytes
+ocupados pelos DataFrames) e descarte LRU. A chave é o SQL normalizado, os
+parâmetros e o dicionário de filtros do painel, de modo que re-execuções do
+Streamlit com os mesmos filtros não repetem as agregações.
+
+O cache é invalidado automaticamente quando o banco muda: para cada banco é
+guardado o "carimbo" visto por último (mtime do arquivo, do WAL e o conteúdo
+do arquivo ``<banco>.generation`` escrito pelo ETL ao fim de cada carga). Se
+o carimbo atual for diferente, as entradas daquele banco são descartadas.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Limite padrão do cache em MB (variável de ambiente SAEV_QUERY_CACHE_MB)
+DEFAULT_CACHE_MB = 256
+
+# Sufixo do arquivo de geração escrito pelo ETL ao lado do banco
+GENERATION_SUFFIX = '.generation'
+
+
+def generation_stamp_path(db_path: str) -> Path:
+    """Caminho do arquivo de geração de um banco"""
+    return Path(f"{db_path}{GENERATION_SUFFIX}")
+
+
+def write_generation_stamp(db_path: str) -> str:
+    """
+    Registra uma nova geração de carga do banco (chamado pelo ETL)
+
+    Returns:
+        Identificador da geração gravada
+    """
+    stamp_path = generation_stamp_path(db_path)
+    generation = str(time.time_ns())
+    tmp_path = stamp_path.with_name(stamp_path.name + '.tmp')
+    tmp_path.write_text(generation, encoding='utf-8')
+    os.replace(tmp_path, stamp_path)
+    return generation
+
+
+def database_stamp(db_path: str) -> Tuple:
+    """Carimbo atual do banco: mtimes do arquivo e do WAL e geração do ETL"""
+    stamp = []
+    for path in (db_path, f"{db_path}-wal", f"{db_path}.wal"):
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            stamp.append(None)
+
+    try:
+        stamp.append(generation_stamp_path(db_path).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        stamp.append(None)
+
+    return tuple(stamp)
+
+
+def normalize_sql(sql: str) -> str:
+    """Normaliza espaços em branco do SQL para uso na chave do cache"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def make_cache_key(db_path: str, sql: str, params: Optional[Sequence] = None,
+                   filters: Optional[Dict[str, Any]] = None) -> str:
+    """Chave do cache para uma consulta"""
+    payload = json.dumps(
+        [str(db_path), normalize_sql(sql), list(params or []), filters or {}],
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class QueryResultCache:
+    """Cache LRU de DataFrames limitado por memória"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('SAEV_QUERY_CACHE_MB', DEFAULT_CACHE_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, pd.DataFrame, int]]" = OrderedDict()
+        self._stamps: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+
+    def _check_stamp(self, db_path: str):
+        """Descarta as entradas de um banco cujo carimbo mudou"""
+        stamp = database_stamp(db_path)
+        if self._stamps.get(db_path) != stamp:
+            for key in [key for key, entry in self._entries.items() if entry[0] == db_path]:
+                self._remove(key)
+            self._stamps[db_path] = stamp
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry[2]
+
+    def get(self, db_path: str, key: str) -> Optional[pd.DataFrame]:
+        """Retorna uma cópia do resultado em cache (ou None)"""
+        with self._lock:
+            self._check_stamp(db_path)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1].copy()
+
+    def put(self, db_path: str, key: str, df: pd.DataFrame, size: Optional[int] = None):
+        """Guarda um resultado, descartando os menos usados se necessário"""
+        if size is None:
+            size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_stamp(db_path)
+            if key in self._entries:
+                self._remove(key)
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+            self._entries[key] = (db_path, df.copy(), size)
+            self.current_bytes += size
+
+    def clear(self):
+        """Esvazia o cache"""
+        with self._lock:
+            self._entries.clear()
+            self._stamps.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas de uso do cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_shared_cache: Optional[QueryResultCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryResultCache:
+    """Cache de resultados compartilhado pelo processo"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = QueryResultCache()
+    return _shared_cache
@@ -0,0 +1,229 @@
+"""
+Instrumentação das consultas do SAEV e log de consultas lentas
+
+Toda consulta feita pelo ``SAEVQueryService`` (e, portanto, pelos
+``get_data`` do dashboard, da galeria, do analytics e dos relatórios) é
+registrada com:
+
+- ``caller``: widget/método de origem (``Classe.metodo``), obtido da pilha de
+  chamadas ignorando a camada de dados e os wrappers ``get_data``
+- ``engine`` e banco
+- ``fingerprint``: hash do SQL normalizado (literais trocados por ``?``),
+  igual para todas as execuções do mesmo texto de consulta
+- linhas retornadas, tempo de parede e bytes do DataFrame entregue ao pandas
+- se veio do cache de resultados e eventual erro
+
+Os registros mais recentes ficam em memória (``SAEV_QUERY_METRICS_SIZE``)
+para o painel de desempenho. Consultas acima de ``SAEV_SLOW_QUERY_MS`` são
+gravadas, uma por linha em JSON, no log rotativo ``SAEV_SLOW_QUERY_LOG``
+(vazio desativa o arquivo). Os valores dos parâmetros não são gravados, pois
+podem conter dados sensíveis dos filtros.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .query_cache import normalize_sql
+
+# Limiar padrão de consulta lenta em ms (variável de ambiente SAEV_SLOW_QUERY_MS)
+DEFAULT_SLOW_QUERY_MS = 500
+
+# Log de consultas lentas (SAEV_SLOW_QUERY_LOG) e rotação (SAEV_SLOW_QUERY_LOG_MB)
+DEFAULT_SLOW_QUERY_LOG = 'logs/slow_queries.log'
+DEFAULT_SLOW_QUERY_LOG_MB = 10
+SLOW_QUERY_LOG_BACKUPS = 5
+
+# Registros mantidos em memória (SAEV_QUERY_METRICS_SIZE)
+DEFAULT_METRICS_SIZE = 5000
+
+# Tamanho máximo do SQL gravado em cada registro
+MAX_SQL_CHARS = 2000
+
+# Funções que apenas repassam a consulta (não identificam o widget de origem)
+WRAPPER_FUNCTIONS = {'get_data', 'get_aggregate', '_fetch_cached', 'recording_get_data'}
+
+# Camada de dados: quadros desta pasta também são ignorados na busca do caller
+_DATA_LAYER_DIR = str(Path(__file__).parent)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def sql_fingerprint(sql: str) -> str:
+    """Hash do SQL normalizado, sem literais (mesmo valor para o mesmo texto de consulta)"""
+    template = normalize_sql(sql)
+    template = _STRING_LITERAL.sub('?', template)
+    template = _NUMBER_LITERAL.sub('?', template)
+    template = _PLACEHOLDER_LIST.sub('(?, ...)', template)
+    return hashlib.sha1(template.lower().encode()).hexdigest()[:12]
+
+
+def resolve_caller(max_depth: int = 30) -> str:
+    """Widget/método que originou a consulta (``Classe.metodo`` ou ``modulo.funcao``)"""
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None and depth < max_depth:
+        code = frame.f_code
+        if code.co_name not in WRAPPER_FUNCTIONS and not code.co_filename.startswith(_DATA_LAYER_DIR):
+            instance = frame.f_locals.get('self')
+            if instance is not None:
+                return f"{type(instance).__name__}.{code.co_name}"
+            module = frame.f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+            return f"{module}.{code.co_name}"
+        frame = frame.f_back
+        depth += 1
+    return 'desconhecido'
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Bytes ocupados por um DataFrame (inclusive textos)"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class QueryMetrics:
+    """Registros recentes das consultas e log de consultas lentas"""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, log_path: Optional[str] = None,
+                 max_records: Optional[int] = None):
+        if slow_query_ms is None:
+            slow_query_ms = float(os.getenv('SAEV_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS))
+        if log_path is None:
+            log_path = os.getenv('SAEV_SLOW_QUERY_LOG', DEFAULT_SLOW_QUERY_LOG)
+        if max_records is None:
+            max_records = int(os.getenv('SAEV_QUERY_METRICS_SIZE', DEFAULT_METRICS_SIZE))
+
+        self.slow_query_ms = slow_query_ms
+        self.log_path = log_path or None
+        self._records: deque = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+
+    def _slow_query_logger(self) -> Optional[logging.Logger]:
+        """Logger com o arquivo rotativo, criado na primeira consulta lenta"""
+        if self.log_path is None:
+            return None
+        if self._logger is None:
+            Path(self.log_path).parent.mkdir(parents=True, exist_ok=True)
+            logger = logging.getLogger(f"saev.slow_queries.{Path(self.log_path).resolve()}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            if not logger.handlers:
+                max_bytes = int(float(os.getenv('SAEV_SLOW_QUERY_LOG_MB', DEFAULT_SLOW_QUERY_LOG_MB)) * 1024 * 1024)
+                handler = RotatingFileHandler(self.log_path, maxBytes=max_bytes,
+                                              backupCount=SLOW_QUERY_LOG_BACKUPS, encoding='utf-8')
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def record(self, engine: str, db_path: str, sql: str, seconds: float, rows: int,
+               bytes_: Optional[int], caller: Optional[str] = None, cached: bool = False,
+               error: Optional[Exception] = None) -> Dict[str, Any]:
+        """
+        Registra uma consulta executada
+
+        Returns:
+            O registro gravado
+        """
+        entry = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'caller': caller or 'desconhecido',
+            'engine': engine,
+            'db': Path(db_path).name,
+            'fingerprint': sql_fingerprint(sql),
+            'rows': rows,
+            'seconds': round(seconds, 6),
+            'bytes': bytes_,
+            'cached': cached,
+            'error': str(error) if error is not None else None,
+            'sql': normalize_sql(sql)[:MAX_SQL_CHARS],
+        }
+        with self._lock:
+            self._records.append(entry)
+
+        if seconds * 1000 >= self.slow_query_ms and not cached:
+            logger = self._slow_query_logger()
+            if logger is not None:
+                logger.info(json.dumps(entry, ensure_ascii=False))
+        return entry
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Cópia dos registros em memória (do mais antigo ao mais recente)"""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self):
+        """Descarta os registros em memória"""
+        with self._lock:
+            self._records.clear()
+
+    def slowest_callers(self, top_n: int = 10, include_cached: bool = False) -> pd.DataFrame:
+        """
+        Widgets mais lentos, pelo percentil 95 do tempo das consultas
+
+        Returns:
+            DataFrame com consultas, tempo total, médio, p95 e máximo (ms),
+            linhas e MB transferidos por caller
+        """
+        df = pd.DataFrame(self.records())
+        if df.empty:
+            return df
+        if not include_cached:
+            df = df[~df['cached']].copy()
+            if df.empty:
+                return df
+
+        df['ms'] = df['seconds'] * 1000
+        summary = df.groupby('caller').agg(
+            consultas=('ms', 'size'),
+            total_ms=('ms', 'sum'),
+            media_ms=('ms', 'mean'),
+            p95_ms=('ms', lambda values: values.quantile(0.95)),
+            max_ms=('ms', 'max'),
+            linhas=('rows', 'sum'),
+            mb=('bytes', lambda values: pd.to_numeric(values).fillna(0).sum() / 1024 ** 2),
+            motores=('engine', lambda values: ', '.join(sorted(set(values)))),
+        )
+        return summary.sort_values('p95_ms', ascending=False).head(top_n).round(2).reset_index()
+
+
+def read_slow_query_log(log_path: Optional[str] = None, limit: int = 100) -> pd.DataFrame:
+    """Últimas consultas lentas gravadas no log (inclusive de outros processos)"""
+    log_path = log_path if log_path is not None else get_query_metrics().log_path
+    if not log_path or not Path(log_path).exists():
+        return pd.DataFrame()
+
+    with open(log_path, encoding='utf-8') as handle:
+        lines = deque(handle, maxlen=limit)
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return pd.DataFrame(entries[::-1])
+
+
+_shared_metrics: Optional[QueryMetrics] = None
+_shared_metrics_lock = threading.Lock()
+
+
+def get_query_metrics() -> QueryMetrics:
+    """Instrumentação compartilhada pelo processo"""
+    global _shared_metrics
+    with _shared_metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = QueryMetrics()
+    return _shared_metrics
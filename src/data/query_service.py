@@ -0,0 +1,286 @@
+"""
+Serviço de consultas do SAEV, independente do Streamlit
+
+Mantém conexões somente leitura de longa duração com o banco (SQLite, DuckDB
+ou um conjunto Parquet exportado pelo ETL), compartilhadas por dashboards, galeria, analytics e relatórios do
+mesmo processo. Assim a abertura da conexão, a leitura do catálogo e o cache
+de páginas/buffers do motor são pagos uma única vez, e não a cada widget.
+
+- SQLite: um pequeno pool de conexões ``mode=ro`` por processo.
+- DuckDB: uma conexão ``read_only`` por processo e um pool de cursores, que
+  compartilham o mesmo catálogo e buffer cache.
+- Parquet: uma conexão DuckDB em memória por processo, com uma view por
+  tabela do conjunto (ver ``parquet_export``), e um pool de cursores.
+
+O Streamlit executa cada re-execução do script em uma thread nova, por isso
+as conexões não pertencem a uma thread: cada consulta empresta uma conexão
+livre do pool e a devolve ao terminar. Assim o cache de páginas de cada
+conexão SQLite sobrevive entre as interações, e consultas simultâneas de
+sessões diferentes não compartilham a mesma conexão ao mesmo tempo.
+
+As conexões DuckDB usam os limites de threads, memória e a pasta temporária
+de ``SAEVConfig.get_duckdb_settings`` (SAEV_DUCKDB_THREADS,
+SAEV_DUCKDB_MEMORY_LIMIT, SAEV_DUCKDB_TEMP_DIR).
+
+Se o arquivo do banco for substituído ou alterado por uma nova carga, as
+conexões são reabertas automaticamente na próxima consulta.
+
+Cada consulta é registrada na instrumentação do processo (``query_metrics``),
+com o widget de origem, tempo, linhas e bytes, e as lentas vão para o log de
+consultas lentas.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src.config import config
+from .parquet_export import register_parquet_views
+from .query_builder import SAEVQueryBuilder
+from .query_cache import get_query_cache, make_cache_key
+from .query_metrics import frame_bytes, get_query_metrics, resolve_caller
+
+# Motores suportados
+ENGINES = ('sqlite', 'duckdb', 'parquet')
+
+# Conexões (ou cursores) ociosas mantidas no pool de cada banco
+MAX_IDLE_CONNECTIONS = 4
+
+
+def detect_engine(db_path: str) -> str:
+    """Identifica o motor pelo caminho (.duckdb → DuckDB, diretório → Parquet)"""
+    if Path(db_path).is_dir():
+        return 'parquet'
+    return 'duckdb' if str(db_path).endswith('.duckdb') else 'sqlite'
+
+
+class SAEVQueryService:
+    """Pool de conexões somente leitura com interface única de consulta"""
+
+    def __init__(self, db_path: str, engine: Optional[str] = None):
+        """
+        Inicializa o serviço de consultas
+
+        Args:
+            db_path: Caminho do banco de dados
+            engine: 'sqlite', 'duckdb' ou 'parquet' (padrão: detectado pelo caminho)
+        """
+        self.db_path = str(Path(db_path).resolve())
+        self.engine = engine or detect_engine(db_path)
+        if self.engine not in ENGINES:
+            raise ValueError(f"Motor inválido: {self.engine} (use {', '.join(ENGINES)})")
+
+        self._lock = threading.Lock()
+        self._idle = []
+        self._duck_conn = None
+        self._file_state = None
+        self._generation = 0
+        self.builder = SAEVQueryBuilder(self.engine)
+
+    def _current_file_state(self) -> Optional[Tuple[int, int]]:
+        """Identidade do arquivo do banco (inode e mtime)"""
+        try:
+            stat = os.stat(self.db_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _check_reload(self):
+        """Descarta as conexões se o arquivo do banco mudou desde a abertura"""
+        state = self._current_file_state()
+        if state == self._file_state:
+            return
+
+        with self._lock:
+            if state != self._file_state:
+                self._discard_connections()
+                self._file_state = state
+
+    def _discard_connections(self):
+        """Fecha as conexões ociosas e invalida as emprestadas (chamar com ``_lock``)"""
+        for conn in self._idle:
+            conn.close()
+        self._idle = []
+        if self._duck_conn is not None:
+            self._duck_conn.close()
+            self._duck_conn = None
+        self._generation += 1
+
+    def _open_sqlite(self) -> sqlite3.Connection:
+        """Abre uma conexão SQLite somente leitura"""
+        uri = f"{Path(self.db_path).as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA cache_size = -65536")   # 64 MB de cache de páginas
+        conn.execute("PRAGMA mmap_size = 268435456")  # 256 MB mapeados em memória
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _open_duckdb(self):
+        """Abre a conexão DuckDB somente leitura compartilhada pelo processo"""
+        import duckdb
+        return duckdb.connect(self.db_path, read_only=True, config=config.get_duckdb_settings())
+
+    def _open_parquet(self):
+        """Abre a conexão DuckDB em memória com as views do conjunto Parquet"""
+        import duckdb
+        conn = duckdb.connect(config=config.get_duckdb_settings())
+        register_parquet_views(conn, self.db_path)
+        return conn
+
+    def _open_connection(self):
+        """Nova conexão (SQLite) ou cursor da conexão compartilhada (DuckDB)"""
+        if self.engine == 'sqlite':
+            return self._open_sqlite()
+        with self._lock:
+            if self._duck_conn is None:
+                if self.engine == 'parquet':
+                    self._duck_conn = self._open_parquet()
+                else:
+                    self._duck_conn = self._open_duckdb()
+            return self._duck_conn.cursor()
+
+    @contextmanager
+    def connection(self):
+        """
+        Empresta uma conexão (SQLite) ou cursor (DuckDB) do pool do processo
+
+        A conexão é de uso exclusivo dentro do bloco ``with`` e volta ao pool
+        ao final (ou é fechada, se o banco foi recarregado ou o pool está cheio).
+
+        Yields:
+            Objeto DB-API pronto para ``execute``
+        """
+        self._check_reload()
+        with self._lock:
+            generation = self._generation
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open_connection()
+
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if generation == self._generation and len(self._idle) < MAX_IDLE_CONNECTIONS:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def query(self, sql: str, params: Optional[Sequence] = None,
+              filters: Optional[Dict] = None, use_cache: bool = True,
+              caller: Optional[str] = None) -> pd.DataFrame:
+        """
+        Executa uma consulta e retorna um DataFrame
+
+        Args:
+            sql: Consulta SQL (com marcadores ``?`` para parâmetros)
+            params: Valores dos parâmetros
+            filters: Filtros do painel que originou a consulta (compõem a
+                chave do cache de resultados)
+            use_cache: Se False, ignora o cache de resultados
+            caller: Widget de origem na instrumentação (padrão: método que
+                chamou o ``get_data``)
+
+        Returns:
+            DataFrame com o resultado
+        """
+        metrics = get_query_metrics()
+        caller = caller or resolve_caller()
+        start_time = time.perf_counter()
+
+        if use_cache:
+            cache = get_query_cache()
+            key = make_cache_key(self.db_path, sql, params, filters)
+            cached = cache.get(self.db_path, key)
+            if cached is not None:
+                metrics.record(self.engine, self.db_path, sql, time.perf_counter() - start_time,
+                               len(cached), None, caller=caller, cached=True)
+                return cached
+
+        try:
+            with self.connection() as conn:
+                if self.engine == 'sqlite':
+                    df = pd.read_sql_query(sql, conn, params=params)
+                else:
+                    df = conn.execute(sql, params or []).fetchdf()
+        except Exception as e:
+            metrics.record(self.engine, self.db_path, sql, time.perf_counter() - start_time,
+                           0, None, caller=caller, error=e)
+            raise
+
+        elapsed = time.perf_counter() - start_time
+        size = frame_bytes(df)
+        if use_cache:
+            cache.put(self.db_path, key, df, size=size)
+        metrics.record(self.engine, self.db_path, sql, elapsed, len(df), size, caller=caller)
+        return df
+
+    def fetchall(self, sql: str, params: Optional[Sequence] = None,
+                 caller: Optional[str] = None) -> List[tuple]:
+        """Executa uma consulta e retorna as linhas como tuplas"""
+        start_time = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                rows = conn.execute(sql, params or []).fetchall()
+        except Exception as e:
+            get_query_metrics().record(self.engine, self.db_path, sql, time.perf_counter() - start_time,
+                                       0, None, caller=caller or resolve_caller(), error=e)
+            raise
+
+        get_query_metrics().record(self.engine, self.db_path, sql, time.perf_counter() - start_time,
+                                   len(rows), None, caller=caller or resolve_caller())
+        return rows
+
+    def table_names(self) -> List[str]:
+        """Nomes das tabelas e views do banco"""
+        if self.engine == 'sqlite':
+            sql = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+        else:
+            sql = "SELECT table_name FROM information_schema.tables"
+        return [row[0] for row in self.fetchall(sql)]
+
+    def has_tables(self, tables: Sequence[str]) -> bool:
+        """Verifica se todas as tabelas informadas existem"""
+        existing = set(self.table_names())
+        return all(table in existing for table in tables)
+
+    def close(self):
+        """Fecha as conexões do pool e invalida as que estão emprestadas"""
+        with self._lock:
+            self._discard_connections()
+            self._file_state = None
+
+
+_services: Dict[Tuple[str, str], SAEVQueryService] = {}
+_services_lock = threading.Lock()
+
+
+def get_query_service(db_path: str, engine: Optional[str] = None) -> SAEVQueryService:
+    """
+    Retorna o serviço de consultas do processo para um banco
+
+    Todos os front ends que usam o mesmo banco compartilham o mesmo serviço
+    (e, portanto, as mesmas conexões).
+    """
+    key = (str(Path(db_path).resolve()), engine or detect_engine(db_path))
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = SAEVQueryService(db_path, key[1])
+            _services[key] = service
+    return service
+
+
+def close_query_services():
+    """Fecha todos os serviços de consulta do processo"""
+    with _services_lock:
+        for service in _services.values():
+            service.close()
+        _services.clear()
@@ -0,0 +1,347 @@
+"""
+Tabelas de agregação (rollups) do Star Schema SAEV
+
+As visões dos dashboards agregam ``fato_resposta_aluno`` por município,
+escola ou descritor, sempre filtrando por ano, disciplina, teste e série. As
+tabelas abaixo guardam essas agregações prontas, no grão
+(AVA_ANO, DIS_NOME, TES_NOME, SER_NOME) + dimensão da visão:
+
+- agg_municipio: MUN_UF, MUN_NOME (alunos e escolas distintos)
+- agg_escola: MUN_UF, MUN_NOME, ESC_INEP (alunos distintos)
+- agg_descritor: MTI_CODIGO (alunos distintos)
+
+A contagem de alunos distintos de uma linha não pode ser somada livremente
+entre linhas: um aluno presente em duas séries seria contado duas vezes. Por
+isso ``agg_unicidade`` registra, por (AVA_ANO, DIS_NOME), se cada aluno
+aparece em uma única série, escola e município dentro de cada teste (e se
+cada escola pertence a um único município); o ``RollupRouter`` só soma
+contagens distintas quando a soma é exata e, caso contrário, usa a próxima
+tabela capaz de responder (em último caso, a fato).
+
+As funções recebem uma conexão DB-API (sqlite3 ou DuckDB).
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .query_builder import SAEVQueryBuilder
+
+# Dimensões de filtro dos dashboards (prefixo de todas as rollups)
+ROLLUP_FILTER_COLUMNS = ['AVA_ANO', 'DIS_NOME', 'TES_NOME', 'SER_NOME']
+
+# Definição das rollups: colunas de grão e contagens distintas armazenadas
+ROLLUP_TABLES = {
+    'agg_municipio': {
+        'keys': ROLLUP_FILTER_COLUMNS + ['MUN_UF', 'MUN_NOME'],
+        'distinct': {'ALU_ID': 'QTD_ALUNOS', 'ESC_INEP': 'QTD_ESCOLAS'},
+    },
+    'agg_escola': {
+        'keys': ROLLUP_FILTER_COLUMNS + ['MUN_UF', 'MUN_NOME', 'ESC_INEP'],
+        'distinct': {'ALU_ID': 'QTD_ALUNOS'},
+    },
+    'agg_descritor': {
+        'keys': ROLLUP_FILTER_COLUMNS + ['MTI_CODIGO'],
+        'distinct': {'ALU_ID': 'QTD_ALUNOS'},
+    },
+}
+
+# Tipos das colunas de grão (mesmos da tabela avaliacao)
+ROLLUP_COLUMN_TYPES = {
+    'AVA_ANO': 'INTEGER',
+    'DIS_NOME': 'VARCHAR(30)',
+    'TES_NOME': 'VARCHAR(30)',
+    'SER_NOME': 'VARCHAR(30)',
+    'MUN_UF': 'CHAR(2)',
+    'MUN_NOME': 'VARCHAR(60)',
+    'ESC_INEP': 'CHAR(8)',
+    'MTI_CODIGO': 'VARCHAR(15)',
+}
+
+# Grão de atualização das rollups na carga incremental
+ROLLUP_PARTITION_FILTER = "AVA_ANO IS ? AND DIS_NOME IS ?"
+
+# Dimensão de unicidade de cada coluna de grão (ver agg_unicidade)
+UNIQUENESS_DIMENSIONS = {
+    'SER_NOME': 'SER_NOME',
+    'ESC_INEP': 'ESC_INEP',
+    'MUN_UF': 'MUNICIPIO',
+    'MUN_NOME': 'MUNICIPIO',
+}
+
+# Colunas obtidas por junção com as dimensões: coluna -> (tabela, alias, chave)
+JOIN_COLUMNS = {
+    'ESC_NOME': ('dim_escola', 'e', 'ESC_INEP'),
+    'MTI_DESCRITOR': ('dim_descritor', 'd', 'MTI_CODIGO'),
+}
+
+# Medidas disponíveis para as consultas roteadas
+SUM_MEASURES = {
+    'total_acertos': "SUM(f.ACERTO)",
+    'total_questoes': "SUM(f.ACERTO + f.ERRO)",
+    'taxa_acerto': "ROUND((SUM(f.ACERTO) * 100.0) / SUM(f.ACERTO + f.ERRO), 2)",
+}
+DISTINCT_MEASURES = {
+    'total_alunos': 'ALU_ID',
+    'total_escolas': 'ESC_INEP',
+    'total_municipios': 'MUN_NOME',
+}
+
+FACT_TABLE = 'fato_resposta_aluno'
+
+
+def _rollup_select(table: str, where: str = "") -> str:
+    """SELECT que calcula uma rollup a partir da tabela fato"""
+    spec = ROLLUP_TABLES[table]
+    keys = ", ".join(spec['keys'])
+    distinct = ", ".join(
+        f"COUNT(DISTINCT {column}) AS {alias}" for column, alias in spec['distinct'].items()
+    )
+    return f"""
+        SELECT {keys}, {distinct},
+            CAST(SUM(ACERTO) AS INTEGER) AS ACERTO,
+            CAST(SUM(ERRO) AS INTEGER) AS ERRO
+        FROM {FACT_TABLE}
+        {where}
+        GROUP BY {keys}
+    """
+
+
+UNIQUENESS_SELECT = """
+    WITH alunos AS (
+        SELECT AVA_ANO, DIS_NOME, TES_NOME, ALU_ID,
+            COUNT(DISTINCT SER_NOME) AS QTD_SER_NOME,
+            COUNT(DISTINCT ESC_INEP) AS QTD_ESC_INEP,
+            COUNT(DISTINCT MUN_UF || '/' || MUN_NOME) AS QTD_MUNICIPIO
+        FROM fato_resposta_aluno
+        {where}
+        GROUP BY AVA_ANO, DIS_NOME, TES_NOME, ALU_ID
+    ), escolas AS (
+        SELECT AVA_ANO, DIS_NOME, ESC_INEP,
+            COUNT(DISTINCT MUN_UF || '/' || MUN_NOME) AS QTD_MUNICIPIO
+        FROM fato_resposta_aluno
+        {where}
+        GROUP BY AVA_ANO, DIS_NOME, ESC_INEP
+    )
+    SELECT AVA_ANO, DIS_NOME, 'ALU_ID', 'SER_NOME', CAST(MAX(QTD_SER_NOME) <= 1 AS INTEGER)
+    FROM alunos GROUP BY AVA_ANO, DIS_NOME
+    UNION ALL
+    SELECT AVA_ANO, DIS_NOME, 'ALU_ID', 'ESC_INEP', CAST(MAX(QTD_ESC_INEP) <= 1 AS INTEGER)
+    FROM alunos GROUP BY AVA_ANO, DIS_NOME
+    UNION ALL
+    SELECT AVA_ANO, DIS_NOME, 'ALU_ID', 'MUNICIPIO', CAST(MAX(QTD_MUNICIPIO) <= 1 AS INTEGER)
+    FROM alunos GROUP BY AVA_ANO, DIS_NOME
+    UNION ALL
+    SELECT AVA_ANO, DIS_NOME, 'ESC_INEP', 'MUNICIPIO', CAST(MAX(QTD_MUNICIPIO) <= 1 AS INTEGER)
+    FROM escolas GROUP BY AVA_ANO, DIS_NOME
+"""
+
+
+def create_rollup_tables(conn):
+    """Cria as tabelas de rollup (vazias) se ainda não existirem"""
+    for table, spec in ROLLUP_TABLES.items():
+        columns = [f"{column} {ROLLUP_COLUMN_TYPES[column]}" for column in spec['keys']]
+        columns += [f"{alias} INTEGER" for alias in spec['distinct'].values()]
+        columns += ["ACERTO INTEGER", "ERRO INTEGER"]
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table} ON {table} ({', '.join(ROLLUP_FILTER_COLUMNS)})"
+        )
+
+    # UNICA = 1 se cada entidade (aluno ou escola) tem um único valor da
+    # dimensão dentro de cada teste da partição
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agg_unicidade (
+            AVA_ANO INTEGER,
+            DIS_NOME VARCHAR(30),
+            ENTIDADE VARCHAR(10),
+            DIMENSAO VARCHAR(10),
+            UNICA INTEGER
+        )
+    """)
+
+
+def build_rollups(conn, partitions: Optional[Iterable[Tuple]] = None) -> Dict[str, int]:
+    """
+    Constrói (ou atualiza) as rollups a partir de fato_resposta_aluno
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB
+        partitions: Chaves (AVA_ANO, DIS_NOME) a recalcular. Se None, todas as
+            rollups são reconstruídas do zero. A atualização por partição usa
+            ``IS ?`` e é feita apenas no SQLite (carga incremental)
+
+    Returns:
+        Quantidade de linhas de cada rollup
+    """
+    create_rollup_tables(conn)
+    tables = list(ROLLUP_TABLES) + ['agg_unicidade']
+
+    if partitions is None:
+        for table in tables:
+            conn.execute(f"DELETE FROM {table}")
+            select = UNIQUENESS_SELECT.format(where="") if table == 'agg_unicidade' else _rollup_select(table)
+            conn.execute(f"INSERT INTO {table} {select}")
+    else:
+        where = f"WHERE {ROLLUP_PARTITION_FILTER}"
+        for key in sorted(set(partitions), key=str):
+            for table in tables:
+                conn.execute(f"DELETE FROM {table} WHERE {ROLLUP_PARTITION_FILTER}", key)
+                select = (UNIQUENESS_SELECT.format(where=where) if table == 'agg_unicidade'
+                          else _rollup_select(table, where))
+                conn.execute(f"INSERT INTO {table} {select}", tuple(key) * select.count(where))
+
+    return {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ROLLUP_TABLES
+    }
+
+
+class RollupRouter:
+    """
+    Monta consultas agregadas usando a menor tabela capaz de respondê-las
+
+    Uma rollup responde uma consulta se contém todas as colunas de filtro e de
+    agrupamento (ou as chaves das dimensões unidas) e se cada medida pode ser
+    calculada de forma exata a partir dela.
+    """
+
+    def __init__(self, fetchall, builder: Optional[SAEVQueryBuilder] = None):
+        """
+        Args:
+            fetchall: Função ``fetchall(sql) -> lista de tuplas`` usada para ler
+                os metadados (tamanho das rollups e flags de unicidade)
+            builder: Gerador de condições parametrizadas do motor (padrão: SQLite)
+        """
+        self._fetchall = fetchall
+        self.builder = builder or SAEVQueryBuilder('sqlite')
+        self.row_counts: Dict[str, int] = {}
+        self.uniqueness: Dict[Tuple[str, str], bool] = {}
+
+    def refresh(self, available_tables: Sequence[str]):
+        """Lê tamanho das rollups disponíveis e flags de unicidade"""
+        self.row_counts = {
+            table: self._fetchall(f"SELECT COUNT(*) FROM {table}")[0][0]
+            for table in ROLLUP_TABLES if table in available_tables
+        }
+        self.uniqueness = {}
+        if 'agg_unicidade' in available_tables and self.row_counts:
+            self.uniqueness = {
+                (entity, dimension): bool(unique)
+                for entity, dimension, unique in self._fetchall(
+                    "SELECT ENTIDADE, DIMENSAO, MIN(UNICA) FROM agg_unicidade GROUP BY ENTIDADE, DIMENSAO"
+                )
+            }
+
+    def _is_unique(self, entity: str, column: str) -> bool:
+        """Cada entidade pertence a um único valor da coluna (em todas as partições)?"""
+        return self.uniqueness.get((entity, UNIQUENESS_DIMENSIONS.get(column)), False)
+
+    def _distinct_expression(self, table: str, entity: str, keys: List[str],
+                             grouped: List[str], pinned: List[str]) -> Optional[str]:
+        """Expressão exata para contar entidades distintas na tabela (ou None)"""
+        if entity in keys:
+            return f"COUNT(DISTINCT f.{entity})"
+
+        stored = ROLLUP_TABLES[table]['distinct'].get(entity)
+        if stored is None:
+            return None
+
+        collapsed = [column for column in keys if column not in grouped and column not in pinned]
+        if all(self._is_unique(entity, column) for column in collapsed):
+            return f"CAST(SUM(f.{stored}) AS BIGINT)"
+        return None
+
+    def choose_table(self, group_by: Sequence[str], measures: Sequence[str],
+                     filters: Dict) -> Tuple[str, Dict[str, str]]:
+        """
+        Escolhe a tabela para uma consulta
+
+        Returns:
+            Tupla (tabela, expressões SQL das medidas)
+        """
+        fact_measures = {
+            measure: SUM_MEASURES.get(measure) or f"COUNT(DISTINCT f.{DISTINCT_MEASURES[measure]})"
+            for measure in measures
+        }
+
+        needed = set(filters)
+        grouped = []
+        for column in group_by:
+            if column in JOIN_COLUMNS:
+                needed.add(JOIN_COLUMNS[column][2])
+            else:
+                needed.add(column)
+                grouped.append(column)
+        pinned = [column for column, value in filters.items() if len(_as_list(value)) == 1]
+
+        for table in sorted(self.row_counts, key=self.row_counts.get):
+            keys = ROLLUP_TABLES[table]['keys']
+            if not needed <= set(keys):
+                continue
+
+            expressions = {}
+            for measure in measures:
+                if measure in SUM_MEASURES:
+                    expressions[measure] = SUM_MEASURES[measure]
+                else:
+                    expressions[measure] = self._distinct_expression(
+                        table, DISTINCT_MEASURES[measure], keys, grouped, pinned
+                    )
+            if all(expressions.values()):
+                return table, expressions
+
+        return FACT_TABLE, fact_measures
+
+    def build_query(self, group_by: Sequence[str], measures: Sequence[str], filters: Dict,
+                    order_by: Optional[str] = None) -> Tuple[str, list]:
+        """
+        Monta a consulta agregada roteada
+
+        Args:
+            group_by: Colunas de agrupamento (da fato ou ESC_NOME/MTI_DESCRITOR)
+            measures: Medidas (chaves de SUM_MEASURES e DISTINCT_MEASURES)
+            filters: Coluna -> valor ou lista de valores (listas vazias são ignoradas)
+            order_by: Cláusula ORDER BY opcional (ex.: 'taxa_acerto DESC')
+
+        Returns:
+            Tupla (sql, parâmetros)
+        """
+        filters = {column: value for column, value in filters.items()
+                   if value is not None and len(_as_list(value)) > 0}
+        table, expressions = self.choose_table(group_by, measures, filters)
+
+        select_columns = []
+        joins = []
+        for column in group_by:
+            if column in JOIN_COLUMNS:
+                join_table, alias, join_key = JOIN_COLUMNS[column]
+                join_sql = f"JOIN {join_table} {alias} ON f.{join_key} = {alias}.{join_key}"
+                if join_sql not in joins:
+                    joins.append(join_sql)
+                select_columns.append(f"{alias}.{column}")
+            else:
+                select_columns.append(f"f.{column}")
+
+        where_clause, params = self.builder.where(
+            {column: value if len(_as_list(value)) > 1 else _as_list(value)[0]
+             for column, value in filters.items()},
+            alias='f'
+        )
+
+        select_list = select_columns + [f"{sql} as {measure}" for measure, sql in expressions.items()]
+        query = f"SELECT {', '.join(select_list)}\nFROM {table} f"
+        if joins:
+            query += "\n" + "\n".join(joins)
+        if where_clause:
+            query += "\n" + where_clause
+        if select_columns:
+            query += "\nGROUP BY " + ", ".join(select_columns)
+        if order_by:
+            query += f"\nORDER BY {order_by}"
+
+        return query, params
+
+
+def _as_list(value) -> list:
+    """Normaliza um valor de filtro para lista"""
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
@@ -0,0 +1,266 @@
+"""
+Execução em processo de scripts SQL do SAEV (ex.: src/star_schema.sql)
+
+O script é escrito para o cliente de linha de comando do SQLite, com comandos
+``.print`` entre as instruções. Aqui ele é dividido em etapas e executado
+diretamente sobre uma conexão DB-API (sqlite3 ou DuckDB), permitindo usar o
+mesmo script nos dois motores.
+
+No SQLite o script pode ser executado em uma única transação explícita (uma
+falha desfaz a transformação inteira, e o banco não paga um commit por
+instrução), com os PRAGMAs de ``SQLITE_BATCH_PRAGMAS``. O ``VACUUM`` do
+script só reescreve o arquivo quando há páginas livres suficientes para
+compensar (ver ``vacuum_if_worthwhile``).
+"""
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# PRAGMAs do SQLite durante transformações em lote (restaurados ao final)
+SQLITE_BATCH_PRAGMAS = {
+    'journal_mode': 'WAL',     # leitores continuam vendo a versão anterior
+    'synchronous': 'NORMAL',   # sem fsync a cada commit (seguro com WAL)
+    'cache_size': -262144,     # 256 MB de cache de páginas
+    'temp_store': 'MEMORY',    # ordenações e tabelas temporárias em memória
+}
+
+# PRAGMAs da carga em massa da tabela avaliacao: como o SQLite é recriado do
+# zero a partir dos CSVs, a carga dispensa fsync (synchronous = OFF)
+SQLITE_BULK_LOAD_PRAGMAS = {**SQLITE_BATCH_PRAGMAS, 'synchronous': 'OFF'}
+
+# Fração mínima de páginas livres para que o VACUUM valha a pena
+VACUUM_MIN_FREE_RATIO = 0.10
+
+# Instruções cujo número de linhas afetadas é registrado
+_DML_KEYWORDS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+# Palavras que encerram o rótulo de uma instrução no log
+_LABEL_STOP_WORDS = ('SELECT', 'AS', 'VALUES', 'WHERE', 'FROM')
+
+
+def split_sql_script(script: str) -> List[Tuple[str, str]]:
+    """
+    Divide um script SQL em etapas
+
+    Args:
+        script: Conteúdo do script
+
+    Returns:
+        Lista de tuplas ``('print', mensagem)`` para comandos ``.print`` e
+        ``('sql', instrução)`` para cada instrução SQL completa
+    """
+    steps = []
+    buffer = []
+    in_block_comment = False
+
+    for line in script.splitlines():
+        stripped = line.strip()
+
+        # Fora de uma instrução: descartar comentários e linhas em branco
+        if not buffer:
+            if in_block_comment:
+                in_block_comment = '*/' not in stripped
+                continue
+            if stripped.startswith('/*'):
+                in_block_comment = '*/' not in stripped
+                continue
+            if not stripped or stripped.startswith('--'):
+                continue
+
+            # Comandos do cliente sqlite3
+            if stripped.startswith('.'):
+                if stripped.startswith('.print'):
+                    message = stripped[len('.print'):].strip().strip('"')
+                    steps.append(('print', message))
+                continue
+
+        buffer.append(line)
+        statement = "\n".join(buffer)
+        if sqlite3.complete_statement(statement):
+            steps.append(('sql', statement.strip()))
+            buffer = []
+
+    return steps
+
+
+def script_statement(script_path, prefix: str) -> str:
+    """
+    Retorna a instrução de um script SQL que começa com ``prefix``
+
+    Permite que outro código reuse uma instrução do script (ex.: o INSERT da
+    fato na carga incremental) em vez de manter uma cópia dela.
+
+    Raises:
+        ValueError: Se nenhuma instrução (ou mais de uma) começa com ``prefix``
+    """
+    script = Path(script_path).read_text(encoding='utf-8')
+    matches = [content for kind, content in split_sql_script(script)
+               if kind == 'sql' and content.upper().startswith(prefix.upper())]
+    if len(matches) != 1:
+        raise ValueError(f"{len(matches)} instruções começando com '{prefix}' em {script_path}")
+    return matches[0]
+
+
+def _first_keyword(statement: str) -> str:
+    """Retorna a primeira palavra-chave da instrução, ignorando comentários"""
+    for line in statement.splitlines():
+        line = line.split('--', 1)[0].strip()
+        if line and not line.startswith('/*') and not line.startswith('*'):
+            return line.split()[0].rstrip(';').upper()
+    return ''
+
+
+def statement_label(statement: str) -> str:
+    """Rótulo curto da instrução para o log (ex.: 'INSERT INTO dim_aluno')"""
+    words = []
+    for line in statement.splitlines():
+        line = line.split('--', 1)[0].strip()
+        if not line or line.startswith('/*') or line.startswith('*'):
+            continue
+        for word in line.split():
+            if words and ('(' in word or word.upper() in _LABEL_STOP_WORDS or len(words) == 6):
+                return ' '.join(words)
+            words.append(word.rstrip(';'))
+    return ' '.join(words)
+
+
+@contextmanager
+def tuned_pragmas(conn: sqlite3.Connection, pragmas: Dict[str, object]):
+    """
+    Aplica PRAGMAs a uma conexão SQLite e restaura os valores anteriores na saída
+
+    Uma transação pendente é desfeita antes da restauração (o journal_mode
+    não pode ser alterado dentro de uma transação).
+
+    Yields:
+        Dicionário com os valores anteriores de cada PRAGMA
+    """
+    previous = {name: conn.execute(f"PRAGMA {name}").fetchone()[0] for name in pragmas}
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    try:
+        yield previous
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        for name, value in previous.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+
+
+def vacuum_if_worthwhile(conn: sqlite3.Connection, logger,
+                         min_free_ratio: float = VACUUM_MIN_FREE_RATIO) -> str:
+    """
+    Executa o VACUUM apenas quando há páginas livres suficientes
+
+    Abaixo de ``min_free_ratio`` o VACUUM é dispensado (reescreveria o
+    arquivo inteiro para recuperar pouco espaço). Acima, bancos com
+    ``auto_vacuum = INCREMENTAL`` liberam as páginas com
+    ``PRAGMA incremental_vacuum``; os demais usam o VACUUM completo.
+
+    Returns:
+        'skipped', 'incremental' ou 'full'
+    """
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    free_ratio = freelist_count / page_count if page_count else 0.0
+
+    if free_ratio < min_free_ratio:
+        logger.info(f"🧹 VACUUM dispensado: {free_ratio:.1%} de páginas livres")
+        return 'skipped'
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+        logger.info(f"🧹 VACUUM incremental: {freelist_count:,} páginas livres liberadas")
+        return 'incremental'
+
+    conn.execute("VACUUM")
+    logger.info(f"🧹 VACUUM completo: {free_ratio:.1%} de páginas livres")
+    return 'full'
+
+
+def run_sql_script(conn, script_path, logger, transactional: bool = False) -> List[dict]:
+    """
+    Executa um script SQL etapa a etapa, registrando o tempo de cada instrução
+
+    Consultas ``SELECT`` do script (usadas como contagens de conferência)
+    têm o resultado registrado no log; para INSERT/UPDATE/DELETE é registrado
+    o número de linhas afetadas. No SQLite, o ``VACUUM`` do script passa por
+    ``vacuum_if_worthwhile``.
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB
+        script_path: Caminho do script SQL
+        logger: Logger usado para as mensagens de progresso
+        transactional: Executa as instruções em uma transação explícita
+            (confirmada antes de cada VACUUM e ao final; desfeita em caso de erro)
+
+    Returns:
+        Lista com ``{'statement', 'seconds', 'rows', 'result'}`` para cada instrução
+    """
+    script = Path(script_path).read_text(encoding='utf-8')
+    is_sqlite = isinstance(conn, sqlite3.Connection)
+    timings = []
+
+    if transactional and is_sqlite:
+        isolation_level = conn.isolation_level
+        conn.isolation_level = None  # BEGIN/COMMIT controlados aqui
+    in_transaction = False
+
+    try:
+        for kind, content in split_sql_script(script):
+            if kind == 'print':
+                if content:
+                    logger.info(content)
+                continue
+
+            keyword = _first_keyword(content)
+            start_time = time.time()
+            rows = None
+            result = None
+
+            if keyword == 'VACUUM':
+                if in_transaction:
+                    conn.execute("COMMIT")
+                    in_transaction = False
+                if is_sqlite:
+                    result = vacuum_if_worthwhile(conn, logger)
+                else:
+                    conn.execute(content)
+            else:
+                if transactional and not in_transaction:
+                    conn.execute("BEGIN")
+                    in_transaction = True
+
+                cursor = conn.execute(content)
+                if keyword == 'SELECT':
+                    row = cursor.fetchone()
+                    result = row[0] if row else None
+                    logger.info(f"   ↳ {result:,} registros" if isinstance(result, int) else f"   ↳ {result}")
+                elif keyword in _DML_KEYWORDS:
+                    if is_sqlite:
+                        rows = cursor.rowcount if cursor.rowcount >= 0 else None
+                    else:
+                        row = cursor.fetchone()
+                        rows = row[0] if row else None
+
+            elapsed = time.time() - start_time
+            if keyword not in ('SELECT', 'VACUUM'):
+                rows_text = f"{rows:,} linhas, " if rows is not None else ""
+                logger.info(f"   ⏱️ {statement_label(content)}: {rows_text}{elapsed:.2f}s")
+
+            timings.append({'statement': content, 'seconds': elapsed, 'rows': rows, 'result': result})
+
+        if in_transaction:
+            conn.execute("COMMIT")
+            in_transaction = False
+    except Exception:
+        if in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        if transactional and is_sqlite:
+            conn.isolation_level = isolation_level
+
+    return timings
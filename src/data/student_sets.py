@@ -0,0 +1,323 @@
+"""
+Conjuntos de alunos por célula para contagens distintas sem reler a fato
+
+``COUNT(DISTINCT ALU_ID)`` é o agregado mais caro das consultas dos painéis e
+não pode ser somado entre rollups. Aqui, para cada célula
+(AVA_ANO, DIS_NOME, TES_NOME, SER_NOME, MUN_UF, MUN_NOME, ESC_INEP) é
+guardado o conjunto dos alunos em ``agg_alunos_celula``, junto com a
+contagem e as somas de acertos e erros. A quantidade de alunos de qualquer
+combinação de filtros é obtida pela união dos conjuntos das células
+selecionadas.
+
+Dois modos de codificação (coluna CODIFICACAO):
+
+- ``exato``: IDs ordenados, codificados em deltas e comprimidos com zlib
+  (união exata)
+- ``aproximado``: registradores HyperLogLog (2^12 registradores, erro
+  padrão ~1,6%), também comprimidos; tamanho limitado por célula
+
+O modo é escolhido na construção (parâmetro ``mode`` ou variável de ambiente
+SAEV_DISTINCT_MODE).
+"""
+import os
+import zlib
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .query_builder import SAEVQueryBuilder
+
+# Colunas que definem uma célula
+CELL_COLUMNS = ['AVA_ANO', 'DIS_NOME', 'TES_NOME', 'SER_NOME', 'MUN_UF', 'MUN_NOME', 'ESC_INEP']
+
+CELL_TABLE = 'agg_alunos_celula'
+
+MODE_EXACT = 'exato'
+MODE_APPROX = 'aproximado'
+MODES = (MODE_EXACT, MODE_APPROX)
+
+# Linhas (aluno x célula) lidas da fato por vez na construção
+FETCH_BATCH_SIZE = 100_000
+
+# Precisão do HyperLogLog (quantidade de registradores = 2^HLL_PRECISION)
+HLL_PRECISION = 12
+
+_MASK64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def default_mode() -> str:
+    """Modo configurado em SAEV_DISTINCT_MODE (padrão: exato)"""
+    mode = os.getenv('SAEV_DISTINCT_MODE', MODE_EXACT).lower()
+    if mode not in MODES:
+        raise ValueError(f"Modo de contagem inválido: {mode} (use {', '.join(MODES)})")
+    return mode
+
+
+# --- Conjuntos exatos ----------------------------------------------------------
+
+def encode_exact(ids: np.ndarray) -> bytes:
+    """Codifica IDs (únicos) como deltas ordenados comprimidos"""
+    ids = np.unique(np.asarray(ids, dtype=np.int64))
+    deltas = np.diff(ids, prepend=np.int64(0))
+    return zlib.compress(deltas.astype('<i8').tobytes())
+
+
+def decode_exact(blob: bytes) -> np.ndarray:
+    """Decodifica um conjunto exato para o vetor ordenado de IDs"""
+    return np.cumsum(np.frombuffer(zlib.decompress(blob), dtype='<i8'))
+
+
+# --- HyperLogLog ---------------------------------------------------------------
+
+def _hash64(ids: np.ndarray) -> np.ndarray:
+    """Hash de 64 bits (finalizador splitmix64) vetorizado"""
+    with np.errstate(over='ignore'):
+        x = np.asarray(ids, dtype=np.int64).astype(np.uint64)
+        x = (x + np.uint64(0x9E3779B97F4A7C15)) & _MASK64
+        x = ((x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)) & _MASK64
+        x = ((x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)) & _MASK64
+        return x ^ (x >> np.uint64(31))
+
+
+def _bit_length32(values: np.ndarray) -> np.ndarray:
+    """Quantidade de bits significativos de inteiros de até 32 bits"""
+    result = np.zeros(values.shape, dtype=np.int64)
+    nonzero = values > 0
+    result[nonzero] = np.floor(np.log2(values[nonzero].astype(np.float64))).astype(np.int64) + 1
+    return result
+
+
+def hll_registers(ids: np.ndarray, precision: int = HLL_PRECISION) -> np.ndarray:
+    """Registradores HyperLogLog de um conjunto de IDs"""
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    if len(ids) == 0:
+        return registers
+
+    hashes = _hash64(ids)
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    remaining = (hashes << np.uint64(precision)) & _MASK64
+
+    high = remaining >> np.uint64(32)
+    low = remaining & np.uint64(0xFFFFFFFF)
+    leading_zeros = np.where(high > 0, 32 - _bit_length32(high), 64 - _bit_length32(low))
+    rank = np.minimum(leading_zeros + 1, 64 - precision + 1).astype(np.uint8)
+
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> int:
+    """Estimativa de cardinalidade (com correção para conjuntos pequenos)"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros > 0:
+        estimate = m * np.log(m / zeros)
+
+    return int(round(estimate))
+
+
+def encode_approx(ids: np.ndarray) -> bytes:
+    """Codifica IDs como registradores HyperLogLog comprimidos"""
+    return zlib.compress(hll_registers(ids).tobytes())
+
+
+def decode_approx(blob: bytes) -> np.ndarray:
+    """Decodifica registradores HyperLogLog"""
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+
+
+# --- Construção ------------------------------------------------------------------
+
+def create_student_set_table(conn):
+    """Cria a tabela de conjuntos de alunos (vazia) se ainda não existir"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CELL_TABLE} (
+            AVA_ANO INTEGER,
+            DIS_NOME VARCHAR(30),
+            TES_NOME VARCHAR(30),
+            SER_NOME VARCHAR(30),
+            MUN_UF CHAR(2),
+            MUN_NOME VARCHAR(60),
+            ESC_INEP CHAR(8),
+            QTD_ALUNOS INTEGER,
+            ACERTO INTEGER,
+            ERRO INTEGER,
+            CODIFICACAO VARCHAR(10),
+            ALUNOS BLOB
+        )
+    """)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{CELL_TABLE} ON {CELL_TABLE} (AVA_ANO, DIS_NOME, TES_NOME)"
+    )
+
+
+def _partition_where(key: Tuple) -> Tuple[str, list]:
+    """Filtro de uma partição (AVA_ANO, DIS_NOME), tratando valores nulos"""
+    conditions = []
+    params = []
+    for column, value in zip(['AVA_ANO', 'DIS_NOME'], key):
+        if value is None:
+            conditions.append(f"{column} IS NULL")
+        else:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    return " AND ".join(conditions), params
+
+
+def _cell_record(cell: Tuple, ids: list, acertos: int, erros: int, mode: str, encode) -> tuple:
+    """Linha de agg_alunos_celula para uma célula completa"""
+    return tuple(cell) + (len(ids), int(acertos), int(erros), mode,
+                          encode(np.asarray(ids, dtype=np.int64)))
+
+
+def build_student_sets(conn, partitions: Optional[Iterable[Tuple]] = None,
+                       mode: Optional[str] = None) -> int:
+    """
+    Constrói (ou atualiza) os conjuntos de alunos por célula
+
+    A fato é lida uma partição (AVA_ANO, DIS_NOME) por vez, ordenada pela
+    chave da célula e em lotes de ``FETCH_BATCH_SIZE`` linhas; cada célula é
+    codificada assim que termina. Em memória ficam um lote e os conjuntos já
+    codificados da partição, não o agrupamento por aluno inteiro.
+
+    Args:
+        conn: Conexão sqlite3 ou DuckDB
+        partitions: Chaves (AVA_ANO, DIS_NOME) a recalcular. Se None, a tabela
+            é reconstruída do zero
+        mode: 'exato' ou 'aproximado' (padrão: SAEV_DISTINCT_MODE)
+
+    Returns:
+        Quantidade de células gravadas
+    """
+    mode = mode or default_mode()
+    encode = encode_exact if mode == MODE_EXACT else encode_approx
+    create_student_set_table(conn)
+
+    if partitions is None:
+        conn.execute(f"DELETE FROM {CELL_TABLE}")
+        partitions = conn.execute(
+            "SELECT DISTINCT AVA_ANO, DIS_NOME FROM fato_resposta_aluno"
+        ).fetchall()
+
+    keys = ", ".join(CELL_COLUMNS)
+    placeholders = ", ".join("?" for _ in range(len(CELL_COLUMNS) + 5))
+    width = len(CELL_COLUMNS)
+    cells_written = 0
+
+    for key in sorted(set(map(tuple, partitions)), key=str):
+        where, params = _partition_where(key)
+        conn.execute(f"DELETE FROM {CELL_TABLE} WHERE {where}", params)
+
+        cursor = conn.execute(f"""
+            SELECT {keys}, ALU_ID, SUM(ACERTO), SUM(ERRO)
+            FROM fato_resposta_aluno
+            WHERE {where} AND ALU_ID IS NOT NULL
+            GROUP BY {keys}, ALU_ID
+            ORDER BY {keys}, ALU_ID
+        """, params)
+
+        # As inserções ficam para depois da leitura: no DuckDB, um novo
+        # execute na mesma conexão descartaria o resultado pendente
+        records = []
+        cell, ids, acertos, erros = None, [], 0, 0
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                row_cell = tuple(row[:width])
+                if row_cell != cell:
+                    if ids:
+                        records.append(_cell_record(cell, ids, acertos, erros, mode, encode))
+                    cell, ids, acertos, erros = row_cell, [], 0, 0
+                ids.append(row[width])
+                acertos += row[width + 1] or 0
+                erros += row[width + 2] or 0
+        if ids:
+            records.append(_cell_record(cell, ids, acertos, erros, mode, encode))
+
+        if records:
+            conn.executemany(f"INSERT INTO {CELL_TABLE} ({keys}, QTD_ALUNOS, ACERTO, ERRO, CODIFICACAO, ALUNOS) "
+                             f"VALUES ({placeholders})", records)
+        cells_written += len(records)
+
+    return cells_written
+
+
+# --- Consulta --------------------------------------------------------------------
+
+def cell_filter_sql(filters: Dict[str, Sequence],
+                    builder: Optional[SAEVQueryBuilder] = None) -> Tuple[str, list]:
+    """
+    Cláusula WHERE (com parâmetros) para selecionar células
+
+    Args:
+        filters: Coluna de célula -> lista de valores aceitos (listas vazias
+            ou None são ignoradas)
+        builder: Gerador de condições parametrizadas do motor (padrão: SQLite)
+    """
+    for column in filters:
+        if column not in CELL_COLUMNS:
+            raise ValueError(f"Coluna {column} não faz parte da célula de alunos")
+
+    builder = builder or SAEVQueryBuilder('sqlite')
+    return builder.where({column: list(values) if values else None
+                          for column, values in filters.items()})
+
+
+def count_students(cells: pd.DataFrame) -> int:
+    """
+    Quantidade de alunos distintos na união das células
+
+    Args:
+        cells: Linhas de agg_alunos_celula (colunas CODIFICACAO e ALUNOS)
+    """
+    if cells.empty:
+        return 0
+
+    encodings = set(cells['CODIFICACAO'])
+    if encodings == {MODE_EXACT}:
+        ids = [decode_exact(bytes(blob)) for blob in cells['ALUNOS']]
+        return int(len(np.unique(np.concatenate(ids))))
+
+    if encodings == {MODE_APPROX}:
+        registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+        for blob in cells['ALUNOS']:
+            np.maximum(registers, decode_approx(bytes(blob)), out=registers)
+        return hll_estimate(registers)
+
+    # Mistura de modos (ex.: carga incremental após trocar o modo): aproximado
+    registers = np.zeros(1 << HLL_PRECISION, dtype=np.uint8)
+    for encoding, blob in zip(cells['CODIFICACAO'], cells['ALUNOS']):
+        cell_registers = (hll_registers(decode_exact(bytes(blob))) if encoding == MODE_EXACT
+                          else decode_approx(bytes(blob)))
+        np.maximum(registers, cell_registers, out=registers)
+    return hll_estimate(registers)
+
+
+def summarize_cells(cells: pd.DataFrame) -> Dict[str, float]:
+    """
+    Métricas resumo de uma seleção de células (mesmas do painel da galeria)
+
+    Contagens de escolas, municípios, estados, anos, disciplinas e testes são
+    exatas (são colunas da célula); a de alunos vem da união dos conjuntos.
+    """
+    total_acertos = int(cells['ACERTO'].sum()) if not cells.empty else 0
+    total_questoes = total_acertos + (int(cells['ERRO'].sum()) if not cells.empty else 0)
+
+    return {
+        'total_alunos': count_students(cells),
+        'total_escolas': cells['ESC_INEP'].nunique(),
+        'total_municipios': cells['MUN_NOME'].nunique(),
+        'total_estados': cells['MUN_UF'].nunique(),
+        'total_anos': cells['AVA_ANO'].nunique(),
+        'total_disciplinas': cells['DIS_NOME'].nunique(),
+        'total_testes': cells['TES_NOME'].nunique(),
+        'total_acertos': total_acertos,
+        'total_questoes': total_questoes,
+        'taxa_acerto_geral': round(total_acertos * 100.0 / total_questoes, 2) if total_questoes else None,
+    }
@@ -0,0 +1,451 @@
+"""
+Gerador de dados sintéticos no formato da tabela avaliacao do SAEV
+
+Produz CSVs com as mesmas colunas e tipos do DDL de avaliacao, em qualquer
+escala, para benchmarks e testes de carga de ``carga.py``, do migrador e dos
+dashboards sem depender de dados reais.
+
+A rede é montada de cima para baixo: municípios → escolas (tamanhos
+assimétricos, com as séries que oferecem) → turmas por série e turno →
+alunos. Cada disciplina/série tem um teste com ``ITEMS_PER_TEST`` itens,
+ligados a descritores com dificuldade própria.
+
+A probabilidade de acerto segue um modelo logístico de três parâmetros
+(discriminação, dificuldade e acerto ao acaso do item) sobre a proficiência
+do aluno, que soma efeitos de município, escola e turma a um componente
+individual; as proficiências nas disciplinas são correlacionadas e crescem de
+um ano para o outro. Alguns alunos faltam a alguns testes.
+
+Os alunos são divididos em fatias de turmas inteiras; cada fatia de cada ano
+é gerada com numpy e gravada pelo DuckDB em um CSV próprio, em paralelo
+(``workers``). O resultado depende apenas da semente, e não do número de
+processos.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .etl import AVALIACAO_SCHEMA
+
+# Estados e pesos do número de municípios
+SYNTHETIC_UFS = {'CE': 0.5, 'PI': 0.3, 'MA': 0.2}
+
+# Disciplinas avaliadas (nome -> sigla usada nos códigos de descritor)
+SYNTHETIC_DISCIPLINES = {'Língua Portuguesa': 'LP', 'Matemática': 'MT'}
+
+# Séries avaliadas (SER_NUMBER) e combinações oferecidas pelas escolas
+SYNTHETIC_SERIES = [2, 5, 9]
+SCHOOL_SERIES_OPTIONS = [([2, 5], 0.45), ([9], 0.25), ([2, 5, 9], 0.30)]
+
+# Estrutura da rede
+SCHOOLS_PER_MUNICIPALITY = 10        # média (distribuição log-normal)
+CLASSES_PER_SERIES = 1.6             # média de turmas por série em cada escola
+STUDENTS_PER_CLASS = 25              # média de alunos por turma
+PERIODS = ['Manhã', 'Tarde']
+
+# Estrutura dos testes
+ITEMS_PER_TEST = 20
+DESCRIPTORS_PER_DISCIPLINE = 15
+ANSWER_OPTIONS = list('ABCD')
+
+# Modelo de resposta (desvios-padrão dos efeitos sobre a proficiência)
+MUNICIPALITY_EFFECT_SD = 0.35
+SCHOOL_EFFECT_SD = 0.30
+CLASS_EFFECT_SD = 0.15
+DISCIPLINE_CORRELATION = 0.7
+YEARLY_GROWTH = 0.15
+GUESSING = 0.2
+ABSENCE_RATE = 0.04
+
+SYNTHETIC_AVA_NOME = 'Avaliação Diagnóstica'
+
+# Alunos por fatia (um CSV por fatia e ano, ~1 milhão de linhas)
+DEFAULT_SHARD_STUDENTS = 25_000
+
+FIRST_NAMES = [
+    'Ana', 'Maria', 'Francisca', 'Antônia', 'Adriana', 'Juliana', 'Márcia', 'Fernanda',
+    'Patrícia', 'Aline', 'Sandra', 'Camila', 'Amanda', 'Bruna', 'Letícia', 'Júlia',
+    'Beatriz', 'Larissa', 'Vitória', 'Isabela', 'José', 'João', 'Antônio', 'Francisco',
+    'Carlos', 'Paulo', 'Pedro', 'Lucas', 'Luiz', 'Marcos', 'Gabriel', 'Rafael',
+    'Daniel', 'Marcelo', 'Bruno', 'Eduardo', 'Felipe', 'Raimundo', 'Rodrigo', 'Miguel',
+]
+SURNAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira',
+    'Lima', 'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes',
+    'Soares', 'Fernandes', 'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade',
+    'Moreira', 'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas', 'Cardoso', 'Ramos',
+    'Sousa', 'Bezerra', 'Cavalcante', 'Moura', 'Araújo', 'Holanda', 'Pinheiro', 'Monteiro',
+]
+CITY_PREFIXES = ['', 'São', 'Santa', 'Nova', 'Boa Vista do', 'Santo Antônio do', 'Lagoa do',
+                 'Serra do', 'Barra do', 'Morada']
+CITY_NAMES = [
+    'Juazeiro', 'Crato', 'Sobral', 'Iguatu', 'Quixadá', 'Russas', 'Icó', 'Tauá', 'Canindé',
+    'Aracati', 'Baturité', 'Camocim', 'Granja', 'Viçosa', 'Jardim', 'Mauriti', 'Barbalha',
+    'Acaraú', 'Itapipoca', 'Parnaíba', 'Picos', 'Floriano', 'Oeiras', 'Piripiri', 'Codó',
+    'Caxias', 'Bacabal', 'Pinheiro', 'Coroatá', 'Timon',
+]
+SCHOOL_PREFIXES = ['EEF', 'EMEF', 'EMEIF', 'Escola Municipal', 'Centro Educacional']
+
+DESCRIPTOR_TEXTS = {
+    'LP': [
+        'Localizar informações explícitas em um texto',
+        'Inferir o sentido de uma palavra ou expressão',
+        'Inferir uma informação implícita em um texto',
+        'Identificar o tema de um texto',
+        'Identificar a finalidade de textos de diferentes gêneros',
+        'Interpretar texto com auxílio de material gráfico',
+        'Estabelecer relações entre partes de um texto',
+        'Identificar o conflito gerador do enredo',
+        'Distinguir um fato da opinião relativa a esse fato',
+        'Reconhecer efeitos de ironia ou humor',
+        'Reconhecer o efeito de sentido da pontuação',
+        'Identificar a tese de um texto',
+        'Reconhecer diferentes formas de tratar uma informação',
+        'Reconhecer relações lógico-discursivas no texto',
+        'Identificar marcas linguísticas do locutor e interlocutor',
+    ],
+    'MT': [
+        'Identificar a localização de números naturais na reta',
+        'Resolver problema envolvendo adição ou subtração',
+        'Resolver problema envolvendo multiplicação ou divisão',
+        'Reconhecer a composição e decomposição de números',
+        'Identificar frações e suas representações',
+        'Resolver problema com números racionais',
+        'Resolver problema envolvendo porcentagem',
+        'Calcular o perímetro de figuras planas',
+        'Calcular a área de figuras planas',
+        'Identificar propriedades de polígonos',
+        'Ler informações e dados em tabelas',
+        'Ler informações e dados em gráficos',
+        'Resolver problema envolvendo medidas de tempo',
+        'Resolver problema envolvendo sistema monetário',
+        'Identificar regularidades em sequências numéricas',
+    ],
+}
+
+
+def rows_per_student(n_years: int = 1) -> float:
+    """Respostas esperadas por aluno (todas as disciplinas e anos, descontadas as faltas)"""
+    return len(SYNTHETIC_DISCIPLINES) * ITEMS_PER_TEST * n_years * (1 - ABSENCE_RATE)
+
+
+def _city_names(count: int) -> List[str]:
+    """Nomes distintos de municípios"""
+    names = []
+    for index in range(count):
+        prefix = CITY_PREFIXES[(index // len(CITY_NAMES)) % len(CITY_PREFIXES)]
+        name = f"{prefix} {CITY_NAMES[index % len(CITY_NAMES)]}".strip()
+        cycle = index // (len(CITY_NAMES) * len(CITY_PREFIXES))
+        names.append(f"{name} {cycle + 1}" if cycle else name)
+    return names
+
+
+def _categorical(labels: Sequence[str], codes: np.ndarray) -> pd.Categorical:
+    """Coluna de texto a partir dos rótulos das entidades e do índice de cada linha"""
+    categories, inverse = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    return pd.Categorical.from_codes(inverse[codes], categories=categories)
+
+
+def _cpf_digits(numbers: np.ndarray) -> np.ndarray:
+    """CPFs válidos (com dígitos verificadores) a partir de números de 9 dígitos"""
+    digits = (numbers[:, None] // 10 ** np.arange(8, -1, -1)) % 10
+    first = (digits * np.arange(10, 1, -1)).sum(axis=1) * 10 % 11 % 10
+    second = ((digits * np.arange(11, 2, -1)).sum(axis=1) + first * 2) * 10 % 11 % 10
+    return numbers * 100 + first * 10 + second
+
+
+class SAEVSyntheticGenerator:
+    """Rede sintética (municípios, escolas, turmas, testes) e geração dos CSVs"""
+
+    def __init__(self, rows: int, years: Sequence[int] = (2024,), seed: int = 42,
+                 shard_students: int = DEFAULT_SHARD_STUDENTS):
+        """
+        Args:
+            rows: Total aproximado de respostas (linhas), somando todos os anos
+            years: Anos das avaliações; os mesmos alunos são avaliados em cada ano
+            seed: Semente do gerador aleatório
+            shard_students: Alunos por fatia (um CSV por fatia e ano)
+        """
+        self.rows = rows
+        self.years = list(years)
+        self.seed = seed
+        self.shard_students = shard_students
+        self.rows_written = 0
+
+        rng = np.random.default_rng([seed, 0])
+        self._build_network(rng, math.ceil(rows / rows_per_student(len(self.years))))
+        self._build_tests(rng)
+
+    def _build_network(self, rng: np.random.Generator, n_students: int):
+        """Municípios → escolas → turmas com pelo menos ``n_students`` alunos"""
+        expected_class_size = STUDENTS_PER_CLASS * CLASSES_PER_SERIES * 2
+        n_schools = max(1, math.ceil(n_students / expected_class_size))
+        school_sizes = rng.lognormal(0, 0.8, size=n_schools)
+        n_municipalities = max(1, math.ceil(n_schools / SCHOOLS_PER_MUNICIPALITY))
+
+        # Municípios grandes concentram mais escolas
+        municipality_weights = rng.lognormal(0, 1.0, size=n_municipalities)
+        school_municipality = np.sort(rng.choice(
+            n_municipalities, size=n_schools, p=municipality_weights / municipality_weights.sum()
+        ))
+        school_municipality[:n_municipalities] = np.arange(min(n_municipalities, n_schools))
+        school_municipality = np.sort(school_municipality)
+
+        ufs = list(SYNTHETIC_UFS)
+        self.municipality_uf = np.sort(rng.choice(len(ufs), size=n_municipalities,
+                                                  p=list(SYNTHETIC_UFS.values())))
+        self.uf_names = ufs
+        self.municipality_names = _city_names(n_municipalities)
+        self.municipality_effect = rng.normal(0, MUNICIPALITY_EFFECT_SD, size=n_municipalities)
+
+        self.school_municipality = school_municipality
+        self.school_effect = rng.normal(0, SCHOOL_EFFECT_SD, size=n_schools)
+        self.school_inep = 23_000_000 + rng.choice(9_000_000, size=n_schools, replace=False)
+        self.school_names = [
+            f"{SCHOOL_PREFIXES[prefix]} {FIRST_NAMES[first]} {SURNAMES[last]}"
+            for prefix, first, last in zip(rng.integers(len(SCHOOL_PREFIXES), size=n_schools),
+                                           rng.integers(len(FIRST_NAMES), size=n_schools),
+                                           rng.integers(len(SURNAMES), size=n_schools))
+        ]
+
+        # Turmas: séries oferecidas, turmas por série e alunos por turma
+        option_weights = [weight for _, weight in SCHOOL_SERIES_OPTIONS]
+        school_option = rng.choice(len(SCHOOL_SERIES_OPTIONS), size=n_schools, p=option_weights)
+        class_school, class_series, class_number = [], [], []
+        for school in range(n_schools):
+            for series in SCHOOL_SERIES_OPTIONS[school_option[school]][0]:
+                n_classes = 1 + rng.poisson((CLASSES_PER_SERIES - 1) * school_sizes[school])
+                class_school.extend([school] * n_classes)
+                class_series.extend([series] * n_classes)
+                class_number.extend(range(n_classes))
+
+        self.class_school = np.array(class_school)
+        self.class_series = np.array(class_series)
+        self.class_number = np.array(class_number)
+        self.class_effect = rng.normal(0, CLASS_EFFECT_SD, size=len(class_school))
+        self.class_size = np.clip(rng.normal(STUDENTS_PER_CLASS, 5, size=len(class_school)),
+                                  10, 40).astype(np.int64)
+
+        # Ajuste do tamanho da rede ao número de alunos pedido
+        cumulative = np.cumsum(self.class_size)
+        n_classes = min(int(np.searchsorted(cumulative, n_students)) + 1, len(class_school))
+        for name in ('class_school', 'class_series', 'class_number', 'class_effect', 'class_size'):
+            setattr(self, name, getattr(self, name)[:n_classes])
+        self.class_first_student = np.concatenate([[0], np.cumsum(self.class_size)[:-1]])
+
+    def _build_tests(self, rng: np.random.Generator):
+        """Itens de cada teste (disciplina × série): descritor, parâmetros e gabarito"""
+        self.descriptor_codes, self.descriptor_texts = [], []
+        descriptor_difficulty = []
+        for sigla in SYNTHETIC_DISCIPLINES.values():
+            for number, text in enumerate(DESCRIPTOR_TEXTS[sigla][:DESCRIPTORS_PER_DISCIPLINE], start=1):
+                self.descriptor_codes.append(f"{sigla}D{number:02d}")
+                self.descriptor_texts.append(text)
+                descriptor_difficulty.append(rng.normal(0, 0.6))
+
+        n_tests = len(SYNTHETIC_DISCIPLINES) * len(SYNTHETIC_SERIES)
+        shape = (n_tests, ITEMS_PER_TEST)
+        discipline = np.repeat(np.arange(len(SYNTHETIC_DISCIPLINES)), len(SYNTHETIC_SERIES))
+        self.item_descriptor = (discipline[:, None] * DESCRIPTORS_PER_DISCIPLINE
+                                + rng.integers(DESCRIPTORS_PER_DISCIPLINE, size=shape))
+        self.item_difficulty = (np.array(descriptor_difficulty)[self.item_descriptor]
+                                + rng.normal(0, 0.5, size=shape))
+        self.item_discrimination = rng.uniform(0.7, 1.8, size=shape)
+        self.item_key = rng.integers(len(ANSWER_OPTIONS), size=shape)
+        self.item_distractor = (self.item_key + rng.integers(1, len(ANSWER_OPTIONS), size=shape)) \
+            % len(ANSWER_OPTIONS)
+
+    @property
+    def n_students(self) -> int:
+        """Alunos da rede"""
+        return int(self.class_size.sum())
+
+    def shards(self) -> List[Tuple[int, int]]:
+        """Fatias da rede: intervalos [primeira, última) de turmas inteiras"""
+        bounds = [0]
+        limit = self.shard_students
+        for index, first_student in enumerate(self.class_first_student):
+            if first_student >= limit:
+                bounds.append(index)
+                limit = first_student + self.shard_students
+        bounds.append(len(self.class_size))
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def shard_frame(self, year: int, shard: int, first_class: int, last_class: int) -> pd.DataFrame:
+        """Respostas de uma fatia de turmas em um ano"""
+        disciplines = list(SYNTHETIC_DISCIPLINES)
+        n_disciplines = len(disciplines)
+        sizes = self.class_size[first_class:last_class]
+        classes = np.repeat(np.arange(first_class, last_class), sizes)
+        students = self.class_first_student[first_class] + np.arange(len(classes)) + 1
+        schools = self.class_school[classes]
+        municipalities = self.school_municipality[schools]
+        series = self.class_series[classes]
+
+        # Proficiência: estável entre anos (semente da fatia), ruído e faltas do ano
+        rng = np.random.default_rng([self.seed, 1, shard])
+        general = rng.normal(0, 1, size=len(students))
+        specific = rng.normal(0, 1, size=(len(students), n_disciplines))
+        ability = (self.municipality_effect[municipalities] + self.school_effect[schools]
+                   + self.class_effect[classes])[:, None] \
+            + math.sqrt(DISCIPLINE_CORRELATION) * general[:, None] \
+            + math.sqrt(1 - DISCIPLINE_CORRELATION) * specific \
+            + YEARLY_GROWTH * (year - self.years[0])
+
+        rng = np.random.default_rng([self.seed, 2, year, shard])
+        present = rng.random((len(students), n_disciplines)) >= ABSENCE_RATE
+        student_idx, discipline_idx = np.nonzero(present)
+        student_idx = np.repeat(student_idx, ITEMS_PER_TEST)
+        discipline_idx = np.repeat(discipline_idx, ITEMS_PER_TEST)
+        item = np.tile(np.arange(ITEMS_PER_TEST), int(present.sum()))
+
+        series_idx = np.searchsorted(SYNTHETIC_SERIES, series[student_idx])
+        test_idx = discipline_idx * len(SYNTHETIC_SERIES) + series_idx
+        logit = 1.7 * self.item_discrimination[test_idx, item] * (
+            ability[student_idx, discipline_idx] - self.item_difficulty[test_idx, item]
+        )
+        probability = GUESSING + (1 - GUESSING) / (1 + np.exp(-logit))
+        correct = (rng.random(len(item)) < probability).astype(np.int64)
+
+        # Erros: metade marca o distrator mais atraente, o restante ao acaso
+        key = self.item_key[test_idx, item]
+        random_wrong = (key + rng.integers(1, len(ANSWER_OPTIONS), size=len(item))) % len(ANSWER_OPTIONS)
+        wrong = np.where(rng.random(len(item)) < 0.5, self.item_distractor[test_idx, item], random_wrong)
+        answer = np.where(correct == 1, key, wrong)
+
+        row_classes = classes[student_idx]
+        row_schools = schools[student_idx]
+        row_municipalities = municipalities[student_idx]
+        descriptor = self.item_descriptor[test_idx, item]
+        period = (self.class_number + self.class_school) % len(PERIODS)
+
+        name_rng = np.random.default_rng([self.seed, 3, shard])
+        names = [
+            f"{FIRST_NAMES[first]} {SURNAMES[middle]} {SURNAMES[last]}"
+            for first, middle, last in name_rng.integers(
+                [len(FIRST_NAMES), len(SURNAMES), len(SURNAMES)], size=(len(students), 3)
+            )
+        ]
+        cpfs = _cpf_digits(100_000_000 + students)
+
+        test_names = [f"{discipline} - {number}º Ano" for discipline in disciplines for number in SYNTHETIC_SERIES]
+        class_labels = [f"{number}º Ano {chr(ord('A') + index % 26)}{index // 26 or ''}"
+                        for number, index in zip(self.class_series, self.class_number)]
+
+        return pd.DataFrame({
+            'MUN_UF': _categorical(self.uf_names, self.municipality_uf[row_municipalities]),
+            'MUN_NOME': _categorical(self.municipality_names, row_municipalities),
+            'ESC_INEP': _categorical([f"{inep:08d}" for inep in self.school_inep], row_schools),
+            'ESC_NOME': _categorical(self.school_names, row_schools),
+            'SER_NUMBER': series[student_idx],
+            'SER_NOME': _categorical([f"{number}º Ano EF" for number in SYNTHETIC_SERIES], series_idx),
+            'TUR_PERIODO': _categorical(PERIODS, period[row_classes]),
+            'TUR_NOME': _categorical(class_labels, row_classes),
+            'ALU_ID': students[student_idx],
+            'ALU_NOME': _categorical(names, student_idx),
+            'ALU_CPF': _categorical([f"{cpf:011d}" for cpf in cpfs], student_idx),
+            'AVA_NOME': _categorical([SYNTHETIC_AVA_NOME], np.zeros(len(item), dtype=np.int64)),
+            'AVA_ANO': np.full(len(item), year),
+            'DIS_NOME': _categorical(disciplines, discipline_idx),
+            'TES_NOME': _categorical(test_names, test_idx),
+            'TEG_ORDEM': item + 1,
+            'ATR_RESPOSTA': _categorical(ANSWER_OPTIONS, answer),
+            'ATR_CERTO': correct,
+            'MTI_CODIGO': _categorical(self.descriptor_codes, descriptor),
+            'MTI_DESCRITOR': _categorical(self.descriptor_texts, descriptor),
+        }, columns=list(AVALIACAO_SCHEMA))
+
+    def write_shard(self, csv_file: Path, year: int, shard: int, first_class: int,
+                    last_class: int, threads: int = 0) -> int:
+        """Gera uma fatia e grava o CSV pelo DuckDB (colunas de texto como categorias)"""
+        import duckdb
+
+        frame = self.shard_frame(year, shard, first_class, last_class)
+        conn = duckdb.connect()
+        try:
+            if threads:
+                conn.execute(f"SET threads = {int(threads)}")
+            conn.register('fatia', frame)
+            csv_literal = str(csv_file).replace("'", "''")
+            conn.execute(f"COPY fatia TO '{csv_literal}' (HEADER, DELIMITER ',')")
+        finally:
+            conn.close()
+        return len(frame)
+
+    def generate(self, output_dir: str, workers: int = 1) -> List[Path]:
+        """
+        Grava os CSVs (``saev_sintetico_<ano>_<fatia>.csv``) em ``output_dir``
+
+        Args:
+            output_dir: Pasta de destino
+            workers: Processos gerando fatias em paralelo
+
+        Returns:
+            Caminhos dos arquivos gerados, na ordem de ano e fatia
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        tasks = [
+            (output_path / f"saev_sintetico_{year}_{shard:04d}.csv", year, shard, first, last)
+            for year in self.years
+            for shard, (first, last) in enumerate(self.shards())
+        ]
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self.write_shard, *task, threads=1) for task in tasks]
+                rows = [future.result() for future in futures]
+        else:
+            rows = [self.write_shard(*task) for task in tasks]
+
+        self.rows_written = sum(rows)
+        return [task[0] for task in tasks]
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Tamanho da rede presente nos CSVs
+
+        Conta apenas o que as fatias gravam: as turmas mantidas após o ajuste
+        ao número de respostas pedido e as escolas, municípios e UFs dessas
+        turmas (em volumes pequenos, menos do que a rede planejada). Os
+        alunos são os matriculados nessas turmas; faltosos em todas as
+        disciplinas de todos os anos não aparecem nos CSVs.
+        """
+        schools = np.unique(self.class_school)
+        municipalities = np.unique(self.school_municipality[schools])
+        return {
+            'ufs': len(np.unique(self.municipality_uf[municipalities])),
+            'municipios': len(municipalities),
+            'escolas': len(schools),
+            'turmas': len(self.class_size),
+            'alunos': self.n_students,
+            'testes': len(SYNTHETIC_DISCIPLINES) * len(SYNTHETIC_SERIES),
+            'itens': int(self.item_descriptor.size),
+            'descritores': len(self.descriptor_codes),
+        }
+
+
+def generate_avaliacao_csv(output_dir: str, rows: int, years: Sequence[int] = (2024,),
+                           seed: int = 42, workers: int = 1,
+                           shard_students: int = DEFAULT_SHARD_STUDENTS) -> List[Path]:
+    """
+    Gera CSVs sintéticos com aproximadamente ``rows`` respostas no total
+
+    Args:
+        output_dir: Pasta de destino
+        rows: Total de respostas (linhas) somando todos os anos
+        years: Anos das avaliações
+        seed: Semente do gerador aleatório
+        workers: Processos gerando fatias em paralelo
+        shard_students: Alunos por fatia (um CSV por fatia e ano)
+
+    Returns:
+        Caminhos dos arquivos gerados
+    """
+    generator = SAEVSyntheticGenerator(rows, years=years, seed=seed, shard_students=shard_students)
+    return generator.generate(output_dir, workers=workers)
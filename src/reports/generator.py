@@ -2,7 +2,6 @@
 Sistema de Relatórios Automatizados para SAEV
 """
 import pandas as pd
-import sqlite3
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
@@ -13,14 +12,25 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.config import config
+from src.data.query_service import get_query_service
+from src.data.rollups import RollupRouter
+
+# Taxa de acerto (%) a partir dos totais de acertos e erros da fato
+TAXA_ACERTO = "ROUND(SUM(f.ACERTO) * 100.0 / NULLIF(SUM(f.ACERTO + f.ERRO), 0), 2)"
 
 class SAEVReports:
-    """Classe para geração de relatórios automatizados"""
+    """
+    Classe para geração de relatórios automatizados
+
+    As consultas leem ``fato_resposta_aluno`` pelo serviço de consultas
+    compartilhado, no motor do banco (SQLite, DuckDB ou Parquet). Sem
+    ``db_path``, o banco vem do motor configurado em SAEV_DB_TYPE.
+    """
     
     def __init__(self, db_path: str = None, output_dir: str = "reports"):
-        # Se não especificar db_path, usa detecção automática
+        # Se não especificar db_path, usa o banco do motor configurado
         if db_path is None:
-            self.db_path = config.get_database_path()
+            self.db_path = config.get_engine_database_path()
         else:
             self.db_path = db_path
             
@@ -31,13 +41,10 @@ class SAEVReports:
         if not Path(self.db_path).exists():
             raise FileNotFoundError(f"Banco de dados não encontrado: {self.db_path}")
     
-    def get_data(self, query: str) -> pd.DataFrame:
+    def get_data(self, query: str, params: list = None) -> pd.DataFrame:
         """Executa query e retorna DataFrame"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return get_query_service(self.db_path).query(query, params)
         except Exception as e:
             raise Exception(f"Erro ao executar consulta: {e}")
     
@@ -46,22 +53,20 @@ class SAEVReports:
         
         query = f"""
         SELECT 
-            MUN_NOME as Municipio,
-            COUNT(DISTINCT ALU_ID) as Total_Alunos,
-            COUNT(DISTINCT ESC_INEP) as Total_Escolas,
-            COUNT(*) as Total_Questoes_Respondidas,
-            SUM(ATR_CERTO) as Total_Acertos,
-            ROUND(AVG(CAST(ATR_CERTO AS FLOAT)) * 100, 2) as Taxa_Acerto_Pct,
-            ROUND(
-                (SUM(ATR_CERTO) * 1.0 / COUNT(*)) * 100, 2
-            ) as Performance_Geral
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY MUN_NOME
+            f.MUN_NOME as Municipio,
+            COUNT(DISTINCT f.ALU_ID) as Total_Alunos,
+            COUNT(DISTINCT f.ESC_INEP) as Total_Escolas,
+            SUM(f.ACERTO + f.ERRO) as Total_Questoes_Respondidas,
+            SUM(f.ACERTO) as Total_Acertos,
+            {TAXA_ACERTO} as Taxa_Acerto_Pct,
+            {TAXA_ACERTO} as Performance_Geral
+        FROM fato_resposta_aluno f
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.MUN_NOME
         ORDER BY Taxa_Acerto_Pct DESC
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         # Adicionar classificação
         df['Posicao'] = range(1, len(df) + 1)
@@ -84,26 +89,30 @@ class SAEVReports:
     def generate_school_report(self, year: int, discipline: str, municipality: str = None) -> str:
         """Gera relatório por escola"""
         
-        where_clause = f"WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'"
+        where_clause = "WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?"
+        params = [year, discipline]
         if municipality:
-            where_clause += f" AND MUN_NOME = '{municipality}'"
+            where_clause += " AND f.MUN_NOME = ?"
+            params.append(municipality)
         
         query = f"""
         SELECT 
-            MUN_NOME as Municipio,
-            ESC_NOME as Escola,
-            ESC_INEP as Codigo_INEP,
-            COUNT(DISTINCT ALU_ID) as Total_Alunos,
-            COUNT(DISTINCT SER_NOME) as Series_Atendidas,
-            ROUND(AVG(CAST(ATR_CERTO AS FLOAT)) * 100, 2) as Taxa_Acerto_Pct,
-            COUNT(*) as Total_Questoes
-        FROM avaliacao {where_clause}
-        GROUP BY MUN_NOME, ESC_NOME, ESC_INEP
-        HAVING Total_Alunos >= 5
+            f.MUN_NOME as Municipio,
+            e.ESC_NOME as Escola,
+            f.ESC_INEP as Codigo_INEP,
+            COUNT(DISTINCT f.ALU_ID) as Total_Alunos,
+            COUNT(DISTINCT f.SER_NOME) as Series_Atendidas,
+            {TAXA_ACERTO} as Taxa_Acerto_Pct,
+            SUM(f.ACERTO + f.ERRO) as Total_Questoes
+        FROM fato_resposta_aluno f
+        LEFT JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
+        {where_clause}
+        GROUP BY f.MUN_NOME, e.ESC_NOME, f.ESC_INEP
+        HAVING COUNT(DISTINCT f.ALU_ID) >= 5
         ORDER BY Municipio, Taxa_Acerto_Pct DESC
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, params)
         df['Classificacao'] = df['Taxa_Acerto_Pct'].apply(self._classify_performance)
         
         # Salvar relatório
@@ -120,19 +129,20 @@ class SAEVReports:
         
         query = f"""
         SELECT 
-            MTI_CODIGO as Codigo_Competencia,
-            MTI_DESCRITOR as Descricao_Competencia,
-            COUNT(*) as Total_Questoes,
-            COUNT(DISTINCT ALU_ID) as Alunos_Avaliados,
-            SUM(ATR_CERTO) as Total_Acertos,
-            ROUND(AVG(CAST(ATR_CERTO AS FLOAT)) * 100, 2) as Taxa_Acerto_Pct
-        FROM avaliacao 
-        WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-        GROUP BY MTI_CODIGO, MTI_DESCRITOR
+            f.MTI_CODIGO as Codigo_Competencia,
+            d.MTI_DESCRITOR as Descricao_Competencia,
+            SUM(f.ACERTO + f.ERRO) as Total_Questoes,
+            COUNT(DISTINCT f.ALU_ID) as Alunos_Avaliados,
+            SUM(f.ACERTO) as Total_Acertos,
+            {TAXA_ACERTO} as Taxa_Acerto_Pct
+        FROM fato_resposta_aluno f
+        LEFT JOIN dim_descritor d ON f.MTI_CODIGO = d.MTI_CODIGO
+        WHERE f.AVA_ANO = ? AND f.DIS_NOME = ?
+        GROUP BY f.MTI_CODIGO, d.MTI_DESCRITOR
         ORDER BY Taxa_Acerto_Pct ASC
         """
         
-        df = self.get_data(query)
+        df = self.get_data(query, [year, discipline])
         
         # Classificar dificuldade
         df['Nivel_Dificuldade'] = df['Taxa_Acerto_Pct'].apply(self._classify_difficulty)
@@ -148,28 +158,38 @@ class SAEVReports:
         df.to_excel(filepath, index=False)
         return str(filepath)
     
-    def generate_comparative_report(self, years: list, discipline: str) -> str:
-        """Gera relatório comparativo entre anos"""
-        
-        all_data = []
-        for year in years:
-            query = f"""
-            SELECT 
-                {year} as Ano,
-                MUN_NOME as Municipio,
-                ROUND(AVG(CAST(ATR_CERTO AS FLOAT)) * 100, 2) as Taxa_Acerto_Pct
-            FROM avaliacao 
-            WHERE AVA_ANO = {year} AND DIS_NOME = '{discipline}'
-            GROUP BY MUN_NOME
-            """
-            df_year = self.get_data(query)
-            all_data.append(df_year)
-        
-        # Combinar dados
-        df_combined = pd.concat(all_data, ignore_index=True)
-        
-        # Criar tabela pivotada
-        df_pivot = df_combined.pivot(index='Municipio', columns='Ano', values='Taxa_Acerto_Pct')
+    def generate_comparative_report(self, years: list, discipline) -> str:
+        """
+        Gera relatório comparativo entre anos
+
+        Uma única consulta agrupada por disciplina, ano e município cobre todos
+        os anos e disciplinas pedidos; o ``RollupRouter`` a direciona para
+        ``agg_municipio`` quando a rollup existe (senão, para a fato).
+
+        Args:
+            years: Anos comparados (a evolução é do primeiro para o último)
+            discipline: Disciplina ou lista de disciplinas. Com mais de uma,
+                as linhas do relatório são (Disciplina, Municipio)
+        """
+        disciplines = [discipline] if isinstance(discipline, str) else list(discipline)
+        
+        service = get_query_service(self.db_path)
+        router = RollupRouter(service.fetchall, service.builder)
+        router.refresh(service.table_names())
+        query, params = router.build_query(
+            ['DIS_NOME', 'AVA_ANO', 'MUN_NOME'], ['taxa_acerto'],
+            {'AVA_ANO': list(years), 'DIS_NOME': disciplines}
+        )
+        
+        df = self.get_data(query, params).rename(columns={
+            'DIS_NOME': 'Disciplina', 'AVA_ANO': 'Ano',
+            'MUN_NOME': 'Municipio', 'taxa_acerto': 'Taxa_Acerto_Pct'
+        })
+        
+        # Criar tabela pivotada (uma coluna por ano pedido, mesmo sem dados)
+        index = 'Municipio' if len(disciplines) == 1 else ['Disciplina', 'Municipio']
+        df_pivot = df.pivot(index=index, columns='Ano', values='Taxa_Acerto_Pct').reindex(columns=sorted(years))
+        df_pivot.columns.name = 'Ano'
         
         # Calcular evolução
         if len(years) >= 2:
@@ -180,7 +200,7 @@ class SAEVReports:
         
         # Salvar relatório
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"relatorio_comparativo_{discipline}_{'-'.join(map(str, years))}_{timestamp}.xlsx"
+        filename = f"relatorio_comparativo_{'-'.join(disciplines)}_{'-'.join(map(str, years))}_{timestamp}.xlsx"
         filepath = self.output_dir / filename
         
         df_pivot.to_excel(filepath)
@@ -10,8 +10,11 @@ Star Schema otimizado para análises de Business Intelligence.
 
 ESTRUTURA CRIADA:
 - 3 Tabelas de Dimensão: dim_aluno, dim_escola, dim_descritor
-- 1 Tabela Fato: fato_resposta_aluno  
-- 1 Tabela Auxiliar: teste (versão normalizada da tabela original)
+- 7 Dicionários (chave inteira -> texto): dim_municipio, dim_serie, dim_periodo,
+  dim_turma, dim_avaliacao, dim_disciplina, dim_teste
+- 1 Tabela Fato compacta: fato_resposta_compacta (chaves inteiras)
+- 1 View de compatibilidade: fato_resposta_aluno (mesmas colunas de antes)
+- 1 View Auxiliar: teste (versão normalizada da tabela original)
 
 BENEFÍCIOS:
 - Consultas mais rápidas para dashboards e relatórios
@@ -30,11 +33,19 @@ VERSÃO: 1.0
 -- ============================================================================
 .print "🧹 Removendo tabelas fato e dimensão existentes..."
 
+DROP VIEW IF EXISTS fato_resposta_aluno;
+DROP TABLE IF EXISTS fato_resposta_compacta;
 DROP TABLE IF EXISTS dim_aluno;
 DROP TABLE IF EXISTS dim_escola; 
 DROP TABLE IF EXISTS dim_descritor;
-DROP TABLE IF EXISTS teste; 
-DROP TABLE IF EXISTS fato_resposta_aluno;
+DROP TABLE IF EXISTS dim_municipio;
+DROP TABLE IF EXISTS dim_serie;
+DROP TABLE IF EXISTS dim_periodo;
+DROP TABLE IF EXISTS dim_turma;
+DROP TABLE IF EXISTS dim_avaliacao;
+DROP TABLE IF EXISTS dim_disciplina;
+DROP TABLE IF EXISTS dim_teste;
+DROP VIEW IF EXISTS teste;
 
 -- Tabelas futuras (comentadas para referência)
 -- DROP TABLE IF EXISTS resposta_escola;
@@ -90,66 +101,119 @@ SELECT COUNT(*) FROM dim_escola;
 CREATE TABLE dim_descritor (
     MTI_CODIGO VARCHAR(15) PRIMARY KEY,  -- Chave primária - Código do descritor
     MTI_DESCRITOR VARCHAR(512),          -- Descrição completa do descritor
-    QTD INTEGER                          -- Quantidade de questões usando este descritor
+    QTD INTEGER,                         -- Quantidade de questões usando este descritor
+    MTI_ID INTEGER UNIQUE                -- Chave inteira usada na tabela fato
 ); 
 
 -- Popula a dimensão com descritores únicos e suas estatísticas
 -- Usa MAX() para pegar uma versão da descrição quando há variações
-INSERT INTO dim_descritor (MTI_CODIGO, MTI_DESCRITOR, QTD) 
+INSERT INTO dim_descritor (MTI_CODIGO, MTI_DESCRITOR, QTD, MTI_ID) 
 SELECT 
     MTI_CODIGO, 
     MAX(MTI_DESCRITOR) AS MTI_DESCRITOR,  -- Pega uma versão da descrição
-    COUNT(*) AS QTD 
+    COUNT(*) AS QTD,
+    ROW_NUMBER() OVER (ORDER BY MTI_CODIGO) AS MTI_ID
 FROM avaliacao 
 GROUP BY MTI_CODIGO;
 
 SELECT COUNT(*) FROM dim_descritor;
 .print "✅ Dimensão descritor criada com sucesso!"
 
+-- ----------------------------------------------------------------------------
+-- DICIONÁRIOS DA TABELA FATO
+-- Cada texto repetido na fato (município, série, turno, turma, avaliação,
+-- disciplina e teste) recebe uma chave inteira pequena. A fato guarda só a
+-- chave; a view fato_resposta_aluno devolve o texto original.
+-- Valores NULL não entram no dicionário (a chave fica NULL na fato).
+-- ----------------------------------------------------------------------------
+.print "🔢 Criando dicionários da tabela fato..."
+
+-- Valores distintos lidos em uma única passada pela tabela avaliacao
+CREATE TEMP TABLE valores_fato AS
+SELECT DISTINCT MUN_NOME, SER_NOME, TUR_PERIODO, TUR_NOME, AVA_NOME, DIS_NOME, TES_NOME
+FROM avaliacao;
+
+CREATE TABLE dim_municipio (
+    MUN_ID INTEGER PRIMARY KEY,          -- Chave do município na fato
+    MUN_NOME VARCHAR(60) UNIQUE          -- NOME DO MUNICÍPIO
+);
+INSERT INTO dim_municipio (MUN_ID, MUN_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY MUN_NOME), MUN_NOME
+FROM (SELECT DISTINCT MUN_NOME FROM valores_fato WHERE MUN_NOME IS NOT NULL) v;
+
+CREATE TABLE dim_serie (
+    SER_ID INTEGER PRIMARY KEY,          -- Chave da série na fato
+    SER_NOME VARCHAR(30) UNIQUE          -- NOME DA SÉRIE
+);
+INSERT INTO dim_serie (SER_ID, SER_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY SER_NOME), SER_NOME
+FROM (SELECT DISTINCT SER_NOME FROM valores_fato WHERE SER_NOME IS NOT NULL) v;
+
+CREATE TABLE dim_periodo (
+    PER_ID INTEGER PRIMARY KEY,          -- Chave do turno na fato
+    TUR_PERIODO VARCHAR(15) UNIQUE       -- TURNO DE ATIVIDADE (Manhã, Tarde)
+);
+INSERT INTO dim_periodo (PER_ID, TUR_PERIODO)
+SELECT ROW_NUMBER() OVER (ORDER BY TUR_PERIODO), TUR_PERIODO
+FROM (SELECT DISTINCT TUR_PERIODO FROM valores_fato WHERE TUR_PERIODO IS NOT NULL) v;
+
+CREATE TABLE dim_turma (
+    TUR_ID INTEGER PRIMARY KEY,          -- Chave da turma na fato
+    TUR_NOME VARCHAR(20) UNIQUE          -- NOME DO TURNO/TURMA
+);
+INSERT INTO dim_turma (TUR_ID, TUR_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY TUR_NOME), TUR_NOME
+FROM (SELECT DISTINCT TUR_NOME FROM valores_fato WHERE TUR_NOME IS NOT NULL) v;
+
+CREATE TABLE dim_avaliacao (
+    AVA_ID INTEGER PRIMARY KEY,          -- Chave da avaliação na fato
+    AVA_NOME VARCHAR(50) UNIQUE          -- NOME DA AVALIAÇÃO
+);
+INSERT INTO dim_avaliacao (AVA_ID, AVA_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY AVA_NOME), AVA_NOME
+FROM (SELECT DISTINCT AVA_NOME FROM valores_fato WHERE AVA_NOME IS NOT NULL) v;
+
+CREATE TABLE dim_disciplina (
+    DIS_ID INTEGER PRIMARY KEY,          -- Chave da disciplina na fato
+    DIS_NOME VARCHAR(30) UNIQUE          -- NOME DA DISCIPLINA
+);
+INSERT INTO dim_disciplina (DIS_ID, DIS_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY DIS_NOME), DIS_NOME
+FROM (SELECT DISTINCT DIS_NOME FROM valores_fato WHERE DIS_NOME IS NOT NULL) v;
+
+CREATE TABLE dim_teste (
+    TES_ID INTEGER PRIMARY KEY,          -- Chave do teste na fato
+    TES_NOME VARCHAR(30) UNIQUE          -- NOME DO TESTE
+);
+INSERT INTO dim_teste (TES_ID, TES_NOME)
+SELECT ROW_NUMBER() OVER (ORDER BY TES_NOME), TES_NOME
+FROM (SELECT DISTINCT TES_NOME FROM valores_fato WHERE TES_NOME IS NOT NULL) v;
+
+DROP TABLE valores_fato;
+
+SELECT COUNT(*) FROM dim_teste;
+.print "✅ Dicionários da tabela fato criados com sucesso!"
+
 -- ============================================================================
--- ETAPA 3: CRIAÇÃO DA TABELA AUXILIAR NORMALIZADA
+-- ETAPA 3: VIEW AUXILIAR NORMALIZADA
 -- ============================================================================
-.print "📋 Criando tabela auxiliar 'teste'..."
+.print "📋 Criando view auxiliar 'teste'..."
 
 -- ----------------------------------------------------------------------------
--- TABELA TESTE (auxiliar)
+-- VIEW TESTE (auxiliar)
 -- Versão normalizada da tabela original sem redundâncias de dimensões
 -- Mantém apenas as chaves estrangeiras para as dimensões
+-- É uma view sobre avaliacao: copiar a tabela inteira dobraria o volume
+-- gravado e o espaço em disco da carga. A fato é agregada direto de avaliacao.
 -- ----------------------------------------------------------------------------
-CREATE TABLE teste (
-    MUN_UF         CHAR(2),              -- SIGLA DA UNIDADE DA FEDERAÇÃO
-    MUN_NOME       VARCHAR(60),          -- NOME DO MUNICÍPIO
-    ESC_INEP       CHAR(8),              -- FK para dim_escola - CÓDIGO INEP DA ESCOLA
-    SER_NUMBER     INTEGER,              -- NÚMERO DO ANO/SÉRIE
-    SER_NOME       VARCHAR(30),          -- NOME DA SÉRIE
-    TUR_PERIODO    VARCHAR(15),          -- TURNO DE ATIVIDADE (Manhã, Tarde)
-    TUR_NOME       VARCHAR(20),          -- NOME DO TURNO
-    ALU_ID         INTEGER,              -- FK para dim_aluno - IDENTIFICAÇÃO DO ALUNO
-    ALU_CPF        VARCHAR(15),          -- CPF DO ALUNO (redundante, para compatibilidade)
-    AVA_NOME       VARCHAR(50),          -- NOME DA AVALIAÇÃO
-    AVA_ANO        INTEGER,              -- ANO DA AVALIAÇÃO
-    DIS_NOME       VARCHAR(30),          -- NOME DA DISCIPLINA
-    TES_NOME       VARCHAR(30),          -- NOME DO TESTE
-    TEG_ORDEM      INTEGER,              -- ORDEM DA QUESTÃO DO TESTE
-    ATR_RESPOSTA   CHAR(1),              -- RESPOSTA DO ALUNO NA QUESTÃO
-    ATR_CERTO      INTEGER,              -- SE 1 ACERTOU, SE 0 ERROU
-    MTI_CODIGO     VARCHAR(15)           -- FK para dim_descritor - CÓDIGO DO DESCRITOR
-);
-
--- Popula a tabela teste com dados normalizados (sem nomes de dimensões)
-INSERT INTO teste (
-    MUN_UF, MUN_NOME, ESC_INEP, SER_NUMBER, SER_NOME, TUR_PERIODO, TUR_NOME, 
-    ALU_ID, ALU_CPF, AVA_NOME, AVA_ANO, DIS_NOME, TES_NOME, TEG_ORDEM, 
-    ATR_RESPOSTA, ATR_CERTO, MTI_CODIGO
-)
+CREATE VIEW teste AS
 SELECT 
     MUN_UF, MUN_NOME, ESC_INEP, SER_NUMBER, SER_NOME, TUR_PERIODO, TUR_NOME, 
     ALU_ID, ALU_CPF, AVA_NOME, AVA_ANO, DIS_NOME, TES_NOME, TEG_ORDEM, 
     ATR_RESPOSTA, ATR_CERTO, MTI_CODIGO  
 FROM avaliacao;
 
-SELECT COUNT(*) FROM teste;
-.print "✅ Tabela 'teste' (versão otimizada da fonte) criada e populada!"
+.print "✅ View 'teste' (versão otimizada da fonte) criada!"
 
 -- ============================================================================
 -- ETAPA 4: CRIAÇÃO DA TABELA FATO
@@ -157,48 +221,96 @@ SELECT COUNT(*) FROM teste;
 .print "⭐ Criando tabela fato principal..."
 
 -- ----------------------------------------------------------------------------
--- TABELA FATO: fato_resposta_aluno
+-- TABELA FATO: fato_resposta_compacta
 -- Agregação por aluno, descritor e contexto, com métricas de acerto/erro
 -- É o coração do Star Schema - onde ficam as métricas de negócio
+-- Os textos repetidos são substituídos pelas chaves inteiras dos dicionários
+-- ----------------------------------------------------------------------------
+CREATE TABLE fato_resposta_compacta (
+    MUN_UF      CHAR(2),      -- Unidade da Federação
+    MUN_ID      INTEGER,      -- FK para dim_municipio
+    ESC_INEP    CHAR(8),      -- Código da Escola (FK para dim_escola)
+    SER_NUMBER  INTEGER,      -- Número da Série
+    SER_ID      INTEGER,      -- FK para dim_serie
+    PER_ID      INTEGER,      -- FK para dim_periodo
+    TUR_ID      INTEGER,      -- FK para dim_turma
+    ALU_ID      INTEGER,      -- ID do Aluno (FK para dim_aluno)
+    AVA_ID      INTEGER,      -- FK para dim_avaliacao
+    AVA_ANO     INTEGER,      -- Ano da Avaliação
+    DIS_ID      INTEGER,      -- FK para dim_disciplina
+    TES_ID      INTEGER,      -- FK para dim_teste
+    MTI_ID      INTEGER,      -- FK para dim_descritor
+    ACERTO      INTEGER,      -- Total de acertos
+    ERRO        INTEGER       -- Total de erros
+);
+
+-- Agrega primeiro (pelos textos) e só então traduz para as chaves, de modo
+-- que a busca nos dicionários é feita uma vez por linha da fato.
+-- As linhas são gravadas na ordem dos filtros dos dashboards (ano, disciplina,
+-- teste, série): a visão de um ano/teste lê um trecho contíguo da tabela.
+-- Nesta carga completa as chaves seguem a ordem alfabética dos textos
+-- (ROW_NUMBER acima). A carga incremental (SAEVDataProcessor) acrescenta
+-- valores novos após a maior chave existente e grava cada partição
+-- recarregada como um bloco ao final da tabela: as chaves são estáveis (nunca
+-- renumeradas), mas não ordenadas. Ordene sempre pelos textos, nunca pelos IDs.
+INSERT INTO fato_resposta_compacta
+SELECT 
+    f.MUN_UF, m.MUN_ID, f.ESC_INEP, f.SER_NUMBER, s.SER_ID, p.PER_ID, t.TUR_ID,
+    f.ALU_ID, a.AVA_ID, f.AVA_ANO, d.DIS_ID, te.TES_ID, de.MTI_ID,
+    f.ACERTO, f.ERRO
+FROM (
+    SELECT 
+        MUN_UF, MUN_NOME, ESC_INEP, SER_NUMBER, SER_NOME, TUR_PERIODO, TUR_NOME,
+        ALU_ID, AVA_NOME, AVA_ANO, DIS_NOME, TES_NOME, MTI_CODIGO,
+        -- MÉTRICAS DE NEGÓCIO (Fatos)
+        -- CAST mantém INTEGER também no DuckDB (onde SUM retorna HUGEINT)
+        CAST(SUM(CASE WHEN ATR_CERTO = 1 THEN 1 ELSE 0 END) AS INTEGER) AS ACERTO,
+        CAST(SUM(CASE WHEN ATR_CERTO = 0 THEN 1 ELSE 0 END) AS INTEGER) AS ERRO
+    FROM avaliacao
+    -- WHERE <partição>  (a carga incremental reusa esta instrução trocando esta linha pelo filtro da partição)
+    GROUP BY 
+        MUN_UF, MUN_NOME, ESC_INEP, SER_NUMBER, SER_NOME, 
+        TUR_PERIODO, TUR_NOME, ALU_ID, AVA_NOME, AVA_ANO, 
+        DIS_NOME, TES_NOME, MTI_CODIGO
+) f
+LEFT JOIN dim_municipio m ON m.MUN_NOME = f.MUN_NOME
+LEFT JOIN dim_serie s ON s.SER_NOME = f.SER_NOME
+LEFT JOIN dim_periodo p ON p.TUR_PERIODO = f.TUR_PERIODO
+LEFT JOIN dim_turma t ON t.TUR_NOME = f.TUR_NOME
+LEFT JOIN dim_avaliacao a ON a.AVA_NOME = f.AVA_NOME
+LEFT JOIN dim_disciplina d ON d.DIS_NOME = f.DIS_NOME
+LEFT JOIN dim_teste te ON te.TES_NOME = f.TES_NOME
+LEFT JOIN dim_descritor de ON de.MTI_CODIGO = f.MTI_CODIGO
+ORDER BY f.AVA_ANO, d.DIS_ID, te.TES_ID, s.SER_ID;
+
+-- Índice com o mesmo prefixo da ordem física (filtros dos dashboards)
+create index idx_fato_resposta_aluno ON fato_resposta_compacta (AVA_ANO, DIS_ID, TES_ID, SER_ID, MUN_ID, ESC_INEP);
+
+-- ----------------------------------------------------------------------------
+-- VIEW DE COMPATIBILIDADE: fato_resposta_aluno
+-- Mesmas colunas (e nomes) da tabela fato original; consultas existentes
+-- continuam funcionando. Junções com dicionários não usados na consulta
+-- são descartadas pelo otimizador (LEFT JOIN em chave única).
 -- ----------------------------------------------------------------------------
-CREATE TABLE fato_resposta_aluno AS 
+CREATE VIEW fato_resposta_aluno AS
 SELECT 
-    -- Dimensões geográficas e administrativas
-    MUN_UF,           -- Unidade da Federação
-    MUN_NOME,         -- Nome do Município
-    ESC_INEP,         -- Código da Escola (FK para dim_escola)
-    
-    -- Dimensões educacionais
-    SER_NUMBER,       -- Número da Série
-    SER_NOME,         -- Nome da Série
-    TUR_PERIODO,      -- Período do Turno
-    TUR_NOME,         -- Nome do Turno
-    
-    -- Dimensão do aluno
-    ALU_ID,           -- ID do Aluno (FK para dim_aluno)
-    
-    -- Dimensões de avaliação
-    AVA_NOME,         -- Nome da Avaliação
-    AVA_ANO,          -- Ano da Avaliação
-    DIS_NOME,         -- Disciplina
-    TES_NOME,         -- Nome do Teste
-    MTI_CODIGO,       -- Código do Descritor (FK para dim_descritor)
-    
-    -- MÉTRICAS DE NEGÓCIO (Fatos)
-    SUM(CASE WHEN ATR_CERTO = 1 THEN 1 ELSE 0 END) AS ACERTO,  -- Total de acertos
-    SUM(CASE WHEN ATR_CERTO = 0 THEN 1 ELSE 0 END) AS ERRO     -- Total de erros
-FROM teste
-GROUP BY 
-    MUN_UF, MUN_NOME, ESC_INEP, SER_NUMBER, SER_NOME, 
-    TUR_PERIODO, TUR_NOME, ALU_ID, AVA_NOME, AVA_ANO, 
-    DIS_NOME, TES_NOME, MTI_CODIGO;
-
-create index idx_fato_resposta_aluno ON fato_resposta_aluno (AVA_ANO,MUN_UF, MUN_NOME, ESC_INEP, DIS_NOME);
+    f.MUN_UF, m.MUN_NOME, f.ESC_INEP, f.SER_NUMBER, s.SER_NOME, p.TUR_PERIODO, t.TUR_NOME,
+    f.ALU_ID, a.AVA_NOME, f.AVA_ANO, d.DIS_NOME, te.TES_NOME, de.MTI_CODIGO,
+    f.ACERTO, f.ERRO
+FROM fato_resposta_compacta f
+LEFT JOIN dim_municipio m ON m.MUN_ID = f.MUN_ID
+LEFT JOIN dim_serie s ON s.SER_ID = f.SER_ID
+LEFT JOIN dim_periodo p ON p.PER_ID = f.PER_ID
+LEFT JOIN dim_turma t ON t.TUR_ID = f.TUR_ID
+LEFT JOIN dim_avaliacao a ON a.AVA_ID = f.AVA_ID
+LEFT JOIN dim_disciplina d ON d.DIS_ID = f.DIS_ID
+LEFT JOIN dim_teste te ON te.TES_ID = f.TES_ID
+LEFT JOIN dim_descritor de ON de.MTI_ID = f.MTI_ID;
 
 .print "📊 Tabela fato_resposta_aluno criada com agregações de métricas!"
 
 
-SELECT COUNT(*) FROM fato_resposta_aluno;
+SELECT COUNT(*) FROM fato_resposta_compacta;
 .print "✅ Tabela fato_resposta_aluno criada e populada com sucesso!"
 
 -- ============================================================================
@@ -215,8 +327,11 @@ SELECT COUNT(*) FROM fato_resposta_aluno;
 .print "   - dim_aluno:           Dimensão de alunos únicos"
 .print "   - dim_escola:          Dimensão de escolas únicas"  
 .print "   - dim_descritor:       Dimensão de descritores com estatísticas"
-.print "   - fato_resposta_aluno: Tabela fato com métricas agregadas"
-.print "   - teste:               Tabela auxiliar normalizada"
+.print "   - dim_municipio, dim_serie, dim_periodo, dim_turma,"
+.print "     dim_avaliacao, dim_disciplina, dim_teste: Dicionários da fato"
+.print "   - fato_resposta_compacta: Tabela fato com chaves inteiras e métricas"
+.print "   - fato_resposta_aluno: View da fato com os nomes originais"
+.print "   - teste:               View auxiliar normalizada (sobre avaliacao)"
 .print ""
 .print "✨ Pronto para análises de BI de alta performance!"
 
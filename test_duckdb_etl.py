@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Teste do ETL nativo em DuckDB: o banco .duckdb gerado direto dos CSVs deve
+ter o mesmo conteúdo do gerado pelo ETL SQLite + migrador (DuckDBMigrator)
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data.etl import SAEVDataProcessor
+from src.data.synthetic import generate_avaliacao_csv
+
+# Tabelas do Star Schema usadas pelos dashboards
+COMPARED_TABLES = [
+    'fato_resposta_aluno', 'dim_aluno', 'dim_escola', 'dim_descritor',
+    'dim_municipio', 'dim_serie', 'dim_periodo', 'dim_turma',
+    'dim_avaliacao', 'dim_disciplina', 'dim_teste',
+    'agg_municipio', 'agg_escola', 'agg_descritor', 'agg_unicidade',
+    'agg_alunos_celula', 'agg_filtro',
+]
+
+
+def table_rows(conn, table: str, columns: list) -> list:
+    """Linhas de uma tabela, ordenadas (a ordem física não importa)"""
+    rows = conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+    return sorted(rows, key=repr)
+
+
+def test_native_duckdb_matches_migration():
+    """ETL engine='duckdb' == ETL SQLite com include_duckdb=True"""
+    with tempfile.TemporaryDirectory(prefix='saev_duckdb_') as tmp:
+        tmp = Path(tmp)
+        csv_folder = tmp / 'csv'
+        files = generate_avaliacao_csv(str(csv_folder), 30_000, years=[2023, 2024], seed=11,
+                                       shard_students=400)
+        print(f"📁 {len(files)} CSVs sintéticos")
+
+        migrated = SAEVDataProcessor(str(tmp / 'migrado.db'))
+        migrated.full_etl_process(csv_folder=str(csv_folder), include_duckdb=True, force_duckdb=True)
+
+        native = SAEVDataProcessor(str(tmp / 'nativo.db'))
+        native.full_etl_process(csv_folder=str(csv_folder), engine='duckdb')
+
+        migrated_conn = duckdb.connect(migrated._duckdb_path(), read_only=True)
+        native_conn = duckdb.connect(native._duckdb_path(), read_only=True)
+        try:
+            for table in COMPARED_TABLES:
+                columns = [row[0] for row in migrated_conn.execute(f"DESCRIBE {table}").fetchall()]
+                migrated_rows = table_rows(migrated_conn, table, columns)
+                native_rows = table_rows(native_conn, table, columns)
+                assert native_rows == migrated_rows, f"{table}: ETL nativo difere do migrador"
+                print(f"   ✅ {table}: {len(migrated_rows):,} linhas iguais")
+        finally:
+            migrated_conn.close()
+            native_conn.close()
+
+
+def main():
+    print("🧪 TESTE DO ETL NATIVO EM DUCKDB")
+    print("=" * 50)
+    try:
+        test_native_duckdb_matches_migration()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
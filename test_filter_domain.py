@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste do domínio dos filtros em cascata (agg_filtro / FilterDomain): as
+opções resolvidas em memória a cada passo da cascata da galeria devem ser
+as mesmas de um SELECT DISTINCT na fato, inclusive após uma nova carga
+"""
+
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data.etl import SAEVDataProcessor
+from src.data.filter_domain import get_filter_domain
+from src.data.query_service import get_query_service
+from src.data.synthetic import SAEVSyntheticGenerator
+
+# Cascata da galeria: coluna e ordem decrescente (anos mais recentes primeiro)
+CASCADE = [('MUN_UF', False), ('MUN_NOME', False), ('ESC_INEP', False), ('AVA_ANO', True),
+           ('DIS_NOME', False), ('TES_NOME', False), ('SER_NOME', False)]
+
+
+def fact_options(service, column: str, selection: dict, descending: bool) -> list:
+    """Opções de um filtro lidas direto da fato"""
+    where_clause, params = service.builder.where(dict(selection))
+    order = "DESC" if descending else "ASC"
+    rows = service.fetchall(
+        f"SELECT DISTINCT {column} FROM fato_resposta_aluno {where_clause} ORDER BY {column} {order}",
+        params
+    )
+    return [row[0] for row in rows if row[0] is not None]
+
+
+def fact_schools(service, selection: dict) -> list:
+    """Escolas (código, nome) da seleção lidas da fato e de dim_escola"""
+    where_clause, params = service.builder.where(dict(selection), alias='f')
+    rows = service.fetchall(f"""
+        SELECT DISTINCT f.ESC_INEP, e.ESC_NOME
+        FROM fato_resposta_aluno f
+        JOIN dim_escola e ON f.ESC_INEP = e.ESC_INEP
+        {where_clause}
+    """, params)
+    return sorted(rows, key=lambda row: (row[1], row[0]))
+
+
+def check_cascade(service, rng: random.Random, walks: int = 20) -> int:
+    """Percorre a cascata com seleções aleatórias comparando cada passo com a fato"""
+    domain = get_filter_domain(service)
+    steps = 0
+    for _ in range(walks):
+        selection = {}
+        for column, descending in CASCADE:
+            options = domain.options(column, selection, descending=descending)
+            assert options == fact_options(service, column, selection, descending), \
+                f"{column} com {selection}"
+            if column == 'ESC_INEP':
+                schools = list(domain.schools(selection).itertuples(index=False, name=None))
+                assert schools == fact_schools(service, selection), f"escolas com {selection}"
+            steps += 1
+            if not options:
+                break
+            selection[column] = rng.sample(options, rng.randint(1, len(options)))
+    return steps
+
+
+def test_filter_cascade_matches_fact():
+    """Cascata igual à fato no SQLite e no DuckDB, e atualizada após a carga incremental"""
+    with tempfile.TemporaryDirectory(prefix='saev_filtros_') as tmp:
+        tmp = Path(tmp)
+        generated = tmp / 'gerados'
+        csv_folder = tmp / 'csv'
+        csv_folder.mkdir()
+        files = SAEVSyntheticGenerator(160_000, years=[2023, 2024], seed=13).generate(str(generated))
+        rng = random.Random(13)
+
+        for csv_file in files:
+            if '_2023_' in csv_file.name:
+                shutil.copy(csv_file, csv_folder)
+        processor = SAEVDataProcessor(str(tmp / 'filtros.db'))
+        processor.full_etl_process(csv_folder=str(csv_folder))
+
+        service = get_query_service(processor.db_path)
+        steps = check_cascade(service, rng)
+        assert get_filter_domain(service).options('AVA_ANO') == [2023]
+        print(f"   ✅ sqlite: {steps} passos da cascata iguais à fato")
+
+        # Nova carga incremental: agg_filtro atualizado e domínio recarregado
+        for csv_file in files:
+            if '_2024_' in csv_file.name:
+                shutil.copy(csv_file, csv_folder)
+        processor.full_etl_process(csv_folder=str(csv_folder), incremental=True)
+        assert get_filter_domain(service).options('AVA_ANO') == [2023, 2024]
+        steps = check_cascade(service, rng)
+        print(f"   ✅ sqlite após carga incremental: {steps} passos da cascata iguais à fato")
+        service.close()
+
+        processor.full_etl_process(csv_folder=str(csv_folder), engine='duckdb')
+        service = get_query_service(processor._duckdb_path())
+        steps = check_cascade(service, rng)
+        print(f"   ✅ duckdb: {steps} passos da cascata iguais à fato")
+        service.close()
+
+
+def main():
+    print("🧪 TESTE DO DOMÍNIO DOS FILTROS EM CASCATA")
+    print("=" * 50)
+    try:
+        test_filter_cascade_matches_fact()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
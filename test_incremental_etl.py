@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Teste da carga incremental: o banco atualizado por partições deve ficar igual
+ao reconstruído do zero com os mesmos CSVs (avaliacao, Star Schema e agg_*)
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data.etl import FACT_DICTIONARIES, PARTITION_COLUMNS, SAEVDataProcessor
+from src.data.synthetic import SAEVSyntheticGenerator
+
+# Tabelas comparadas (apenas colunas de texto e métricas: as chaves inteiras
+# dos dicionários são estáveis, mas não seguem a mesma ordem após a carga incremental)
+COMPARED_TABLES = {
+    'avaliacao': None,
+    'fato_resposta_aluno': None,
+    'dim_aluno': None,
+    'dim_escola': None,
+    'dim_descritor': ['MTI_CODIGO', 'MTI_DESCRITOR', 'QTD'],
+    'agg_municipio': None,
+    'agg_escola': None,
+    'agg_descritor': None,
+    'agg_unicidade': None,
+    'agg_alunos_celula': None,
+    'agg_filtro': None,
+    **{table: [column] for column, (table, _) in FACT_DICTIONARIES.items()},
+}
+
+
+def table_rows(db_path: str, table: str, columns=None) -> list:
+    """Linhas de uma tabela, ordenadas (a ordem física não importa)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        select = ", ".join(columns) if columns else "*"
+        rows = conn.execute(f"SELECT {select} FROM {table}").fetchall()
+    finally:
+        conn.close()
+    return sorted(rows, key=repr)
+
+
+def change_partition(csv_file: Path, discipline: str):
+    """Inverte o acerto das respostas de uma disciplina em um CSV"""
+    df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+    selected = df['DIS_NOME'] == discipline
+    df.loc[selected, 'ATR_CERTO'] = df.loc[selected, 'ATR_CERTO'].map({'0': '1', '1': '0'})
+    df.to_csv(csv_file, index=False)
+
+
+def remove_rows(csv_folder: Path, column: str, value: str) -> set:
+    """Apaga de todos os CSVs as linhas com ``column == value``; retorna as partições afetadas"""
+    partitions = set()
+    for csv_file in sorted(csv_folder.glob('*.csv')):
+        df = pd.read_csv(csv_file, dtype=str, keep_default_na=False)
+        removed = df[column] == value
+        if removed.any():
+            partitions |= {(int(ano), nome, disciplina) for ano, nome, disciplina
+                           in df.loc[removed, PARTITION_COLUMNS].drop_duplicates().itertuples(index=False)}
+            df[~removed].to_csv(csv_file, index=False)
+    return partitions
+
+
+def test_incremental_matches_full_rebuild():
+    """Carga completa + incrementais (novos CSVs, correção, remoções) == carga completa dos CSVs finais"""
+    with tempfile.TemporaryDirectory(prefix='saev_incremental_') as tmp:
+        tmp = Path(tmp)
+        generated = tmp / 'gerados'
+        csv_folder = tmp / 'csv'
+        csv_folder.mkdir()
+
+        generator = SAEVSyntheticGenerator(40_000, years=[2023, 2024], seed=7, shard_students=300)
+        files = generator.generate(str(generated))
+        files_2023 = [csv_file for csv_file in files if '_2023_' in csv_file.name]
+        files_2024 = [csv_file for csv_file in files if '_2024_' in csv_file.name]
+        print(f"📁 {len(files)} CSVs sintéticos ({generator.rows_written:,} respostas)")
+
+        incremental_db = str(tmp / 'incremental.db')
+        processor = SAEVDataProcessor(incremental_db)
+
+        # 1. Carga completa de 2023
+        for csv_file in files_2023:
+            shutil.copy(csv_file, csv_folder)
+        processor.full_etl_process(csv_folder=str(csv_folder))
+
+        # 2. Chegam os CSVs de 2024: só as partições de 2024 são carregadas
+        for csv_file in files_2024:
+            shutil.copy(csv_file, csv_folder)
+        changed = processor.load_csv_incremental(csv_folder=str(csv_folder))
+        assert {key[0] for key in changed} == {2024}, changed
+        print(f"✅ Novos CSVs: {len(changed)} partições de 2024 carregadas")
+
+        # 3. Correção em uma disciplina de 2023: só essa partição é recarregada
+        change_partition(csv_folder / files_2023[0].name, 'Matemática')
+        changed = processor.load_csv_incremental(csv_folder=str(csv_folder))
+        assert [(key[0], key[2]) for key in changed] == [(2023, 'Matemática')], changed
+        print(f"✅ CSV corrigido: partição {changed[0]} recarregada")
+
+        # 4. Um aluno, uma escola e um descritor somem dos CSVs: as dimensões são podadas
+        conn = sqlite3.connect(incremental_db)
+        student, school, descriptor = conn.execute(
+            "SELECT (SELECT MIN(ALU_ID) FROM dim_aluno), (SELECT MIN(ESC_INEP) FROM dim_escola), "
+            "(SELECT MAX(MTI_CODIGO) FROM dim_descritor)"
+        ).fetchone()
+        conn.close()
+        affected = set()
+        for column, value in (('ALU_ID', str(student)), ('ESC_INEP', school), ('MTI_CODIGO', descriptor)):
+            affected |= remove_rows(csv_folder, column, value)
+        changed = processor.load_csv_incremental(csv_folder=str(csv_folder))
+        assert set(changed) == affected, changed
+        conn = sqlite3.connect(incremental_db)
+        leftovers = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM dim_aluno WHERE ALU_ID = ?), "
+            "(SELECT COUNT(*) FROM dim_escola WHERE ESC_INEP = ?), "
+            "(SELECT COUNT(*) FROM dim_descritor WHERE MTI_CODIGO = ?)",
+            (student, school, descriptor)
+        ).fetchone()
+        conn.close()
+        assert leftovers == (0, 0, 0), f"dimensões com chaves sem referência: {leftovers}"
+        print(f"✅ Aluno {student}, escola {school} e descritor {descriptor} removidos das dimensões "
+              f"({len(changed)} partições recarregadas)")
+
+        # 5. Sem mudanças: nada a carregar
+        assert processor.load_csv_incremental(csv_folder=str(csv_folder)) == []
+        print("✅ Sem mudanças: nenhuma partição recarregada")
+
+        # 6. Reconstrução completa com os mesmos CSVs
+        full_db = str(tmp / 'completo.db')
+        SAEVDataProcessor(full_db).full_etl_process(csv_folder=str(csv_folder))
+
+        for table, columns in COMPARED_TABLES.items():
+            incremental_rows = table_rows(incremental_db, table, columns)
+            full_rows = table_rows(full_db, table, columns)
+            assert incremental_rows == full_rows, f"{table}: incremental difere da carga completa"
+            print(f"   ✅ {table}: {len(full_rows):,} linhas iguais")
+
+
+def main():
+    print("🧪 TESTE DA CARGA INCREMENTAL")
+    print("=" * 50)
+    try:
+        test_incremental_matches_full_rebuild()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de resultados dos dashboards: consultas repetidas vêm do
+cache, parâmetros diferentes não se misturam e uma nova carga do banco
+invalida os resultados guardados
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data.etl import SAEVDataProcessor
+from src.data.query_cache import get_query_cache
+from src.data.query_service import get_query_service
+from src.data.synthetic import SAEVSyntheticGenerator
+
+COUNT_BY_YEAR = "SELECT AVA_ANO, COUNT(*) as linhas FROM fato_resposta_aluno GROUP BY AVA_ANO ORDER BY AVA_ANO"
+COUNT_BY_DISCIPLINE = "SELECT COUNT(*) as linhas FROM fato_resposta_aluno WHERE DIS_NOME = ?"
+
+
+def direct_counts(conn) -> dict:
+    """Linhas por ano lidas sem o serviço (nem o cache)"""
+    return dict(conn.execute(COUNT_BY_YEAR).fetchall())
+
+
+def cached_counts(service) -> dict:
+    """Linhas por ano pelo serviço, com cache"""
+    df = service.query(COUNT_BY_YEAR, filters={'years': 'todos'})
+    return dict(zip(df['AVA_ANO'].tolist(), df['linhas'].tolist()))
+
+
+def check_repeated_queries(service):
+    """Segunda execução vem do cache; parâmetros diferentes não colidem"""
+    cache = get_query_cache()
+    cached_counts(service)
+    hits = cache.stats()['hits']
+    cached_counts(service)
+    assert cache.stats()['hits'] == hits + 1, "consulta repetida deveria vir do cache"
+
+    for discipline in ('Língua Portuguesa', 'Matemática'):
+        cached = service.query(COUNT_BY_DISCIPLINE, [discipline])
+        uncached = service.query(COUNT_BY_DISCIPLINE, [discipline], use_cache=False)
+        assert cached.equals(uncached), f"{discipline}: o cache devolveu o resultado de outros parâmetros"
+    print(f"   ✅ {service.engine}: consulta repetida servida pelo cache, parâmetros separados")
+
+
+def test_cache_invalidated_by_new_load():
+    """Nova carga (incremental no SQLite, completa no DuckDB) invalida o cache"""
+    with tempfile.TemporaryDirectory(prefix='saev_cache_') as tmp:
+        tmp = Path(tmp)
+        generated = tmp / 'gerados'
+        csv_folder = tmp / 'csv'
+        csv_folder.mkdir()
+        files = SAEVSyntheticGenerator(20_000, years=[2023, 2024], seed=9).generate(str(generated))
+
+        for csv_file in files:
+            if '_2023_' in csv_file.name:
+                shutil.copy(csv_file, csv_folder)
+
+        processor = SAEVDataProcessor(str(tmp / 'cache.db'))
+        processor.full_etl_process(csv_folder=str(csv_folder))
+        processor.full_etl_process(csv_folder=str(csv_folder), engine='duckdb')
+
+        services = [get_query_service(processor.db_path), get_query_service(processor._duckdb_path())]
+        before = {}
+        for service in services:
+            check_repeated_queries(service)
+            before[service.engine] = cached_counts(service)
+            assert list(before[service.engine]) == [2023]
+
+        # Nova carga com os CSVs de 2024. O DuckDB não abre o arquivo para
+        # escrita enquanto o processo mantém conexões somente leitura: as
+        # conexões são fechadas, mas o cache de resultados continua cheio
+        for service in services:
+            service.close()
+        for csv_file in files:
+            if '_2024_' in csv_file.name:
+                shutil.copy(csv_file, csv_folder)
+        processor.full_etl_process(csv_folder=str(csv_folder), incremental=True)
+        processor.full_etl_process(csv_folder=str(csv_folder), engine='duckdb')
+
+        sqlite_conn = sqlite3.connect(processor.db_path)
+        duck_conn = duckdb.connect(processor._duckdb_path(), read_only=True)
+        try:
+            expected = {'sqlite': direct_counts(sqlite_conn), 'duckdb': direct_counts(duck_conn)}
+        finally:
+            sqlite_conn.close()
+            duck_conn.close()
+
+        for service in services:
+            after = cached_counts(service)
+            assert after == expected[service.engine], f"{service.engine}: resultado antigo servido após a carga"
+            assert list(after) == [2023, 2024]
+            print(f"   ✅ {service.engine}: nova carga invalidou o cache ({before[service.engine]} → {after})")
+            service.close()
+
+
+def main():
+    print("🧪 TESTE DO CACHE DE RESULTADOS")
+    print("=" * 50)
+    try:
+        test_cache_invalidated_by_new_load()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
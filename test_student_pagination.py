@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Teste da paginação por chave da tabela de alunos (análise detalhada):
+percorrer todas as páginas deve trazer cada aluno exatamente uma vez, na
+ordem da taxa de acerto, inclusive com empates na taxa
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.dashboard.queries import (STUDENT_PAGE_KEY, detailed_student_ranking_query,
+                                   detailed_students_page_query)
+from src.data.etl import SAEVDataProcessor
+from src.data.filter_domain import get_filter_domain
+from src.data.query_service import get_query_service
+from src.data.synthetic import generate_avaliacao_csv
+
+PAGE_SIZE = 37
+
+
+def gallery_filters(service, **narrowed) -> dict:
+    """Filtros do painel com todas as opções selecionadas (exceto as informadas)"""
+    domain = get_filter_domain(service)
+    columns = {'states': 'MUN_UF', 'municipalities': 'MUN_NOME', 'schools': 'ESC_INEP',
+               'years': 'AVA_ANO', 'disciplines': 'DIS_NOME', 'tests': 'TES_NOME', 'series': 'SER_NOME'}
+    filters = {name: domain.options(column) for name, column in columns.items()}
+    filters.update(narrowed)
+    return filters
+
+
+def expected_students(service, filters: dict) -> pd.DataFrame:
+    """Alunos da seleção calculados à parte, direto da fato"""
+    where_clause, params = service.builder.where({
+        'MUN_UF': filters['states'], 'MUN_NOME': filters['municipalities'],
+        'ESC_INEP': filters['schools'], 'AVA_ANO': filters['years'],
+        'DIS_NOME': filters['disciplines'], 'TES_NOME': filters['tests'],
+        'SER_NOME': filters['series'],
+    })
+    df = service.query(f"""
+        SELECT ALU_ID, MUN_NOME, ESC_INEP, SER_NOME,
+            SUM(ACERTO) as total_acertos, SUM(ACERTO + ERRO) as total_questoes
+        FROM fato_resposta_aluno
+        {where_clause}
+        GROUP BY ALU_ID, MUN_NOME, ESC_INEP, SER_NOME
+    """, params, use_cache=False)
+    return df[df['total_questoes'] > 0]
+
+
+def all_pages(service, filters: dict) -> list:
+    """Percorre a tabela de alunos como o botão 'Próxima' da galeria"""
+    pages, after = [], None
+    while True:
+        page = service.query(*detailed_students_page_query(service.builder, filters, PAGE_SIZE, after),
+                             use_cache=False)
+        has_next = len(page) > PAGE_SIZE
+        page = page.head(PAGE_SIZE)
+        pages.append(page)
+        if not has_next:
+            return pages
+        last = page.iloc[-1]
+        after = [last['taxa_acerto'].item()] + [
+            last[column].item() if hasattr(last[column], 'item') else last[column]
+            for column in STUDENT_PAGE_KEY
+        ]
+
+
+def check_pagination(service, filters: dict, label: str):
+    """Todas as páginas juntas == todos os alunos da seleção, sem repetição"""
+    expected = expected_students(service, filters)
+    pages = all_pages(service, filters)
+    students = pd.concat(pages, ignore_index=True)
+
+    assert not students.duplicated(STUDENT_PAGE_KEY).any(), f"{label}: aluno repetido entre páginas"
+    assert len(students) == len(expected), f"{label}: {len(students)} linhas paginadas, esperadas {len(expected)}"
+    paged_keys = set(map(tuple, students[STUDENT_PAGE_KEY].astype(str).to_numpy()))
+    expected_keys = set(map(tuple, expected[STUDENT_PAGE_KEY].astype(str).to_numpy()))
+    assert paged_keys == expected_keys, f"{label}: alunos diferentes da fato"
+    assert len(pages) == max(1, -(-len(expected) // PAGE_SIZE)), f"{label}: quantidade de páginas"
+    assert students['taxa_acerto'].is_monotonic_decreasing, f"{label}: páginas fora de ordem"
+
+    ties = int(students['taxa_acerto'].duplicated().sum())
+    top = service.query(*detailed_student_ranking_query(service.builder, filters, 10, best=True),
+                        use_cache=False)
+    assert top['ALU_ID'].tolist() == students['ALU_ID'].head(10).tolist(), f"{label}: ranking ≠ 1ª página"
+    print(f"   ✅ {service.engine} {label}: {len(students):,} alunos em {len(pages)} páginas "
+          f"({ties:,} empates na taxa)")
+
+
+def test_student_pages_are_complete():
+    """Paginação completa e estável no SQLite e no DuckDB"""
+    with tempfile.TemporaryDirectory(prefix='saev_paginas_') as tmp:
+        tmp = Path(tmp)
+        csv_folder = tmp / 'csv'
+        generate_avaliacao_csv(str(csv_folder), 60_000, years=[2023, 2024], seed=21)
+
+        processor = SAEVDataProcessor(str(tmp / 'paginas.db'))
+        processor.full_etl_process(csv_folder=str(csv_folder))
+        processor.full_etl_process(csv_folder=str(csv_folder), engine='duckdb')
+
+        for db_path in (processor.db_path, processor._duckdb_path()):
+            service = get_query_service(db_path)
+            everything = gallery_filters(service)
+            check_pagination(service, everything, "seleção completa")
+            check_pagination(service, gallery_filters(service, years=everything['years'][-1:],
+                                                      disciplines=everything['disciplines'][:1]),
+                             "um ano e uma disciplina")
+            service.close()
+
+
+def main():
+    print("🧪 TESTE DA PAGINAÇÃO DA TABELA DE ALUNOS")
+    print("=" * 50)
+    try:
+        test_student_pages_are_complete()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
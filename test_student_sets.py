@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste dos conjuntos de alunos por célula (agg_alunos_celula): a união das
+células deve dar a contagem exata de alunos distintos da fato no modo
+'exato' e uma estimativa próxima no modo 'aproximado' (HyperLogLog)
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data import student_sets
+from src.data.etl import SAEVDataProcessor
+from src.data.query_builder import SAEVQueryBuilder
+from src.data.synthetic import generate_avaliacao_csv
+
+# Erro relativo aceito no modo aproximado (erro padrão do HLL ~1,6%)
+APPROX_TOLERANCE = 0.05
+
+
+def selections(conn) -> list:
+    """Combinações de filtros dos painéis: coluna da célula -> valores"""
+    def values(column):
+        return [row[0] for row in conn.execute(
+            f"SELECT DISTINCT {column} FROM fato_resposta_aluno ORDER BY 1")]
+
+    years, disciplines = values('AVA_ANO'), values('DIS_NOME')
+    series, municipalities = values('SER_NOME'), values('MUN_NOME')
+    schools = values('ESC_INEP')
+    return [
+        {},
+        {'AVA_ANO': years[:1]},
+        {'AVA_ANO': years, 'DIS_NOME': disciplines[:1]},
+        {'MUN_UF': values('MUN_UF')[:1]},
+        {'MUN_NOME': municipalities[:2], 'SER_NOME': series[:2]},
+        {'ESC_INEP': schools[:3], 'AVA_ANO': years[-1:]},
+        {'TES_NOME': values('TES_NOME')[:1]},
+    ]
+
+
+def fact_count(conn, filters: dict) -> int:
+    """COUNT(DISTINCT ALU_ID) da fato com os mesmos filtros"""
+    where_clause, params = SAEVQueryBuilder('sqlite').where(filters)
+    return conn.execute(f"SELECT COUNT(DISTINCT ALU_ID) FROM fato_resposta_aluno {where_clause}",
+                        params).fetchone()[0]
+
+
+def cell_count(conn, filters: dict) -> int:
+    """Alunos distintos pela união das células selecionadas"""
+    where_clause, params = student_sets.cell_filter_sql(filters)
+    cells = pd.read_sql_query(f"SELECT * FROM {student_sets.CELL_TABLE} {where_clause}", conn, params=params)
+    return student_sets.count_students(cells)
+
+
+def cell_rows(conn) -> list:
+    """Linhas de agg_alunos_celula em ordem canônica"""
+    return sorted(conn.execute(f"SELECT * FROM {student_sets.CELL_TABLE}").fetchall(), key=repr)
+
+
+def test_student_set_counts():
+    """Contagens exatas e aproximadas de alunos distintos"""
+    with tempfile.TemporaryDirectory(prefix='saev_alunos_') as tmp:
+        tmp = Path(tmp)
+        csv_folder = tmp / 'csv'
+        generate_avaliacao_csv(str(csv_folder), 150_000, years=[2023, 2024], seed=3)
+
+        processor = SAEVDataProcessor(str(tmp / 'alunos.db'))
+        processor.full_etl_process(csv_folder=str(csv_folder))
+
+        conn = sqlite3.connect(processor.db_path)
+        try:
+            # Modo exato (construído pelo ETL): igual à fato
+            for filters in selections(conn):
+                expected = fact_count(conn, filters)
+                assert cell_count(conn, filters) == expected, f"exato {filters}"
+                print(f"   ✅ exato {sorted(filters) or ['(todos)']}: {expected:,} alunos")
+
+            # Lotes pequenos: células atravessam lotes da leitura da fato
+            built_by_etl = cell_rows(conn)
+            batch_size = student_sets.FETCH_BATCH_SIZE
+            student_sets.FETCH_BATCH_SIZE = 997
+            try:
+                student_sets.build_student_sets(conn, mode=student_sets.MODE_EXACT)
+            finally:
+                student_sets.FETCH_BATCH_SIZE = batch_size
+            assert cell_rows(conn) == built_by_etl, "conjuntos dependem do tamanho do lote"
+            print("   ✅ mesmos conjuntos lendo a fato em lotes de 997 linhas")
+
+            # Modo aproximado: estimativa dentro da tolerância
+            student_sets.build_student_sets(conn, mode=student_sets.MODE_APPROX)
+            for filters in selections(conn):
+                expected = fact_count(conn, filters)
+                estimate = cell_count(conn, filters)
+                error = abs(estimate - expected) / expected
+                assert error <= APPROX_TOLERANCE, f"aproximado {filters}: {estimate} vs {expected}"
+                print(f"   ✅ aproximado {sorted(filters) or ['(todos)']}: {estimate:,} "
+                      f"(exato {expected:,}, erro {error:.1%})")
+        finally:
+            conn.close()
+
+
+def main():
+    print("🧪 TESTE DOS CONJUNTOS DE ALUNOS POR CÉLULA")
+    print("=" * 50)
+    try:
+        test_student_set_counts()
+    except AssertionError as e:
+        print(f"❌ Falha: {e}")
+        return False
+
+    print("\n🎯 TESTE CONCLUÍDO COM SUCESSO!")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)